@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+MCPO 工具目录体积基准
+
+比较 list_tools 输出在不同格式下的字节数（UTF-8）和每个工具的平均字节数:
+- full_indent: 完整格式，indent=2 输出（旧版插件的输出方式）
+- full: 完整格式，紧凑 JSON
+- compact: 紧凑目录格式（MCPO_CATALOG_FORMAT=compact）
+
+用法:
+    python benchmarks/catalog_size.py                          # 从正在运行的 mcpo 获取工具
+    python benchmarks/catalog_size.py --catalog cache/tool_catalog.json
+    python benchmarks/catalog_size.py --desc-chars 80 --json size.json
+"""
+
+import os
+import sys
+import json
+import argparse
+from collections import defaultdict
+from pathlib import Path
+
+PLUGIN_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PLUGIN_DIR))
+
+from catalog_format import render_compact
+
+
+def load_tools(args):
+    """从目录缓存文件或正在运行的 mcpo 获取完整工具表"""
+    if args.catalog:
+        with open(args.catalog, 'r', encoding='utf-8') as f:
+            return json.load(f).get('tools') or {}
+
+    from mcpo_plugin import MCPOPlugin
+    result = MCPOPlugin().list_tools(refresh=args.refresh)
+    if not result['success']:
+        raise SystemExit(f"list_tools failed: {result.get('error')}")
+    return result['tools']
+
+
+def payload_bytes(payload, indent=None) -> int:
+    """插件标准输出中的字节数（包含 status/result 外层）"""
+    output = {'status': 'success', 'result': payload}
+    return len(json.dumps(output, ensure_ascii=False, indent=indent).encode('utf-8'))
+
+
+def measure(tools, desc_chars):
+    full = {'success': True, 'tools': tools, 'count': len(tools)}
+    compact = {'success': True, 'format': 'compact', 'count': len(tools), **render_compact(tools, desc_chars)}
+    sizes = {
+        'full_indent': payload_bytes(full, indent=2),
+        'full': payload_bytes(full),
+        'compact': payload_bytes(compact),
+    }
+    count = max(len(tools), 1)
+    return {
+        'tools': len(tools),
+        'bytes': sizes,
+        'bytesPerTool': {name: round(size / count, 1) for name, size in sizes.items()},
+        'reduction': round(1 - sizes['compact'] / sizes['full_indent'], 3) if sizes['full_indent'] else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCPO 工具目录体积基准")
+    parser.add_argument("--catalog", help="工具目录缓存文件（默认从正在运行的 mcpo 获取）")
+    parser.add_argument("--refresh", action="store_true", help="忽略目录缓存，重新从 mcpo 发现工具")
+    parser.add_argument("--desc-chars", type=int,
+                        default=int(os.getenv('MCPO_CATALOG_DESC_CHARS', '160')),
+                        help="紧凑格式中描述的最大字符数")
+    parser.add_argument("--json", metavar="FILE", help="将结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    tools = load_tools(args)
+    by_server = defaultdict(dict)
+    for name, tool in tools.items():
+        by_server[tool.get('server') or ''][name] = tool
+
+    results = {'total': measure(tools, args.desc_chars)}
+    for server, server_tools in sorted(by_server.items()):
+        results[server] = measure(server_tools, args.desc_chars)
+
+    header = f"{'服务器':<20}{'工具数':>8}{'完整(缩进)':>12}{'完整':>10}{'紧凑':>10}{'字节/工具':>12}{'缩减':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        print(f"{name:<20}{r['tools']:>8}{r['bytes']['full_indent']:>12}{r['bytes']['full']:>10}"
+              f"{r['bytes']['compact']:>10}{r['bytesPerTool']['compact']:>12}{(r['reduction'] or 0) * 100:>7.1f}%")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'descChars': args.desc_chars, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 结果已保存到: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
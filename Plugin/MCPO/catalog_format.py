@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+MCPO 工具目录的紧凑渲染
+
+list_tools 的输出会直接交给模型，完整格式为每个工具的每个参数重复输出
+description、title、example 等字段，体积随 MCP 服务器数量线性增长。紧凑格式：
+- 按服务器分组，工具名不再重复服务器前缀
+- 参数渲染为一行 "类型[*][=默认值] 描述"，* 表示必填
+- 多个工具中完全相同的较长参数定义只输出一次，放入 shared 并以 @n 引用
+- 描述按 MCPO_CATALOG_DESC_CHARS 截断
+完整定义通过 get_tool_info 按工具名或服务器名按需展开。
+"""
+
+import json
+from collections import Counter
+from typing import Dict, Any
+
+LEGEND = ('调用名为 服务器名_工具名；参数格式为 "类型[*必填][=默认值] 描述"，'
+          '@n 引用 shared 中的定义；描述已截断，完整定义请用 get_tool_info 传入工具名或服务器名')
+
+# 参数定义短于该长度时直接内联，引用反而更长
+MIN_SHARED_LENGTH = 24
+
+
+def truncate(text: str, limit: int) -> str:
+    """按字符数截断并折叠空白"""
+    text = ' '.join((text or '').split())
+    if limit and len(text) > limit:
+        return text[:limit - 1].rstrip() + '…'
+    return text
+
+
+def render_param(info: Any, desc_chars: int) -> str:
+    """把一个参数定义渲染为一行文本"""
+    if not isinstance(info, dict):
+        # 无法解析的 $ref 等回退信息
+        return truncate(str(info), desc_chars)
+    text = info.get('type') or 'string'
+    if info.get('required'):
+        text += '*'
+    if info.get('default') is not None:
+        text += '=' + json.dumps(info['default'], ensure_ascii=False)
+    description = truncate(info.get('description') or info.get('title') or '', desc_chars)
+    return f"{text} {description}" if description else text
+
+
+def render_compact(tools: Dict[str, Dict[str, Any]], desc_chars: int = 160) -> Dict[str, Any]:
+    """把完整工具表渲染为紧凑目录
+
+    Returns:
+        {'legend': ..., 'servers': {服务器: {工具: {'desc': ..., 'params': {...}}}}, 'shared': {...}}
+    """
+    rendered = {
+        name: {param: render_param(info, desc_chars) for param, info in (tool.get('parameters') or {}).items()}
+        for name, tool in tools.items()
+    }
+
+    # 在多个位置出现的较长参数定义提取为共享定义
+    counts = Counter(text for params in rendered.values() for text in params.values())
+    shared_ids: Dict[str, str] = {}
+    for params in rendered.values():
+        for text in params.values():
+            if counts[text] > 1 and len(text) >= MIN_SHARED_LENGTH and text not in shared_ids:
+                shared_ids[text] = f"@{len(shared_ids)}"
+
+    servers: Dict[str, Dict[str, Any]] = {}
+    for name, tool in tools.items():
+        server = tool.get('server') or ''
+        short_name = tool.get('original_name') or name
+        entry = {'desc': truncate(tool.get('description') or tool.get('summary') or '', desc_chars)}
+        if rendered[name]:
+            entry['params'] = {param: shared_ids.get(text, text) for param, text in rendered[name].items()}
+        servers.setdefault(server, {})[short_name] = entry
+
+    compact = {'legend': LEGEND, 'servers': servers}
+    if shared_ids:
+        compact['shared'] = {ref: text for text, ref in shared_ids.items()}
+    return compact
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+跨进程文件锁
+
+每次 VCP 调用都是独立的 mcpo_plugin.py 进程，多个进程可能同时读-改-写同一个缓存文件。
+file_lock 在旁边的 .lock 文件上加排他锁（POSIX 使用 fcntl.flock，Windows 使用 msvcrt.locking），
+同一进程内的线程另由 threading.Lock 串行化。
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+def _thread_lock(path: str) -> threading.Lock:
+    with _thread_locks_guard:
+        lock = _thread_locks.get(path)
+        if lock is None:
+            lock = _thread_locks[path] = threading.Lock()
+        return lock
+
+
+@contextmanager
+def file_lock(path: str):
+    """持有 path + '.lock' 的排他锁（不可嵌套）"""
+    lock_path = f"{path}.lock"
+    with _thread_lock(lock_path):
+        os.makedirs(os.path.dirname(lock_path) or '.', exist_ok=True)
+        with open(lock_path, 'a+b') as f:
+            if os.name == 'nt':
+                import msvcrt
+                f.seek(0)
+                # LK_LOCK 在锁被占用时每秒重试一次，最多 10 次
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                try:
+                    yield
+                finally:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
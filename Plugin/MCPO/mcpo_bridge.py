@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+MCPO 常驻桥接进程
+
+每次 VCP 调用都会重新运行 mcpo_plugin.py：重新加载配置、重新读取工具目录、
+重新建立 HTTP 连接。启用桥接（MCPO_BRIDGE_ENABLED=true）后，一个常驻进程持有
+MCPOPlugin 实例（工具目录、连接池和 mcpo 子进程句柄），mcpo_plugin.py 只负责
+把 stdin 中的请求通过本机 TCP 套接字转发给它。
+
+协议：每个连接发送一行 JSON {"token": ..., "request": {...}}，桥接进程返回一行 JSON，
+内容与 mcpo_plugin.py 的标准输出相同。token 为 MCPO_API_KEY。
+
+用法:
+    python mcpo_bridge.py            # 前台运行（通常由 mcpo_plugin.py 自动在后台启动）
+    python mcpo_bridge.py --status   # 查看桥接进程状态
+    python mcpo_bridge.py --stop     # 停止桥接进程（修改 config.env 后需要重启）
+"""
+
+import os
+import sys
+import hmac
+import json
+import time
+import socket
+import socketserver
+import subprocess
+import threading
+from typing import Dict, Any, Optional
+
+PLUGIN_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 自动启动桥接进程后等待其就绪的最长时间（秒）
+START_TIMEOUT = 10
+
+
+def bridge_settings() -> Dict[str, Any]:
+    """读取桥接配置（不创建插件实例）
+
+    与 MCPOPlugin._load_config 一致，config.env 中的值优先于环境变量。
+    """
+    values = dict(os.environ)
+    env_path = os.path.join(PLUGIN_DIR, 'config.env')
+    if os.path.exists(env_path):
+        from dotenv import dotenv_values
+        values.update({k: v for k, v in dotenv_values(env_path).items() if v is not None})
+    return {
+        'enabled': values.get('MCPO_BRIDGE_ENABLED', 'false').lower() == 'true',
+        'port': int(values.get('MCPO_BRIDGE_PORT', '9100')),
+        'token': values.get('MCPO_API_KEY', 'vcp-mcpo-secret'),
+    }
+
+
+def _connect(settings: Dict[str, Any], timeout: float = 1.0) -> socket.socket:
+    return socket.create_connection(('127.0.0.1', settings['port']), timeout=timeout)
+
+
+def _exchange(sock: socket.socket, message: Dict[str, Any]) -> Dict[str, Any]:
+    """发送一行请求并读取一行响应"""
+    with sock:
+        # 工具调用可能很慢，连接建立后不再限制等待时间（各请求在 mcpo 侧有自己的超时）
+        sock.settimeout(None)
+        sock.sendall(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as reader:
+            line = reader.readline()
+    if not line:
+        raise ConnectionError('Bridge closed the connection without a response')
+    return json.loads(line)
+
+
+def _spawn_bridge(settings: Dict[str, Any]) -> Optional[socket.socket]:
+    """在后台启动桥接进程，并以退避方式等待其开始监听"""
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__)],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+        cwd=os.getcwd(),  # 与插件相同的工作目录（mcpo.pid 相对于它）
+        env=os.environ.copy()
+    )
+    deadline = time.time() + START_TIMEOUT
+    delay = 0.05
+    while time.time() < deadline:
+        try:
+            return _connect(settings)
+        except OSError:
+            # 桥接进程已退出（例如端口被占用）时无需继续等待
+            if process.poll() is not None:
+                return None
+            time.sleep(delay)
+            delay = min(delay * 2, 0.5)
+    return None
+
+
+def forward_request(request_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """把请求转发给桥接进程
+
+    Returns:
+        桥接进程的输出；未启用桥接或无法连接（且无法启动）时返回 None，由调用方在本进程内处理
+    """
+    settings = bridge_settings()
+    if not settings['enabled']:
+        return None
+
+    try:
+        sock = _connect(settings)
+    except OSError:
+        sock = _spawn_bridge(settings)
+        if sock is None:
+            return None
+
+    # 请求一旦发出就不再回退到本进程处理，避免工具被重复调用
+    try:
+        return _exchange(sock, {'token': settings['token'], 'request': request_data})
+    except (OSError, ValueError) as e:
+        return {
+            'status': 'error',
+            'error': f'Bridge request failed: {e}'
+        }
+
+
+class BridgeServer(socketserver.ThreadingTCPServer):
+    """持有 MCPOPlugin 实例的常驻服务"""
+
+    daemon_threads = True
+    # 重启后端口可能仍处于 TIME_WAIT；Windows 上 SO_REUSEADDR 允许重复绑定，因此不启用
+    allow_reuse_address = os.name != 'nt'
+
+    def __init__(self, settings: Dict[str, Any]):
+        from mcpo_plugin import MCPOPlugin
+
+        self.plugin = MCPOPlugin()
+        self.token = settings['token']
+        self.started_at = time.time()
+        self.requests_served = 0
+        super().__init__(('127.0.0.1', settings['port']), BridgeHandler)
+
+
+class BridgeHandler(socketserver.StreamRequestHandler):
+    def _reply(self, output: Dict[str, Any]):
+        self.wfile.write(json.dumps(output, ensure_ascii=False).encode('utf-8') + b'\n')
+        self.wfile.flush()
+        # 等待客户端先关闭连接，使 TIME_WAIT 留在客户端一侧，桥接进程重启时可以立即重新绑定端口
+        try:
+            self.connection.settimeout(5)
+            self.rfile.read(1)
+        except OSError:
+            pass
+
+    def handle(self):
+        try:
+            message = json.loads(self.rfile.readline() or b'{}')
+        except ValueError:
+            return self._reply({'status': 'error', 'error': 'Invalid JSON message'})
+
+        if not hmac.compare_digest(str(message.get('token', '')), self.server.token):
+            return self._reply({'status': 'error', 'error': 'Unauthorized'})
+
+        command = message.get('command')
+        if command == 'status':
+            return self._reply({
+                'status': 'success',
+                'result': {
+                    'pid': os.getpid(),
+                    'uptime_seconds': round(time.time() - self.server.started_at, 1),
+                    'requests_served': self.server.requests_served
+                }
+            })
+        if command == 'shutdown':
+            self._reply({'status': 'success', 'result': {'message': 'Bridge stopping'}})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+
+        from mcpo_plugin import handle_request, is_stream_request
+        request_data = message.get('request') or {}
+        if is_stream_request(request_data):
+            return self._reply({'status': 'error', 'error': 'Streaming calls are not supported through the bridge'})
+        self.server.requests_served += 1
+        try:
+            output = handle_request(self.server.plugin, request_data)
+        except Exception as e:
+            output = {'status': 'error', 'error': f'Plugin execution failed: {str(e)}'}
+        self._reply(output)
+
+
+def main():
+    settings = bridge_settings()
+
+    if len(sys.argv) > 1 and sys.argv[1] in ('--status', '--stop'):
+        command = 'status' if sys.argv[1] == '--status' else 'shutdown'
+        try:
+            output = _exchange(_connect(settings), {'token': settings['token'], 'command': command})
+        except OSError:
+            output = {'status': 'error', 'error': f"Bridge is not running on port {settings['port']}"}
+        print(json.dumps(output, ensure_ascii=False, indent=2))
+        return
+
+    server = BridgeServer(settings)
+    server.plugin.logger.info(f"MCPO bridge listening on 127.0.0.1:{settings['port']}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -15,11 +15,22 @@ import time
 import signal
 import logging
 import threading
+import fnmatch
 from typing import Dict, Any, Optional, List
-import requests
-import psutil
 from pathlib import Path
 
+from tool_catalog import ToolCatalog
+from schema_resolver import SchemaResolver
+from result_cache import ResultCache, parse_patterns, parse_ttls
+from catalog_format import render_compact
+from tool_metrics import ToolMetrics
+
+# 工具发现重试间隔的上限（秒）
+DISCOVERY_RETRY_MAX = 600
+
+# 参数 schema 中含有这些字段时，工具信息附带展开后的完整 schema
+NESTED_SCHEMA_KEYS = ('properties', 'items', 'additionalProperties', 'anyOf', 'oneOf', 'allOf')
+
 class MCPOPlugin:
     def __init__(self):
         # 设置日志
@@ -36,6 +47,29 @@ class MCPOPlugin:
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json'
         }
+        # 所有发往 mcpo 的请求共用一个连接池，保持长连接
+        self.session = self._create_session()
+        # 持久化的工具目录，避免每次 get_tool_info / health_check 都重新下载所有 OpenAPI 规范
+        self.catalog = ToolCatalog(self.config['MCPO_CATALOG_PATH'])
+        # 目录的读取-发现-保存串行化（常驻桥接中多个请求可能同时重建目录）
+        self._catalog_lock = threading.RLock()
+        # 等待期之后才返回的服务器规范 {服务器: (目录键, 规范, 错误)}，由 _merge_late_specs 合并进目录
+        self._late_specs: Dict[str, Any] = {}
+        # 仍在后台获取规范的服务器，不重复发起请求
+        self._inflight_servers = set()
+        self._discovery_lock = threading.Lock()
+        self.tool_timeouts = parse_ttls(self.config['MCPO_TOOL_TIMEOUTS'])
+        # 只读工具的结果缓存（仅缓存允许列表中的工具）
+        self.result_cache = ResultCache(
+            self.config['MCPO_RESULT_CACHE_DIR'],
+            allow=parse_patterns(self.config['MCPO_RESULT_CACHE_TOOLS']),
+            default_ttl=self.config['MCPO_RESULT_CACHE_TTL'],
+            ttls=parse_ttls(self.config['MCPO_RESULT_CACHE_TTLS']),
+            max_entries=self.config['MCPO_RESULT_CACHE_MAX_ENTRIES']
+        )
+        # 按工具记录调用次数、错误率和耗时分布
+        self.metrics = ToolMetrics(self.config['MCPO_METRICS_PATH'], window=self.config['MCPO_METRICS_WINDOW'],
+                                   max_tools=self.config['MCPO_METRICS_MAX_TOOLS'])
         
     def _load_config(self) -> Dict[str, Any]:
         """加载配置"""
@@ -82,7 +116,41 @@ class MCPOPlugin:
             'PYTHON_EXECUTABLE': os.getenv('PYTHON_EXECUTABLE', 'python'),
             'MCP_CONFIG_PATH': default_config_path,  # 使用处理后的路径
             'MCPO_HOT_RELOAD': os.getenv('MCPO_HOT_RELOAD', 'true').lower() == 'true',
-            'MCPO_CONFIG_NAME': custom_config_name  # 记录自定义配置名称
+            'MCPO_CONFIG_NAME': custom_config_name,  # 记录自定义配置名称
+            'MCPO_REQUEST_TIMEOUT': float(os.getenv('MCPO_REQUEST_TIMEOUT', '30')),
+            'MCPO_BATCH_CONCURRENCY': int(os.getenv('MCPO_BATCH_CONCURRENCY', '4')),
+            'MCPO_HEALTH_TIMEOUT': float(os.getenv('MCPO_HEALTH_TIMEOUT', '0.5')),
+            'MCPO_START_TIMEOUT': float(os.getenv('MCPO_START_TIMEOUT', '60')),
+            'MCPO_DISCOVERY_TIMEOUT': float(os.getenv('MCPO_DISCOVERY_TIMEOUT', '30')),
+            'MCPO_DISCOVERY_PARTIAL_WAIT': float(os.getenv('MCPO_DISCOVERY_PARTIAL_WAIT', '5')),
+            'MCPO_DISCOVERY_RETRY_BACKOFF': float(os.getenv('MCPO_DISCOVERY_RETRY_BACKOFF', '30')),
+            'MCPO_CATALOG_PATH': os.getenv(
+                'MCPO_CATALOG_PATH',
+                os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'tool_catalog.json')
+            ),
+            'MCPO_CATALOG_FORMAT': os.getenv('MCPO_CATALOG_FORMAT', 'full').lower(),
+            'MCPO_CATALOG_DESC_CHARS': int(os.getenv('MCPO_CATALOG_DESC_CHARS', '160')),
+            'MCPO_TOOL_TIMEOUTS': os.getenv('MCPO_TOOL_TIMEOUTS', ''),
+            'MCPO_STREAM_CHUNK_BYTES': int(os.getenv('MCPO_STREAM_CHUNK_BYTES', '65536')),
+            'MCPO_SPILL_THRESHOLD_BYTES': int(os.getenv('MCPO_SPILL_THRESHOLD_BYTES', str(1024 * 1024))),
+            'MCPO_SPILL_DIR': os.getenv(
+                'MCPO_SPILL_DIR',
+                os.path.abspath(os.path.join(os.path.dirname(__file__), '../../VCPAsyncResults'))
+            ),
+            'MCPO_RESULT_CACHE_TOOLS': os.getenv('MCPO_RESULT_CACHE_TOOLS', ''),
+            'MCPO_RESULT_CACHE_TTL': float(os.getenv('MCPO_RESULT_CACHE_TTL', '60')),
+            'MCPO_RESULT_CACHE_TTLS': os.getenv('MCPO_RESULT_CACHE_TTLS', ''),
+            'MCPO_RESULT_CACHE_MAX_ENTRIES': int(os.getenv('MCPO_RESULT_CACHE_MAX_ENTRIES', '256')),
+            'MCPO_RESULT_CACHE_DIR': os.getenv(
+                'MCPO_RESULT_CACHE_DIR',
+                os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'results')
+            ),
+            'MCPO_METRICS_WINDOW': int(os.getenv('MCPO_METRICS_WINDOW', '200')),
+            'MCPO_METRICS_MAX_TOOLS': int(os.getenv('MCPO_METRICS_MAX_TOOLS', '256')),
+            'MCPO_METRICS_PATH': os.getenv(
+                'MCPO_METRICS_PATH',
+                os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'metrics.json')
+            )
         }
         
         self.logger.info(f"Loaded config: Port={config['MCPO_PORT']}, ConfigPath={config['MCP_CONFIG_PATH']}, HotReload={config['MCPO_HOT_RELOAD']}, CustomConfigName={config['MCPO_CONFIG_NAME']}")
@@ -90,65 +158,89 @@ class MCPOPlugin:
         return config
     
     def _find_mcpo_process(self) -> Optional[int]:
-        """查找 MCPO 进程 PID"""
+        """查找 MCPO 进程 PID
+        
+        只使用 PID 文件和端口检查，不再遍历系统进程表（繁忙主机上扫描进程及其连接可能耗时数百毫秒）。
+        不是由本插件启动（没有 PID 文件）的 mcpo 不会被识别。
+        """
+        import psutil
         try:
-            # 首先尝试从 PID 文件读取
-            if self.mcpo_pid_file.exists():
-                try:
-                    with open(self.mcpo_pid_file, 'r') as f:
-                        pid = int(f.read().strip())
-                    
-                    # 验证进程是否还在运行
-                    try:
-                        process = psutil.Process(pid)
-                        if process.is_running() and 'mcpo' in ' '.join(process.cmdline()).lower():
-                            return pid
-                    except (psutil.NoSuchProcess, psutil.AccessDenied):
-                        pass
-                except (ValueError, FileNotFoundError):
-                    pass
-            
-            # 如果 PID 文件不可靠，通过端口查找进程
-            for proc in psutil.process_iter(['pid', 'name', 'cmdline']):
-                try:
-                    cmdline = proc.info.get('cmdline', [])
-                    if not cmdline:
-                        continue
-                    
-                    # 检查是否是 mcpo 进程
-                    cmdline_str = ' '.join(cmdline).lower()
-                    if 'mcpo' in cmdline_str and str(self.config['MCPO_PORT']) in cmdline_str:
-                        # 双重验证：检查端口绑定
-                        try:
-                            process = psutil.Process(proc.pid)
-                            connections = process.connections(kind='inet')
-                            for conn in connections:
-                                if (conn.laddr.port == self.config['MCPO_PORT'] and 
-                                    conn.status == 'LISTEN'):
-                                    self.logger.info(f"Found MCPO process by port: PID {proc.pid}")
-                                    return proc.pid
-                        except (psutil.AccessDenied, psutil.NoSuchProcess):
-                            # 如果无法访问连接信息，只要命令行匹配就返回
-                            self.logger.info(f"Found MCPO process by cmdline: PID {proc.pid}")
-                            return proc.pid
-                            
-                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                    continue
-                    
+            with open(self.mcpo_pid_file, 'r') as f:
+                pid = int(f.read().strip())
+        except (OSError, ValueError):
             return None
-            
-        except Exception as e:
-            self.logger.warning(f"Error finding MCPO process: {e}")
+        
+        try:
+            # 验证进程是否还在运行
+            process = psutil.Process(pid)
+            if not (process.is_running() and 'mcpo' in ' '.join(process.cmdline()).lower()):
+                return None
+        except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+            return None
+        
+        # 进程存在但端口未监听时（仍在启动或已失去响应）不视为可用的 mcpo
+        if not self._port_in_use():
             return None
+        return pid
+    
+    def _port_in_use(self) -> bool:
+        """检查 MCPO 端口是否有进程在监听"""
+        import socket
+        try:
+            with socket.create_connection(('localhost', self.config['MCPO_PORT']), timeout=self.config['MCPO_HEALTH_TIMEOUT']):
+                return True
+        except OSError:
+            return False
+    
+    def _create_session(self) -> 'requests.Session':
+        """创建带连接池的会话"""
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        session = requests.Session()
+        # mcpo 总是运行在本机，不需要读取代理等环境设置
+        session.trust_env = False
+        # 连接池大小覆盖并发工具发现和批量调用
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=32)
+        session.mount('http://', adapter)
+        session.headers.update(self.headers)
+        return session
     
     def _is_server_running(self) -> bool:
-        """检查 MCPO 服务器是否运行"""
+        """检查 MCPO 服务器是否运行
+        
+        探测 /openapi.json（小型 JSON 文档），超时为 MCPO_HEALTH_TIMEOUT 秒，
+        不再下载渲染后的 /docs 页面。
+        """
+        import requests
         try:
-            response = requests.get(f"{self.base_url}/docs", timeout=5)
+            response = self.session.get(f"{self.base_url}/openapi.json", timeout=self.config['MCPO_HEALTH_TIMEOUT'])
             return response.status_code == 200
-        except:
+        except requests.exceptions.RequestException:
             return False
     
+    def _wait_for_server(self, running: bool, timeout: float) -> bool:
+        """以指数退避轮询，直到服务器达到期望的运行状态
+        
+        Args:
+            running: 期望服务器处于运行（True）或停止（False）状态
+            timeout: 最长等待时间（秒）
+        """
+        deadline = time.time() + timeout
+        delay = 0.05
+        while True:
+            if self._is_server_running() == running:
+                return True
+            # 启动过程中 mcpo 进程已经退出时无需继续等待
+            if running and self.mcpo_process and self.mcpo_process.poll() is not None:
+                self.logger.error(f"MCPO process exited with code {self.mcpo_process.returncode}")
+                return False
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, 1.0)
+    
     def _start_mcpo_server(self) -> bool:
         """启动 MCPO 服务器"""
         try:
@@ -189,14 +281,13 @@ class MCPOPlugin:
             
             self.logger.info(f"MCPO server started with PID: {self.mcpo_process.pid}")
             
-            # 等待服务器启动
-            for i in range(60):  # 等待最多 60 秒（增加超时时间）
-                if self._is_server_running():
-                    self.logger.info("MCPO server started successfully")
-                    return True
-                time.sleep(1)
+            # 等待服务器启动（退避轮询，服务器就绪后立即返回）
+            start_timeout = self.config['MCPO_START_TIMEOUT']
+            if self._wait_for_server(True, start_timeout):
+                self.logger.info("MCPO server started successfully")
+                return True
             
-            self.logger.error("MCPO server failed to start within timeout (60 seconds)")
+            self.logger.error(f"MCPO server failed to start within timeout ({start_timeout:g} seconds)")
             return False
             
         except Exception as e:
@@ -205,6 +296,7 @@ class MCPOPlugin:
     
     def _stop_mcpo_server(self) -> bool:
         """停止 MCPO 服务器"""
+        import psutil
         try:
             stopped = False
             
@@ -269,12 +361,9 @@ class MCPOPlugin:
                         pass
             
             # 验证服务器是否真的停止
-            if stopped:
-                for _ in range(10):  # 等待最多 10 秒
-                    if not self._is_server_running():
-                        self.logger.info("MCPO server stopped successfully")
-                        return True
-                    time.sleep(1)
+            if stopped and self._wait_for_server(False, 10):  # 等待最多 10 秒
+                self.logger.info("MCPO server stopped successfully")
+                return True
             
             self.logger.warning("MCPO server may not have stopped completely")
             return stopped
@@ -300,15 +389,15 @@ class MCPOPlugin:
         
         self.logger.info(f"Created example MCP config at {config_path}")
     
-    def _make_request(self, method: str, endpoint: str, **kwargs) -> Dict[str, Any]:
+    def _make_request(self, method: str, endpoint: str, timeout: float = 30, **kwargs) -> Dict[str, Any]:
         """发送 HTTP 请求到 MCPO 服务器"""
+        import requests
         url = f"{self.base_url}{endpoint}"
         
         try:
-            response = requests.request(
-                method, url, 
-                headers=self.headers,
-                timeout=30,
+            response = self.session.request(
+                method, url,
+                timeout=timeout,
                 **kwargs
             )
             response.raise_for_status()
@@ -316,58 +405,242 @@ class MCPOPlugin:
         except requests.exceptions.RequestException as e:
             raise Exception(f"Request failed: {e}")
     
-    def list_tools(self) -> Dict[str, Any]:
-        """列出所有可用工具"""
+    def _read_body(self, endpoint: str, data: Dict[str, Any], timeout: float, on_chunk=None):
+        """以流式方式读取工具调用的响应正文
+        
+        正文不超过 MCPO_SPILL_THRESHOLD_BYTES 时保存在内存中；超过后连同已读取的部分一起
+        写入 MCPO_SPILL_DIR（默认 VCPAsyncResults）下的文件，内存占用不随响应大小增长。
+        timeout 是整个调用的时间上限，而不只是单次读取的超时。
+        
+        Args:
+            on_chunk: 每读取一块且尚未转存文件时调用，参数为该块的字节
+        
+        Returns:
+            (正文字节或 None, 转存文件路径或 None, 总字节数)
+        """
+        import requests
+        url = f"{self.base_url}{endpoint}"
+        threshold = self.config['MCPO_SPILL_THRESHOLD_BYTES']
+        deadline = time.time() + timeout
+        buffer = bytearray()
+        spill_file, spill_path, total = None, None, 0
+        
         try:
-            # 获取主 OpenAPI 规范
-            main_spec = self._make_request('GET', '/openapi.json')
-            
-            tools = {}
-            
-            # 从描述中提取可用的服务器
-            description = main_spec.get('info', {}).get('description', '')
-            servers = []
-            
-            # 解析描述中的服务器链接
-            import re
-            server_pattern = r'\[([^\]]+)\]\(/([^/\)]+)/docs\)'
-            matches = re.findall(server_pattern, description)
+            with self.session.post(url, json=data, timeout=timeout, stream=True) as response:
+                response.raise_for_status()
+                for chunk in response.iter_content(chunk_size=self.config['MCPO_STREAM_CHUNK_BYTES']):
+                    if time.time() > deadline:
+                        raise TimeoutError(f"Tool call exceeded {timeout:g}s")
+                    if not chunk:
+                        continue
+                    total += len(chunk)
+                    if spill_file is None and total > threshold:
+                        os.makedirs(self.config['MCPO_SPILL_DIR'], exist_ok=True)
+                        spill_path = os.path.join(
+                            self.config['MCPO_SPILL_DIR'],
+                            f"MCPO-{endpoint.strip('/').replace('/', '_')}-{int(time.time() * 1000)}.json"
+                        )
+                        spill_file = open(spill_path, 'wb')
+                        spill_file.write(buffer)
+                        buffer = bytearray()
+                    if spill_file is not None:
+                        spill_file.write(chunk)
+                    else:
+                        buffer.extend(chunk)
+                        if on_chunk:
+                            on_chunk(chunk)
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"Request failed: {e}")
+        finally:
+            if spill_file is not None:
+                spill_file.close()
+        
+        if spill_path:
+            return None, spill_path, total
+        return bytes(buffer), None, total
+    
+    def _tool_timeout(self, tool_name: str, timeout: Optional[float] = None) -> float:
+        """工具调用超时：显式指定 > MCPO_TOOL_TIMEOUTS 中匹配的工具 > MCPO_REQUEST_TIMEOUT"""
+        if timeout:
+            return timeout
+        for pattern, seconds in self.tool_timeouts:
+            if fnmatch.fnmatchcase(tool_name, pattern):
+                return seconds
+        return self.config['MCPO_REQUEST_TIMEOUT']
+    
+    def _mcpo_started_at(self) -> Optional[float]:
+        """mcpo 进程的启动时间，用于判断目录缓存是否仍然有效"""
+        import psutil
+        pid = self._find_mcpo_process()
+        if not pid:
+            return None
+        try:
+            return psutil.Process(pid).create_time()
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return None
+    
+    def _catalog_key(self) -> str:
+        """当前 MCP 配置和 mcpo 进程对应的目录键"""
+        return ToolCatalog.compute_key(
+            self.config['MCP_CONFIG_PATH'], self._mcpo_started_at(), self.config['MCPO_PORT']
+        )
+    
+    def list_tools(self, refresh: bool = False, key: Optional[str] = None) -> Dict[str, Any]:
+        """列出所有可用工具
+        
+        上次发现时超时（pending）或失败的服务器按退避间隔重试，未到重试时间时直接返回目录，
+        不再等待这些服务器。
+        
+        Args:
+            refresh: 忽略目录缓存，重新从 mcpo 发现工具
+            key: 调用方已经计算好的目录键
+        """
+        key = key or self._catalog_key()
+        with self._catalog_lock:
+            self._merge_late_specs(key)
+            cached_tools = None if refresh else self.catalog.load(key)
+            if cached_tools is None:
+                result = self._discover_from_server(key=key)
+                if result['success']:
+                    result['retry'] = self._retry_schedule({}, result['pending_servers'], result['failed_servers'])
+            else:
+                meta = self.catalog.meta
+                retry = meta.get('retry') or {}
+                now = time.time()
+                due = [server for server, state in retry.items() if state.get('next_at', 0) <= now]
+                if not due:
+                    result = {
+                        'success': True,
+                        'tools': cached_tools,
+                        'count': len(cached_tools),
+                        'cached': True,
+                        'catalog_built_at': meta.get('built_at'),
+                        'pending_servers': meta.get('pending_servers') or [],
+                        'failed_servers': meta.get('failed_servers') or {}
+                    }
+                    return result
+                
+                # 目录不完整时只重试到期的服务器；多次错过等待期的服务器逐次延长等待时间
+                attempts = max(retry[server].get('attempts', 1) for server in due)
+                wait = self.config['MCPO_DISCOVERY_PARTIAL_WAIT'] * 2 ** attempts
+                result = self._discover_from_server(servers=due, key=key, wait=wait)
+                if result['success']:
+                    result['tools'] = {**cached_tools, **result['tools']}
+                    result['count'] = len(result['tools'])
+                    result['servers'] = meta.get('servers', [])
+                    result['pending_servers'] = [server for server in meta.get('pending_servers') or []
+                                                 if server not in due] + result['pending_servers']
+                    result['failed_servers'] = {
+                        **{server: error for server, error in (meta.get('failed_servers') or {}).items() if server not in due},
+                        **result['failed_servers']
+                    }
+                    result['retry'] = self._retry_schedule(
+                        {server: state for server, state in retry.items() if server in due},
+                        [server for server in result['pending_servers'] if server in due],
+                        {server: error for server, error in result['failed_servers'].items() if server in due}
+                    )
+                    result['retry'].update({server: state for server, state in retry.items() if server not in due})
             
-            for server_name, server_path in matches:
-                servers.append(server_path)
+            if result['success']:
+                self.catalog.save(key, result['tools'], servers=result.get('servers', []),
+                                  pending_servers=result['pending_servers'],
+                                  failed_servers=result['failed_servers'],
+                                  retry=result.pop('retry'))
+                result['cached'] = False
+            return result
+    
+    def _retry_schedule(self, previous: Dict[str, Any], pending: List[str], failed: Dict[str, str]) -> Dict[str, Any]:
+        """为仍在等待或失败的服务器安排下一次重试（间隔从 MCPO_DISCOVERY_RETRY_BACKOFF 开始逐次加倍）"""
+        now = time.time()
+        schedule = {}
+        for server in [*pending, *failed]:
+            attempts = (previous.get(server) or {}).get('attempts', 0) + 1
+            delay = min(self.config['MCPO_DISCOVERY_RETRY_BACKOFF'] * 2 ** (attempts - 1), DISCOVERY_RETRY_MAX)
+            schedule[server] = {'attempts': attempts, 'next_at': now + delay}
+        return schedule
+    
+    def _merge_late_specs(self, key: str):
+        """把等待期之后才返回的服务器规范合并进目录"""
+        with self._catalog_lock:
+            with self._discovery_lock:
+                late = {server: item for server, item in self._late_specs.items() if item[0] == key}
+                self._late_specs.clear()
+            if not late:
+                return
+            tools = self.catalog.load(key)
+            if tools is None:
+                return
+            meta = self.catalog.meta
+            tools = dict(tools)
+            pending = [server for server in meta.get('pending_servers') or [] if server not in late]
+            failed = dict(meta.get('failed_servers') or {})
+            retry = dict(meta.get('retry') or {})
+            for server, (_, spec, error) in late.items():
+                if error is None:
+                    try:
+                        tools.update(self._tools_from_spec(server, spec))
+                        failed.pop(server, None)
+                        retry.pop(server, None)
+                        continue
+                    except Exception as server_error:
+                        error = str(server_error)
+                failed[server] = error
+            self.logger.info(f"Merged late discovery results: {sorted(late)}")
+            self.catalog.save(key, tools, servers=meta.get('servers', []), pending_servers=pending,
+                              failed_servers=failed, retry=retry)
+    
+    def _discover_from_server(self, servers: Optional[List[str]] = None, key: Optional[str] = None,
+                              wait: Optional[float] = None) -> Dict[str, Any]:
+        """从 mcpo 的 OpenAPI 规范发现工具
+        
+        各服务器的规范并发获取，每个服务器有独立超时。部分结果模式下等待
+        MCPO_DISCOVERY_PARTIAL_WAIT 秒后立即返回已完成服务器的工具，其余服务器标记为 pending；
+        它们的请求在后台继续，完成后合并进目录。
+        
+        Args:
+            servers: 只发现指定的服务器；为 None 时从主规范中解析服务器列表
+            key: 迟到的结果合并进哪个目录
+            wait: 返回部分结果前最多等待的时间（秒），默认为 MCPO_DISCOVERY_PARTIAL_WAIT
+        """
+        try:
+            if servers is None:
+                # 获取主 OpenAPI 规范
+                main_spec = self._make_request('GET', '/openapi.json')
+                
+                # 从描述中提取可用的服务器
+                description = main_spec.get('info', {}).get('description', '')
+                servers = []
+                
+                # 解析描述中的服务器链接
+                import re
+                server_pattern = r'\[([^\]]+)\]\(/([^/\)]+)/docs\)'
+                matches = re.findall(server_pattern, description)
+                
+                for server_name, server_path in matches:
+                    servers.append(server_path)
             
             self.logger.info(f"Found servers: {servers}")
             
-            # 为每个服务器获取工具
+            specs, failed, pending, timings = self._fetch_server_specs(servers, key, wait)
+            
+            tools = {}
             for server in servers:
+                if server not in specs:
+                    continue
                 try:
-                    server_spec = self._make_request('GET', f'/{server}/openapi.json')
-                    server_paths = server_spec.get('paths', {})
-                    
-                    for path, methods in server_paths.items():
-                        if path.startswith('/') and 'post' in methods:
-                            tool_name = path.strip('/')
-                            if tool_name:
-                                # 使用服务器前缀来区分工具
-                                full_tool_name = f"{server}_{tool_name}"
-                                post_info = methods['post']
-                                tools[full_tool_name] = {
-                                    'name': full_tool_name,
-                                    'original_name': tool_name,
-                                    'server': server,
-                                    'description': post_info.get('description', ''),
-                                    'summary': post_info.get('summary', ''),
-                                    'parameters': self._extract_parameters(post_info),
-                                    'endpoint': f'/{server}{path}'
-                                }
+                    tools.update(self._tools_from_spec(server, specs[server]))
                 except Exception as server_error:
                     self.logger.warning(f"Failed to get tools from server {server}: {server_error}")
-                    continue
+                    failed[server] = str(server_error)
             
             return {
                 'success': True,
                 'tools': tools,
-                'count': len(tools)
+                'count': len(tools),
+                'servers': servers,
+                'pending_servers': pending,
+                'failed_servers': failed,
+                'server_timings_ms': timings
             }
             
         except Exception as e:
@@ -376,9 +649,114 @@ class MCPOPlugin:
                 'error': str(e)
             }
     
-    def _extract_parameters(self, post_info: Dict[str, Any]) -> Dict[str, Any]:
-        """从 OpenAPI 规范中提取参数信息"""
+    def _fetch_server_specs(self, servers: List[str], key: Optional[str] = None, wait: Optional[float] = None):
+        """并发获取各服务器的 OpenAPI 规范
+        
+        等待期之后才完成的请求把结果记入 _late_specs 并合并进目录；
+        仍在后台获取中的服务器不重复发起请求，直接计为 pending。
+        
+        Returns:
+            (规范字典, 失败服务器及原因, 仍在等待的服务器, 每个服务器耗时毫秒)
+        """
+        import queue
+        
+        timeout = self.config['MCPO_DISCOVERY_TIMEOUT']
+        wait = min(wait or self.config['MCPO_DISCOVERY_PARTIAL_WAIT'] or timeout, timeout)
+        results = queue.Queue()
+        collecting = [True]
+        
+        def worker(server):
+            started = time.time()
+            try:
+                spec = self._make_request('GET', f'/{server}/openapi.json', timeout=timeout)
+                outcome = (server, spec, None, time.time() - started)
+            except Exception as e:
+                outcome = (server, None, str(e), time.time() - started)
+            with self._discovery_lock:
+                self._inflight_servers.discard(server)
+                if collecting[0]:
+                    results.put(outcome)
+                    return
+                self._late_specs[server] = (key, outcome[1], outcome[2])
+            # 等待期已过：立即合并进目录（发起发现的请求保存目录后才会获得锁）
+            if key is not None:
+                try:
+                    self._merge_late_specs(key)
+                except Exception as e:
+                    self.logger.warning(f"Failed to merge late discovery result for {server}: {e}")
+        
+        with self._discovery_lock:
+            started_servers = [server for server in servers if server not in self._inflight_servers]
+            self._inflight_servers.update(started_servers)
+        # 使用守护线程：部分结果返回后，慢服务器的请求不会阻塞进程退出
+        for server in started_servers:
+            threading.Thread(target=worker, args=(server,), daemon=True).start()
+        
+        specs, failed, timings = {}, {}, {}
+        
+        def collect(item):
+            server, spec, error, elapsed = item
+            timings[server] = round(elapsed * 1000, 1)
+            if error is None:
+                specs[server] = spec
+            else:
+                self.logger.warning(f"Failed to get tools from server {server}: {error}")
+                failed[server] = error
+        
+        deadline = time.time() + wait
+        while len(specs) + len(failed) < len(started_servers):
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                collect(results.get(timeout=remaining))
+            except queue.Empty:
+                break
+        with self._discovery_lock:
+            collecting[0] = False
+        # 停止收集前已经完成的请求
+        while not results.empty():
+            collect(results.get_nowait())
+        
+        pending = [server for server in servers if server not in specs and server not in failed]
+        if pending:
+            self.logger.warning(f"Servers still pending after {wait}s: {pending}")
+        return specs, failed, pending, timings
+    
+    def _tools_from_spec(self, server: str, server_spec: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """从单个服务器的 OpenAPI 规范中提取工具"""
+        tools = {}
+        # 每个规范只建立一次 schema 索引，$ref 针对工具所属的规范解析
+        resolver = SchemaResolver(server_spec)
+        server_paths = server_spec.get('paths', {})
+        
+        for path, methods in server_paths.items():
+            if path.startswith('/') and 'post' in methods:
+                tool_name = path.strip('/')
+                if tool_name:
+                    # 使用服务器前缀来区分工具
+                    full_tool_name = f"{server}_{tool_name}"
+                    post_info = methods['post']
+                    tools[full_tool_name] = {
+                        'name': full_tool_name,
+                        'original_name': tool_name,
+                        'server': server,
+                        'description': post_info.get('description', ''),
+                        'summary': post_info.get('summary', ''),
+                        'parameters': self._extract_parameters(post_info, resolver),
+                        'endpoint': f'/{server}{path}'
+                    }
+        return tools
+    
+    def _extract_parameters(self, post_info: Dict[str, Any], resolver: Optional[SchemaResolver] = None) -> Dict[str, Any]:
+        """从 OpenAPI 规范中提取参数信息
+        
+        Args:
+            post_info: 工具的 POST 操作定义
+            resolver: 工具所属服务器规范的引用解析器，用于解析 $ref（不发起网络请求）
+        """
         parameters = {}
+        resolver = resolver or SchemaResolver(None)
         
         request_body = post_info.get('requestBody', {})
         if request_body:
@@ -387,110 +765,147 @@ class MCPOPlugin:
             schema = json_content.get('schema', {})
             
             # 处理 $ref 引用
-            if '$ref' in schema:
-                ref_path = schema['$ref']
-                # 解析 $ref 引用获取实际的 schema 定义
-                resolved_schema = self._resolve_schema_ref(ref_path, post_info)
-                if resolved_schema:
-                    properties = resolved_schema.get('properties', {})
-                    required = resolved_schema.get('required', [])
-                    
-                    for param_name, param_info in properties.items():
-                        parameters[param_name] = {
-                            'type': param_info.get('type', 'string'),
-                            'description': param_info.get('description', ''),
-                            'required': param_name in required,
-                            'default': param_info.get('default'),
-                            'title': param_info.get('title', ''),
-                            'example': param_info.get('example')
-                        }
-                else:
-                    # 如果无法解析引用，回退到简单信息
-                    parameters['$ref'] = ref_path
-                    parameters['note'] = 'Parameters defined by schema reference (unable to resolve)'
-            else:
-                # 直接定义的参数
-                properties = schema.get('properties', {})
-                required = schema.get('required', [])
-                
-                for param_name, param_info in properties.items():
-                    parameters[param_name] = {
-                        'type': param_info.get('type', 'string'),
-                        'description': param_info.get('description', ''),
-                        'required': param_name in required,
-                        'default': param_info.get('default'),
-                        'title': param_info.get('title', ''),
-                        'example': param_info.get('example')
-                    }
+            resolved_schema = resolver.resolve(schema)
+            if resolved_schema is None:
+                # 如果无法解析引用，回退到简单信息
+                parameters['$ref'] = schema.get('$ref', '')
+                parameters['note'] = 'Parameters defined by schema reference (unable to resolve)'
+                return parameters
+            
+            properties = resolved_schema.get('properties', {})
+            required = resolved_schema.get('required', [])
+            
+            for param_name, param_info in properties.items():
+                # 参数本身也可能是引用（嵌套模型）
+                param_info = resolver.resolve(param_info) or param_info
+                parameters[param_name] = {
+                    'type': self._schema_type(param_info, resolver),
+                    'description': param_info.get('description', ''),
+                    'required': param_name in required,
+                    'default': param_info.get('default'),
+                    'title': param_info.get('title', ''),
+                    'example': param_info.get('example')
+                }
+                # 数组、对象和联合类型的参数附带展开了所有嵌套引用的完整 schema
+                if any(key in param_info for key in NESTED_SCHEMA_KEYS):
+                    parameters[param_name]['schema'] = resolver.expand(param_info)
         
         return parameters
     
-    def _resolve_schema_ref(self, ref_path: str, post_info: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """解析 OpenAPI schema 引用"""
-        try:
-            # 提取引用路径中的 schema 名称
-            # 格式通常是 "#/components/schemas/schema_name"
-            if ref_path.startswith('#/components/schemas/'):
-                schema_name = ref_path.split('/')[-1]
-                
-                # 需要从完整的 server spec 中获取 components
-                # 从 endpoint 信息推断服务器名称
-                server_name = None
-                
-                # 从当前 post_info 的上下文中尝试获取服务器信息
-                # 这里我们需要重新请求完整的 openapi.json 来获取 components
-                
-                # 尝试从多个可能的服务器获取 schema
-                for server in ['time', 'context7', 'memory', 'filesystem', 'brave_search', 'web_search', 'github']:
-                    try:
-                        server_spec = self._make_request('GET', f'/{server}/openapi.json')
-                        if server_spec and 'components' in server_spec:
-                            schemas = server_spec['components'].get('schemas', {})
-                            if schema_name in schemas:
-                                return schemas[schema_name]
-                    except:
-                        continue
-                        
-            return None
-        except Exception as e:
-            self.logger.warning(f"Failed to resolve schema reference {ref_path}: {e}")
-            return None
+    @staticmethod
+    def _schema_type(schema: Dict[str, Any], resolver: SchemaResolver) -> str:
+        """推断参数类型，Optional[X]（anyOf: [X, null]）取 X 的类型"""
+        if 'type' in schema:
+            return schema['type']
+        for option in schema.get('anyOf') or schema.get('oneOf') or []:
+            option = resolver.resolve(option) or option
+            if option.get('type') and option.get('type') != 'null':
+                return option['type']
+        if 'properties' in schema:
+            return 'object'
+        return 'string'
+    
+    def _ensure_catalog(self, key: str):
+        """目录失效（mcpo 重启或配置变化）时重建；并发的调用只重建一次"""
+        if self.catalog.load(key) is not None:
+            return
+        with self._catalog_lock:
+            if self.catalog.load(key) is None:
+                self.list_tools(key=key)
+    
+    def _tool_endpoint(self, tool_name: str, key: Optional[str] = None) -> str:
+        """工具名对应的 mcpo 端点
+        
+        Args:
+            key: 目录键；批量调用时由调用方计算一次后传入
+        """
+        # 优先使用目录中记录的端点（服务器名本身可能包含下划线），目录失效时先重建，避免按下划线拆分出错误的端点
+        key = key or self._catalog_key()
+        self._ensure_catalog(key)
+        tool_info = self.catalog.get(key, tool_name)
+        if tool_info:
+            return tool_info['endpoint']
+        # 判断是否是新格式的工具名称（server_toolname）
+        if '_' in tool_name:
+            # 新格式: server_toolname
+            server, original_tool = tool_name.split('_', 1)
+            return f'/{server}/{original_tool}'
+        # 旧格式或直接工具名
+        return f'/{tool_name}'
     
-    def call_tool(self, tool_name: str, arguments: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
-        """调用指定工具"""
+    def call_tool(self, tool_name: str, arguments: Optional[Dict[str, Any]] = None,
+                  timeout: Optional[float] = None, use_cache: bool = True,
+                  catalog_key: Optional[str] = None) -> Dict[str, Any]:
+        """调用指定工具
+        
+        Args:
+            tool_name: 工具名称（服务器名_工具名）
+            arguments: 工具参数
+            timeout: 调用超时（秒），默认取 MCPO_TOOL_TIMEOUTS 中匹配的值或 MCPO_REQUEST_TIMEOUT
+            use_cache: 为 False 时不读取缓存而是重新调用，成功的结果仍会写回缓存（即刷新该条目）；
+                       仅对 MCPO_RESULT_CACHE_TOOLS 中的工具生效
+            catalog_key: 目录键，未提供时计算一次（需要扫描进程表并读取 MCP 配置）
+        """
+        if not tool_name:
+            return {
+                'success': False,
+                'error': 'Tool name is required'
+            }
+        
+        started = time.time()
+        catalog_key = catalog_key or self._catalog_key()
+        result = self._call_tool(tool_name, arguments, timeout, use_cache, catalog_key)
+        self._record_metrics(tool_name, result.get('endpoint'), started, result, catalog_key)
+        return result
+    
+    def _call_tool(self, tool_name: str, arguments: Optional[Dict[str, Any]],
+                   timeout: Optional[float], use_cache: bool, catalog_key: str) -> Dict[str, Any]:
         try:
-            if not tool_name:
-                return {
-                    'success': False,
-                    'error': 'Tool name is required'
-                }
-            
             # 准备请求数据
             data = arguments or {}
             
-            # 判断是否是新格式的工具名称（server_toolname）
-            if '_' in tool_name:
-                # 新格式: server_toolname
-                parts = tool_name.split('_', 1)
-                if len(parts) == 2:
-                    server, original_tool = parts
-                    endpoint = f'/{server}/{original_tool}'
-                else:
-                    endpoint = f'/{tool_name}'
-            else:
-                # 旧格式或直接工具名
-                endpoint = f'/{tool_name}'
+            endpoint = self._tool_endpoint(tool_name, catalog_key)
+            
+            if use_cache:
+                hit, cached_result = self.result_cache.get(tool_name, data)
+                if hit:
+                    return {
+                        'success': True,
+                        'tool_name': tool_name,
+                        'endpoint': endpoint,
+                        'result': cached_result,
+                        'cached': True
+                    }
             
             self.logger.info(f"Calling tool {tool_name} at endpoint {endpoint}")
             
-            # 发送请求
-            result = self._make_request('POST', endpoint, json=data)
+            # 发送请求（流式读取，超大响应转存到文件）
+            body, spill_path, size = self._read_body(endpoint, data, self._tool_timeout(tool_name, timeout))
+            if spill_path:
+                self.logger.info(f"Tool {tool_name} returned {size} bytes, saved to {spill_path}")
+                with open(spill_path, 'r', encoding='utf-8', errors='replace') as f:
+                    preview = f.read(2000)
+                return {
+                    'success': True,
+                    'tool_name': tool_name,
+                    'endpoint': endpoint,
+                    'result': None,
+                    'result_file': spill_path,
+                    'bytes': size,
+                    'preview': preview,
+                    'cached': False
+                }
+            
+            result = json.loads(body) if body else None
+            # use_cache=False 时同样写回，作为对该条目的刷新
+            self.result_cache.put(tool_name, data, result)
             
             return {
                 'success': True,
                 'tool_name': tool_name,
                 'endpoint': endpoint,
-                'result': result
+                'result': result,
+                'cached': False
             }
             
         except Exception as e:
@@ -500,10 +915,187 @@ class MCPOPlugin:
                 'error': str(e)
             }
     
+    def _record_metrics(self, tool_name: str, endpoint: Optional[str], started: float, result: Dict[str, Any],
+                        catalog_key: Optional[str] = None):
+        """记录一次工具调用的结果和耗时"""
+        if self.metrics.window <= 0:
+            return
+        if endpoint:
+            # 端点格式为 /服务器名/工具名
+            server = endpoint.strip('/').split('/')[0]
+        else:
+            tool_info = self.catalog.get(catalog_key or self._catalog_key(), tool_name) or {}
+            server = tool_info.get('server') or tool_name.split('_', 1)[0]
+        self.metrics.record(
+            tool_name,
+            server,
+            (time.time() - started) * 1000,
+            success=result.get('success', False),
+            error=result.get('error'),
+            cached=result.get('cached', False)
+        )
+    
+    def call_tool_stream(self, tool_name: str, arguments: Optional[Dict[str, Any]] = None,
+                         timeout: Optional[float] = None, emit=None) -> Dict[str, Any]:
+        """以 NDJSON 事件流的方式调用工具
+        
+        依次产生 start、若干 chunk（正文文本片段）和 end 事件；响应超过
+        MCPO_SPILL_THRESHOLD_BYTES 时停止输出 chunk，end 事件的 result_file 指向完整正文。
+        
+        Args:
+            emit: 接收每个事件字典的回调，默认逐行写入标准输出
+        
+        Returns:
+            end 事件
+        """
+        import codecs
+        
+        if emit is None:
+            def emit(event):
+                sys.stdout.write(json.dumps(event, ensure_ascii=False) + '\n')
+                sys.stdout.flush()
+        
+        started = time.time()
+        if not tool_name:
+            event = {'type': 'end', 'status': 'error', 'error': 'Tool name is required'}
+            emit(event)
+            return event
+        
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        sequence = [0]
+        
+        def on_chunk(chunk: bytes):
+            text = decoder.decode(chunk)
+            if text:
+                emit({'type': 'chunk', 'seq': sequence[0], 'data': text})
+                sequence[0] += 1
+        
+        endpoint = None
+        try:
+            endpoint = self._tool_endpoint(tool_name)
+            emit({'type': 'start', 'tool_name': tool_name, 'endpoint': endpoint})
+            self.logger.info(f"Streaming tool {tool_name} at endpoint {endpoint}")
+            _, spill_path, size = self._read_body(endpoint, arguments or {}, self._tool_timeout(tool_name, timeout), on_chunk)
+            tail = decoder.decode(b'', final=True)
+            if tail and not spill_path:
+                emit({'type': 'chunk', 'seq': sequence[0], 'data': tail})
+            event = {
+                'type': 'end',
+                'status': 'success',
+                'bytes': size,
+                'elapsed_ms': round((time.time() - started) * 1000, 1)
+            }
+            if spill_path:
+                event['result_file'] = spill_path
+        except Exception as e:
+            event = {
+                'type': 'end',
+                'status': 'error',
+                'error': str(e),
+                'elapsed_ms': round((time.time() - started) * 1000, 1)
+            }
+        self._record_metrics(tool_name, endpoint, started,
+                             {'success': event['status'] == 'success', 'error': event.get('error')})
+        emit(event)
+        return event
+    
+    def call_tools_batch(self, calls: List[Dict[str, Any]], max_concurrency: Optional[int] = None,
+                         timeout: Optional[float] = None) -> Dict[str, Any]:
+        """并发调用多个工具
+        
+        Args:
+            calls: 调用列表，每项为 {"tool_name": ..., "arguments": {...}, "timeout": 可选}
+            max_concurrency: 最大并发数，默认为 MCPO_BATCH_CONCURRENCY
+            timeout: 每个调用的默认超时（秒），默认为 MCPO_REQUEST_TIMEOUT
+        
+        Returns:
+            按输入顺序排列的结果，每项包含各自的状态和耗时
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        
+        if not isinstance(calls, list) or not calls:
+            return {
+                'success': False,
+                'error': 'calls must be a non-empty list of {tool_name, arguments}'
+            }
+        
+        def run(index: int, call: Any) -> Dict[str, Any]:
+            started = time.time()
+            item = {'index': index}
+            try:
+                if not isinstance(call, dict):
+                    raise ValueError('Each call must be an object with tool_name and arguments')
+                tool_name = call.get('tool_name') or call.get('tool_name_param', '')
+                arguments = call.get('arguments') or {}
+                if isinstance(arguments, str):
+                    arguments = json.loads(arguments) if arguments.strip() else {}
+                item['tool_name'] = tool_name
+                call_timeout = float(call['timeout']) if call.get('timeout') else timeout
+                result = self.call_tool(tool_name, arguments, timeout=call_timeout, catalog_key=catalog_key)
+            except (ValueError, TypeError) as e:
+                result = {'success': False, 'error': f'Invalid call: {e}'}
+            
+            item['status'] = 'success' if result['success'] else 'error'
+            if result['success']:
+                item['endpoint'] = result['endpoint']
+                item['result'] = result['result']
+                item['cached'] = result.get('cached', False)
+                if result.get('result_file'):
+                    item['result_file'] = result['result_file']
+                    item['bytes'] = result['bytes']
+            else:
+                item['error'] = result.get('error', 'Unknown error')
+            item['elapsed_ms'] = round((time.time() - started) * 1000, 1)
+            return item
+        
+        workers = max(1, min(int(max_concurrency or self.config['MCPO_BATCH_CONCURRENCY']), len(calls)))
+        started = time.time()
+        # 目录键只计算一次，并在分发前准备好工具目录，避免各线程同时重建
+        catalog_key = self._catalog_key()
+        self._ensure_catalog(catalog_key)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(run, range(len(calls)), calls))
+        
+        failed = sum(1 for item in results if item['status'] != 'success')
+        return {
+            'success': True,
+            'results': results,
+            'count': len(results),
+            'succeeded': len(results) - failed,
+            'failed': failed,
+            'concurrency': workers,
+            'elapsed_ms': round((time.time() - started) * 1000, 1)
+        }
+    
+    def _compact_listing(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """把 list_tools 的结果转换为紧凑目录格式"""
+        listing = {
+            'success': True,
+            'format': 'compact',
+            'count': result['count'],
+            **render_compact(result['tools'], self.config['MCPO_CATALOG_DESC_CHARS'])
+        }
+        for key in ('cached', 'catalog_built_at', 'pending_servers', 'failed_servers'):
+            if result.get(key):
+                listing[key] = result[key]
+        return listing
+    
     def get_tool_info(self, tool_name: str) -> Dict[str, Any]:
-        """获取工具详细信息"""
+        """获取工具详细信息
+        
+        tool_name 为服务器名时返回该服务器所有工具的完整定义（紧凑目录的按需展开）。
+        """
         try:
-            tools = self.list_tools()
+            # 命中目录缓存时只需一次字典查找
+            key = self._catalog_key()
+            tool_info = self.catalog.get(key, tool_name)
+            if tool_info:
+                return {
+                    'success': True,
+                    'tool_info': tool_info
+                }
+            
+            tools = self.list_tools(key=key)
             if not tools['success']:
                 return tools
             
@@ -512,6 +1104,15 @@ class MCPOPlugin:
                     'success': True,
                     'tool_info': tools['tools'][tool_name]
                 }
+            
+            server_tools = {name: info for name, info in tools['tools'].items() if info.get('server') == tool_name}
+            if server_tools:
+                return {
+                    'success': True,
+                    'server': tool_name,
+                    'tools': server_tools,
+                    'count': len(server_tools)
+                }
             else:
                 return {
                     'success': False,
@@ -526,6 +1127,7 @@ class MCPOPlugin:
     
     def manage_server(self, operation: str) -> Dict[str, Any]:
         """管理 MCPO 服务器"""
+        import psutil
         try:
             if operation == 'start':
                 # 先检查服务是否已经在运行（容错机制）
@@ -648,6 +1250,9 @@ class MCPOPlugin:
                         'error': f'Config file not found: {config_path}'
                     }
                 
+                # 配置文件的内容哈希是目录键的一部分，这里显式清除以便下次调用立即重建
+                self.catalog.invalidate()
+                
                 # 如果启用了热重载，mcpo会自动检测文件变化
                 if self.config['MCPO_HOT_RELOAD']:
                     return {
@@ -683,9 +1288,8 @@ class MCPOPlugin:
             if not restart_result['success']:
                 return restart_result
             
-            # 获取工具列表
-            time.sleep(2)  # 等待服务器完全启动
-            tools_result = self.list_tools()
+            # 获取工具列表（重启后强制重建目录；启动时已等待服务器就绪）
+            tools_result = self.list_tools(refresh=True)
             
             return {
                 'success': True,
@@ -784,7 +1388,8 @@ class MCPOPlugin:
                     tools = self.list_tools()
                     health['tools'] = {
                         'available': tools['success'],
-                        'count': tools.get('count', 0) if tools['success'] else 0
+                        'count': tools.get('count', 0) if tools['success'] else 0,
+                        'cached': tools.get('cached', False)
                     }
                 except:
                     health['tools'] = {
@@ -793,6 +1398,8 @@ class MCPOPlugin:
                         'error': 'Failed to fetch tools'
                     }
             
+            health['result_cache'] = self.result_cache.stats()
+            
             return {
                 'success': True,
                 'health': health
@@ -804,13 +1411,47 @@ class MCPOPlugin:
                 'error': str(e)
             }
 
+    def get_metrics(self, server_name: Optional[str] = None, reset: bool = False) -> Dict[str, Any]:
+        """按服务器和工具汇总的调用指标
+        
+        Args:
+            server_name: 只返回该服务器的指标
+            reset: 返回当前指标后清空
+        """
+        try:
+            report = self.metrics.report(server_name or None)
+            if reset:
+                self.metrics.reset()
+            # 按 p95 从慢到快排列服务器，便于定位拖慢对话的 MCP 服务器
+            slowest = sorted(
+                (name for name, item in report['servers'].items() if item['p95_ms'] is not None),
+                key=lambda name: report['servers'][name]['p95_ms'],
+                reverse=True
+            )
+            return {
+                'success': True,
+                'metrics': report,
+                'slowest_servers': slowest,
+                'reset': reset
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+    
     def process_request(self, request_data: Dict[str, Any]) -> Dict[str, Any]:
         """处理 VCP 请求"""
         try:
             action = request_data.get('action', '').lower()
             
             if action == 'list_tools':
-                return self.list_tools()
+                refresh = str(request_data.get('refresh', 'false')).lower() in ('true', '1', 'yes')
+                result = self.list_tools(refresh=refresh)
+                output_format = str(request_data.get('format') or self.config['MCPO_CATALOG_FORMAT']).lower()
+                if output_format == 'compact' and result['success']:
+                    return self._compact_listing(result)
+                return result
             
             elif action == 'call_tool':
                 tool_name = request_data.get('tool_name_param', '')
@@ -825,7 +1466,39 @@ class MCPOPlugin:
                         'error': f'Invalid JSON in arguments: {arguments_str}'
                     }
                 
-                return self.call_tool(tool_name, arguments)
+                timeout = request_data.get('timeout')
+                timeout = float(timeout) if timeout else None
+                
+                # 流式模式：事件直接逐行写入标准输出
+                if str(request_data.get('stream', 'false')).lower() in ('true', '1', 'yes'):
+                    event = self.call_tool_stream(tool_name, arguments, timeout=timeout)
+                    return {
+                        'success': event['status'] == 'success',
+                        'streamed': True,
+                        'error': event.get('error')
+                    }
+                
+                use_cache = str(request_data.get('use_cache', 'true')).lower() not in ('false', '0', 'no')
+                return self.call_tool(tool_name, arguments, timeout=timeout, use_cache=use_cache)
+            
+            elif action == 'call_tools_batch':
+                calls = request_data.get('calls', [])
+                if isinstance(calls, str):
+                    try:
+                        calls = json.loads(calls) if calls.strip() else []
+                    except json.JSONDecodeError:
+                        return {
+                            'success': False,
+                            'error': f'Invalid JSON in calls: {calls}'
+                        }
+                
+                max_concurrency = request_data.get('max_concurrency')
+                timeout = request_data.get('timeout')
+                return self.call_tools_batch(
+                    calls,
+                    max_concurrency=int(max_concurrency) if max_concurrency else None,
+                    timeout=float(timeout) if timeout else None
+                )
             
             elif action == 'get_tool_info':
                 tool_name = request_data.get('tool_name_param', '')
@@ -844,6 +1517,10 @@ class MCPOPlugin:
             elif action == 'list_configs':
                 return self.list_configs()
             
+            elif action == 'metrics':
+                reset = str(request_data.get('reset', 'false')).lower() in ('true', '1', 'yes')
+                return self.get_metrics(request_data.get('server_name'), reset=reset)
+            
             else:
                 return {
                     'success': False,
@@ -856,6 +1533,48 @@ class MCPOPlugin:
                 'error': f'Processing error: {str(e)}'
             }
 
+# 常驻桥接进程中多个请求可能同时触发自动启动
+_auto_start_lock = threading.Lock()
+
+
+def is_stream_request(request_data: Dict[str, Any]) -> bool:
+    """是否为流式 call_tool 请求"""
+    return (request_data.get('action', '').lower() == 'call_tool' and
+            str(request_data.get('stream', 'false')).lower() in ('true', '1', 'yes'))
+
+def handle_request(plugin: MCPOPlugin, request_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """处理一个请求并构建输出（供 main 和常驻桥接进程共用）
+    
+    流式请求的事件直接写入标准输出，此时返回 None。
+    """
+    # 检查操作类型，只在非 manage_server 操作时才自动启动
+    action = request_data.get('action', '').lower()
+    
+    # 自动启动服务器（如果需要且不是管理操作）
+    if action != 'manage_server' and plugin.config['MCPO_AUTO_START']:
+        with _auto_start_lock:
+            if not plugin._is_server_running():
+                plugin._start_mcpo_server()
+    
+    # 处理请求
+    result = plugin.process_request(request_data)
+    
+    # 流式调用的结果已经以 NDJSON 事件写出
+    if result.get('streamed'):
+        return None
+    
+    # 构建响应
+    if result.get('success', False):
+        return {
+            'status': 'success',
+            'result': result
+        }
+    return {
+        'status': 'error',
+        'error': result.get('error', 'Unknown error'),
+        'result': result
+    }
+
 def main():
     """主入口函数"""
     try:
@@ -879,36 +1598,19 @@ def main():
             }))
             sys.exit(1)
         
-        # 创建插件实例
-        plugin = MCPOPlugin()
-        
-        # 检查操作类型，只在非 manage_server 操作时才自动启动
-        action = request_data.get('action', '').lower()
-        
-        # 自动启动服务器（如果需要且不是管理操作）
-        if (action != 'manage_server' and 
-            plugin.config['MCPO_AUTO_START'] and 
-            not plugin._is_server_running()):
-            plugin._start_mcpo_server()
-        
-        # 处理请求
-        result = plugin.process_request(request_data)
-        
-        # 构建响应
-        if result.get('success', False):
-            output = {
-                'status': 'success',
-                'result': result
-            }
-        else:
-            output = {
-                'status': 'error',
-                'error': result.get('error', 'Unknown error'),
-                'result': result
-            }
+        # 启用常驻桥接进程时只做转发；未启用或桥接不可用时在本进程内处理
+        # 流式请求总是在本进程内处理（桥接协议每个请求只返回一行）
+        output = None
+        if not is_stream_request(request_data):
+            from mcpo_bridge import forward_request
+            output = forward_request(request_data)
+        if output is None:
+            plugin = MCPOPlugin()
+            output = handle_request(plugin, request_data)
         
-        # 输出结果
-        print(json.dumps(output, ensure_ascii=False, indent=2))
+        # 输出结果（紧凑格式，大结果不再因缩进膨胀）
+        if output is not None:
+            print(json.dumps(output, ensure_ascii=False))
         
     except Exception as e:
         print(json.dumps({
@@ -918,4 +1620,4 @@ def main():
         sys.exit(1)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
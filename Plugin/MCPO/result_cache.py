@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+MCPO 工具结果缓存
+
+对只读（幂等）工具的调用结果进行记忆化，键为工具名 + 规范化后的 JSON 参数。
+只有允许列表中的工具会被缓存（默认不缓存任何工具），每个工具可以单独设置 TTL。
+每个条目保存为缓存目录中的一个文件，使每次调用都是独立进程时也能在一次对话内复用结果；
+条目数超过上限时按最近访问时间（文件 mtime）淘汰。统计文件同时记录近似的条目数，
+只有超过上限时才列出缓存目录，一次淘汰到上限的 90%；统计文件的读-改-写持有跨进程文件锁。
+"""
+
+import os
+import json
+import time
+import fnmatch
+import hashlib
+import threading
+from typing import Dict, Any, Optional, List, Tuple
+
+from file_lock import file_lock
+
+STATS_FILE = '_stats.json'
+
+# 淘汰后保留的条目比例，避免达到上限后每次写入都要列出目录
+EVICT_TO = 0.9
+
+
+def parse_patterns(value: str) -> List[str]:
+    """解析逗号分隔的工具名列表（支持 * 通配符）"""
+    return [item.strip() for item in (value or '').split(',') if item.strip()]
+
+
+def parse_ttls(value: str) -> List[Tuple[str, float]]:
+    """解析 "工具名=秒数" 形式的逗号分隔列表（工具名支持 * 通配符）"""
+    ttls = []
+    for item in parse_patterns(value):
+        pattern, _, seconds = item.partition('=')
+        try:
+            ttls.append((pattern.strip(), float(seconds)))
+        except ValueError:
+            continue
+    return ttls
+
+
+class ResultCache:
+    """持久化的工具结果缓存"""
+
+    def __init__(self, cache_dir: str, allow: List[str], default_ttl: float = 60,
+                 ttls: Optional[List[Tuple[str, float]]] = None, max_entries: int = 256):
+        self.cache_dir = cache_dir
+        self.allow = allow
+        self.default_ttl = default_ttl
+        self.ttls = ttls or []
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.allow) and self.max_entries > 0
+
+    def ttl_for(self, tool_name: str) -> Optional[float]:
+        """工具的 TTL；不在允许列表中时返回 None"""
+        if not any(fnmatch.fnmatchcase(tool_name, pattern) for pattern in self.allow):
+            return None
+        for pattern, ttl in self.ttls:
+            if fnmatch.fnmatchcase(tool_name, pattern):
+                return ttl
+        return self.default_ttl
+
+    @staticmethod
+    def make_key(tool_name: str, arguments: Optional[Dict[str, Any]]) -> str:
+        """工具名 + 规范化 JSON 参数（键排序、无多余空白）的哈希"""
+        canonical = json.dumps(arguments or {}, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(f"{tool_name}\n{canonical}".encode('utf-8')).hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _write_json(self, path: str, data: Dict[str, Any]):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+    def _record(self, recount: Optional[int] = None, **increments) -> Dict[str, Any]:
+        """累加统计计数（保存在缓存目录的小文件中），返回更新后的计数
+
+        Args:
+            recount: 实际列出目录得到的条目数，覆盖近似的 entries 计数
+        """
+        path = os.path.join(self.cache_dir, STATS_FILE)
+        try:
+            with file_lock(path):
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        stats = json.load(f)
+                except (OSError, ValueError):
+                    stats = {}
+                if 'entries' not in stats:
+                    # 旧版统计文件或首次使用：列出一次目录作为初始值
+                    stats['entries'] = len(self._entry_files())
+                for name, value in increments.items():
+                    stats[name] = stats.get(name, 0) + value
+                if recount is not None:
+                    stats['entries'] = recount
+                self._write_json(path, stats)
+                return stats
+        except OSError:
+            return {}
+
+    def get(self, tool_name: str, arguments: Optional[Dict[str, Any]]) -> Tuple[bool, Any]:
+        """查询缓存
+
+        Returns:
+            (是否命中, 结果)
+        """
+        if not self.enabled or self.ttl_for(tool_name) is None:
+            return False, None
+
+        path = self._entry_path(self.make_key(tool_name, arguments))
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            self._record(misses=1)
+            return False, None
+
+        if time.time() >= entry.get('expires_at', 0):
+            try:
+                os.remove(path)
+                removed = 1
+            except OSError:
+                removed = 0
+            self._record(misses=1, expired=1, entries=-removed)
+            return False, None
+
+        # 更新访问时间，供 LRU 淘汰使用
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._record(hits=1)
+        return True, entry.get('result')
+
+    def put(self, tool_name: str, arguments: Optional[Dict[str, Any]], result: Any):
+        """保存一次成功调用的结果"""
+        if not self.enabled:
+            return
+        ttl = self.ttl_for(tool_name)
+        if not ttl or ttl <= 0:
+            return
+
+        path = self._entry_path(self.make_key(tool_name, arguments))
+        is_new = not os.path.exists(path)
+        try:
+            self._write_json(path, {
+                'tool': tool_name,
+                'result': result,
+                'expires_at': time.time() + ttl
+            })
+        except (OSError, TypeError, ValueError):
+            return
+        stats = self._record(stores=1, entries=int(is_new))
+        # 只有近似条目数超过上限时才列出目录淘汰，并以实际条目数校正近似值
+        if stats.get('entries', 0) > self.max_entries:
+            with self._lock:
+                evicted, remaining = self._evict()
+            self._record(recount=remaining, evictions=evicted)
+
+    def _entry_files(self) -> List[str]:
+        try:
+            names = os.listdir(self.cache_dir)
+        except OSError:
+            return []
+        return [os.path.join(self.cache_dir, name) for name in names
+                if name.endswith('.json') and name != STATS_FILE]
+
+    def _evict(self) -> Tuple[int, int]:
+        """超过条目上限时删除最久未访问的条目，直到只剩上限的 EVICT_TO
+
+        Returns:
+            (删除数量, 剩余条目数)
+        """
+        files = self._entry_files()
+        if len(files) <= self.max_entries:
+            return 0, len(files)
+
+        def mtime(path):
+            try:
+                return os.path.getmtime(path)
+            except OSError:
+                return 0
+
+        keep = int(self.max_entries * EVICT_TO)
+        evicted = 0
+        for path in sorted(files, key=mtime)[:len(files) - keep]:
+            try:
+                os.remove(path)
+                evicted += 1
+            except OSError:
+                pass
+        return evicted, len(files) - evicted
+
+    def clear(self):
+        for path in self._entry_files():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        self._record(recount=0)
+
+    def stats(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.cache_dir, STATS_FILE), 'r', encoding='utf-8') as f:
+                counts = json.load(f)
+        except (OSError, ValueError):
+            counts = {}
+        hits, misses = counts.get('hits', 0), counts.get('misses', 0)
+        return {
+            'enabled': self.enabled,
+            'allow': self.allow,
+            'entries': len(self._entry_files()),
+            'max_entries': self.max_entries,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+            'stores': counts.get('stores', 0),
+            'evictions': counts.get('evictions', 0),
+            'expired': counts.get('expired', 0)
+        }
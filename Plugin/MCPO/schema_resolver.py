@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+OpenAPI $ref 解析
+
+针对单个服务器的 openapi.json 解析本地引用（"#/components/schemas/..." 等 JSON 指针）：
+- components.schemas 索引在构造时建立一次，按名称查找是一次字典查找
+- 支持引用链（A -> B -> C）、嵌套在 properties / items / anyOf 等位置的引用
+- 递归引用（如 Entity.relations -> Entity）在展开时保留为 {'$ref': ...}，不会无限展开
+- 解析结果按引用路径记忆化，整个过程不发起任何网络请求
+"""
+
+from typing import Dict, Any, Optional
+
+SCHEMA_PREFIX = '#/components/schemas/'
+
+# 展开时需要递归处理的子 schema 位置
+_NESTED_KEYS = ('items', 'additionalProperties', 'not')
+_NESTED_LIST_KEYS = ('allOf', 'anyOf', 'oneOf', 'prefixItems')
+
+
+class SchemaResolver:
+    """单个 OpenAPI 规范的引用解析器"""
+
+    def __init__(self, spec: Optional[Dict[str, Any]]):
+        self.spec = spec or {}
+        self.schemas: Dict[str, Any] = (self.spec.get('components') or {}).get('schemas') or {}
+        self._targets: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._expanded: Dict[str, Dict[str, Any]] = {}
+
+    def _lookup(self, ref: str) -> Optional[Dict[str, Any]]:
+        """按引用路径取出目标 schema（不跟随目标自身的引用）"""
+        if ref in self._targets:
+            return self._targets[ref]
+
+        target = None
+        if ref.startswith(SCHEMA_PREFIX) and '/' not in ref[len(SCHEMA_PREFIX):]:
+            target = self.schemas.get(ref[len(SCHEMA_PREFIX):])
+        elif ref.startswith('#/'):
+            # 其他本地 JSON 指针，例如 "#/$defs/Name"
+            target = self.spec
+            for part in ref[2:].split('/'):
+                part = part.replace('~1', '/').replace('~0', '~')
+                if isinstance(target, dict) and part in target:
+                    target = target[part]
+                else:
+                    target = None
+                    break
+
+        self._targets[ref] = target if isinstance(target, dict) else None
+        return self._targets[ref]
+
+    def resolve(self, schema: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """浅解析：跟随顶层引用链，并展开只包裹一个引用的 allOf
+
+        外层 schema 上的 description、default 等兄弟字段优先于被引用的定义。
+        无法解析时返回 None。
+        """
+        if not isinstance(schema, dict):
+            return None
+
+        seen = set()
+        overrides: Dict[str, Any] = {}
+        while True:
+            if '$ref' in schema:
+                ref = schema['$ref']
+                target = self._lookup(ref) if ref not in seen else None
+            elif len(schema.get('allOf') or []) == 1 and '$ref' in schema['allOf'][0]:
+                # pydantic 为带描述的引用字段生成 {"allOf": [{"$ref": ...}], "description": ...}
+                ref = schema['allOf'][0]['$ref']
+                target = self._lookup(ref) if ref not in seen else None
+            else:
+                break
+            if target is None:
+                return None
+            seen.add(ref)
+            overrides = {**{k: v for k, v in schema.items() if k not in ('$ref', 'allOf')}, **overrides}
+            schema = target
+
+        return {**schema, **overrides} if overrides else schema
+
+    def expand(self, schema: Optional[Dict[str, Any]], _active: Optional[frozenset] = None) -> Optional[Dict[str, Any]]:
+        """深度展开 schema 中的所有引用，递归引用保留为 {'$ref': ...}"""
+        if not isinstance(schema, dict):
+            return schema
+        active = _active or frozenset()
+
+        if '$ref' in schema:
+            ref = schema['$ref']
+            if ref in active:
+                return {'$ref': ref}
+            # 只记忆化顶层完整展开的结果；递归过程中的部分展开依赖当前路径，不能复用
+            if not active and ref in self._expanded:
+                return self._expanded[ref]
+            target = self._lookup(ref)
+            if target is None:
+                return dict(schema)
+            expanded = self.expand(target, active | {ref})
+            siblings = {k: v for k, v in schema.items() if k != '$ref'}
+            if siblings:
+                expanded = {**expanded, **siblings}
+            if not active:
+                self._expanded[ref] = expanded
+            return expanded
+
+        result = dict(schema)
+        if isinstance(schema.get('properties'), dict):
+            result['properties'] = {name: self.expand(prop, active) for name, prop in schema['properties'].items()}
+        for key in _NESTED_KEYS:
+            if isinstance(schema.get(key), dict):
+                result[key] = self.expand(schema[key], active)
+        for key in _NESTED_LIST_KEYS:
+            if isinstance(schema.get(key), list):
+                result[key] = [self.expand(item, active) for item in schema[key]]
+        return result
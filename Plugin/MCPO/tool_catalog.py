@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+MCPO 工具目录缓存
+
+将 list_tools 的发现结果持久化到磁盘，键为 MCP 配置文件内容哈希 + mcpo 进程启动时间。
+配置文件被修改（热重载）或 mcpo 重启后键发生变化，缓存自动失效；
+按工具名查询是一次字典查找。
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+
+
+class ToolCatalog:
+    """持久化的工具目录"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._key: Optional[str] = None
+        self._tools: Optional[Dict[str, Dict[str, Any]]] = None
+        self._meta: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def compute_key(config_path: str, mcpo_started_at: Optional[float], port: int) -> str:
+        """根据配置文件内容、mcpo 启动时间和端口计算目录键"""
+        digest = hashlib.sha256()
+        try:
+            with open(config_path, 'rb') as f:
+                digest.update(f.read())
+        except OSError:
+            digest.update(b'<missing>')
+        digest.update(f"|{mcpo_started_at or 0:.3f}|{port}".encode())
+        return digest.hexdigest()
+
+    def _load_from_disk(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._key = data.get('key')
+            self._tools = data.get('tools') or {}
+            self._meta = data.get('meta') or {}
+        except (OSError, ValueError):
+            self._key, self._tools, self._meta = None, None, {}
+
+    def load(self, key: str) -> Optional[Dict[str, Dict[str, Any]]]:
+        """返回与键匹配的工具表，缓存缺失或失效时返回 None"""
+        with self._lock:
+            if self._tools is None:
+                self._load_from_disk()
+            if self._tools is None or self._key != key:
+                return None
+            return self._tools
+
+    def get(self, key: str, tool_name: str) -> Optional[Dict[str, Any]]:
+        """按工具名查询（O(1)）"""
+        tools = self.load(key)
+        if tools is None:
+            return None
+        return tools.get(tool_name)
+
+    def save(self, key: str, tools: Dict[str, Dict[str, Any]], **meta):
+        """保存工具表（原子写入）"""
+        with self._lock:
+            self._key = key
+            self._tools = tools
+            self._meta = {'built_at': time.time(), **meta}
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                temp_path = f"{self.path}.{os.getpid()}.tmp"
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'key': key, 'meta': self._meta, 'tools': tools}, f, ensure_ascii=False)
+                os.replace(temp_path, self.path)
+            except OSError:
+                pass
+
+    def invalidate(self):
+        """删除缓存"""
+        with self._lock:
+            self._key, self._tools, self._meta = None, None, {}
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    @property
+    def meta(self) -> Dict[str, Any]:
+        return dict(self._meta)
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+MCPO 工具调用指标
+
+记录每个工具的调用次数、错误次数、最近成功/失败时间和最近 N 次调用的耗时，
+持久化到一个小 JSON 文件，使每次调用都是独立进程（或常驻桥接进程重启）时指标仍然连续。
+耗时只保留滚动窗口内的样本，工具记录数有上限（超过时删除最久未调用的工具），
+文件大小不随调用次数和调用方传入的工具名增长。读-改-写持有跨进程文件锁，并发的插件进程不会丢失更新。
+"""
+
+import os
+import json
+import math
+import time
+import threading
+from typing import Dict, Any, List, Optional
+
+from file_lock import file_lock
+
+
+def percentile(samples: List[float], p: float) -> Optional[float]:
+    """最近秩百分位数"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))
+    return round(ordered[index], 1)
+
+
+def summarize(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """汇总一个或多个工具记录"""
+    calls = sum(r.get('calls', 0) for r in records)
+    errors = sum(r.get('errors', 0) for r in records)
+    samples = [ms for r in records for ms in r.get('samples', [])]
+    last_success = max((r['last_success'] for r in records if r.get('last_success')), default=None)
+    last_error = max((r['last_error'] for r in records if r.get('last_error')), default=None)
+    return {
+        'calls': calls,
+        'errors': errors,
+        'error_rate': round(errors / calls, 3) if calls else None,
+        'cache_hits': sum(r.get('cache_hits', 0) for r in records),
+        'p50_ms': percentile(samples, 50),
+        'p95_ms': percentile(samples, 95),
+        'p99_ms': percentile(samples, 99),
+        'samples': len(samples),
+        'last_success': last_success,
+        'last_error': last_error
+    }
+
+
+class ToolMetrics:
+    """持久化的滚动指标存储"""
+
+    def __init__(self, path: str, window: int = 200, max_tools: int = 256):
+        self.path = path
+        self.window = window
+        self.max_tools = max_tools
+
+    def _load(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data.get('tools'), dict):
+                return data
+        except (OSError, ValueError, AttributeError):
+            pass
+        return {'tools': {}, 'since': time.time()}
+
+    def _save(self, data: Dict[str, Any]):
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            temp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_path, self.path)
+        except OSError:
+            pass
+
+    def record(self, tool_name: str, server: str, elapsed_ms: Optional[float], success: bool,
+               error: Optional[str] = None, cached: bool = False):
+        """记录一次调用；命中结果缓存的调用只计入 cache_hits，不计入耗时样本"""
+        with file_lock(self.path):
+            data = self._load()
+            tools = data['tools']
+            if tool_name not in tools and len(tools) >= self.max_tools > 0:
+                # 删除最久未调用的工具，为新工具腾出位置
+                for name in sorted(tools, key=lambda name: tools[name].get('last_seen', 0))[:len(tools) - self.max_tools + 1]:
+                    del tools[name]
+            record = tools.setdefault(tool_name, {'server': server, 'calls': 0, 'errors': 0, 'samples': []})
+            now = time.time()
+            record['last_seen'] = now
+            if cached:
+                record['cache_hits'] = record.get('cache_hits', 0) + 1
+            else:
+                record['calls'] += 1
+                if elapsed_ms is not None:
+                    record['samples'] = (record['samples'] + [round(elapsed_ms, 1)])[-self.window:]
+                if success:
+                    record['last_success'] = now
+                else:
+                    record['errors'] += 1
+                    record['last_error'] = now
+                    record['last_error_message'] = (error or '')[:300]
+            self._save(data)
+
+    def report(self, server: Optional[str] = None) -> Dict[str, Any]:
+        """按服务器和工具汇总指标"""
+        data = self._load()
+        tools = {name: r for name, r in data['tools'].items() if not server or r.get('server') == server}
+
+        by_server: Dict[str, List[Dict[str, Any]]] = {}
+        for record in tools.values():
+            by_server.setdefault(record.get('server') or '', []).append(record)
+
+        tool_report = {}
+        for name, record in tools.items():
+            tool_report[name] = {'server': record.get('server'), **summarize([record])}
+            if record.get('last_error_message'):
+                tool_report[name]['last_error_message'] = record['last_error_message']
+
+        return {
+            'since': data.get('since'),
+            'window': self.window,
+            'servers': {name: summarize(records) for name, records in sorted(by_server.items())},
+            'tools': dict(sorted(tool_report.items()))
+        }
+
+    def reset(self):
+        with file_lock(self.path):
+            self._save({'tools': {}, 'since': time.time()})
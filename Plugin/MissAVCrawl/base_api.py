@@ -4,6 +4,7 @@
 修复版本的BaseCore - 替代原有的base_api模块
 """
 
+import os
 import time
 import random
 import httpx
@@ -27,8 +28,12 @@ class BaseCore:
         self.config = Config()
         self.session = None
         self.last_request_time = 0
-        self.min_delay = 1  # 最小延迟1秒
-        self.max_delay = 3  # 最大延迟3秒
+        # 最近一次解析的播放列表信息（带宽、分段时长），供下载统计估算总字节数
+        self.last_playlist_info = {}
+        # 最近一次下载的统计数据
+        self.last_download_stats = None
+        self.min_delay = float(os.getenv('MISSAV_MIN_REQUEST_DELAY', '1'))  # 最小延迟1秒
+        self.max_delay = float(os.getenv('MISSAV_MAX_REQUEST_DELAY', '3'))  # 最大延迟3秒
         
         # 多个User-Agent轮换
         self.user_agents = [
@@ -58,6 +63,8 @@ class BaseCore:
     
     def get_enhanced_headers(self) -> Dict[str, str]:
         """获取增强的请求头"""
+        from missav_api_core.http_cache import http_cache
+        
         headers = self.config.headers.copy()
         
         # 随机化User-Agent和Referer
@@ -68,8 +75,6 @@ class BaseCore:
         headers.update({
             'Accept-Language': 'en-US,en;q=0.9,zh-CN;q=0.8,zh;q=0.7',
             'Accept-Encoding': 'gzip, deflate, br',
-            'Cache-Control': 'no-cache',
-            'Pragma': 'no-cache',
             'Sec-Ch-Ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
             'Sec-Ch-Ua-Mobile': '?0',
             'Sec-Ch-Ua-Platform': '"macOS"',
@@ -80,78 +85,137 @@ class BaseCore:
             'Upgrade-Insecure-Requests': '1'
         })
         
+        # 启用HTTP缓存时由条件请求负责重新验证，不再强制绕过缓存
+        if not http_cache.enabled:
+            headers.update({
+                'Cache-Control': 'no-cache',
+                'Pragma': 'no-cache'
+            })
+        
         return headers
     
     def wait_between_requests(self):
         """请求间延迟"""
+        from missav_api_core.tracing import tracer
+        
         current_time = time.time()
         elapsed = current_time - self.last_request_time
         
         if elapsed < self.min_delay:
             delay = random.uniform(self.min_delay - elapsed, self.max_delay - elapsed)
             if delay > 0:
-                time.sleep(delay)
+                tracer.sleep(delay, "rate_limit")
         
         self.last_request_time = time.time()
     
     def fetch(self, url: str, max_retries: int = 3) -> Optional[str]:
         """
         修复版本的fetch方法 - 解决403问题
+        
+        经过HTTP缓存: 新鲜期内的重复请求直接返回缓存正文，过期条目使用
+        ETag/Last-Modified 条件请求重新验证，304 时复用缓存正文
         """
+        from missav_api_core.tracing import tracer, HttpPhaseRecorder
+        from missav_api_core.http_cache import http_cache
+        
         if self.session is None:
             self.initialize_session()
         
-        for attempt in range(max_retries):
-            try:
-                # 请求间延迟
-                self.wait_between_requests()
-                
-                # 获取增强的请求头
-                headers = self.get_enhanced_headers()
-                
-                # 更新session的headers
-                self.session.headers.update(headers)
-                
-                # 发送请求
-                response = self.session.get(url)
-                
-                if response.status_code == 200:
-                    return response.text
-                elif response.status_code == 403:
-                    # 403错误，增加延迟后重试
-                    if attempt < max_retries - 1:
-                        delay = random.uniform(2, 5)
-                        time.sleep(delay)
-                    continue
-                else:
-                    # 其他HTTP错误
+        with tracer.span("fetch", url=url) as fetch_span:
+            cached, source = http_cache.lookup(url)
+            if cached is not None and cached.is_fresh:
+                # 新鲜的缓存不需要网络请求，也不需要限速等待
+                http_cache.record("memoryHits" if source == "memory" else "diskHits")
+                if fetch_span is not None:
+                    fetch_span["cache"] = source
+                return cached.body
+            
+            for attempt in range(max_retries):
+                try:
+                    # 请求间延迟
+                    self.wait_between_requests()
+                    
+                    # 获取增强的请求头
+                    headers = self.get_enhanced_headers()
+                    
+                    # 更新session的headers
+                    self.session.headers.update(headers)
+                    
+                    # 条件请求头只作用于本次请求
+                    request_headers = cached.conditional_headers() if cached is not None else {}
+                    
+                    # 发送请求（启用追踪时记录连接/TLS/服务器等待等阶段）
+                    with tracer.span("fetch.request", attempt=attempt + 1) as request_span:
+                        if tracer.enabled:
+                            response = self.session.get(url, headers=request_headers,
+                                                        extensions=HttpPhaseRecorder(tracer).extensions)
+                            request_span["status"] = response.status_code
+                            request_span["bytes"] = len(response.content)
+                        else:
+                            response = self.session.get(url, headers=request_headers)
+                    
+                    if response.status_code == 304 and cached is not None:
+                        # 缓存仍然有效，复用缓存正文
+                        http_cache.refresh(cached, response.headers)
+                        http_cache.record("revalidated")
+                        if fetch_span is not None:
+                            fetch_span["attempts"] = attempt + 1
+                            fetch_span["cache"] = "revalidated"
+                        return cached.body
+                    elif response.status_code == 200:
+                        http_cache.store(url, response.text, response.headers)
+                        http_cache.record("misses")
+                        if fetch_span is not None:
+                            fetch_span["attempts"] = attempt + 1
+                            fetch_span["cache"] = "miss"
+                        return response.text
+                    elif response.status_code == 403:
+                        # 403错误，增加延迟后重试
+                        if attempt < max_retries - 1:
+                            delay = random.uniform(2, 5)
+                            tracer.sleep(delay, "retry_403")
+                        continue
+                    else:
+                        # 其他HTTP错误
+                        if attempt < max_retries - 1:
+                            tracer.sleep(random.uniform(1, 3), "retry_http_error")
+                        continue
+                        
+                except Exception as e:
+                    # 网络异常，重试
                     if attempt < max_retries - 1:
-                        time.sleep(random.uniform(1, 3))
+                        tracer.sleep(random.uniform(2, 5), "retry_exception")
                     continue
-                    
-            except Exception as e:
-                # 网络异常，重试
-                if attempt < max_retries - 1:
-                    time.sleep(random.uniform(2, 5))
-                continue
-        
-        # 所有重试都失败，尝试使用requests作为备用
-        return self._fallback_fetch(url)
+            
+            # 所有重试都失败，尝试使用requests作为备用
+            if fetch_span is not None:
+                fetch_span["attempts"] = max_retries
+                fetch_span["fallback"] = True
+            return self._fallback_fetch(url)
     
     def _fallback_fetch(self, url: str) -> Optional[str]:
         """备用fetch方法 - 使用requests"""
+        from missav_api_core.tracing import tracer
+        from missav_api_core.http_cache import http_cache
+        
         try:
             headers = self.get_enhanced_headers()
             
             # 使用requests作为备用
-            response = requests.get(
-                url,
-                headers=headers,
-                timeout=30,
-                allow_redirects=True
-            )
+            with tracer.span("fetch.fallback") as fallback_span:
+                response = requests.get(
+                    url,
+                    headers=headers,
+                    timeout=30,
+                    allow_redirects=True
+                )
+                if fallback_span is not None:
+                    fallback_span["status"] = response.status_code
+                    fallback_span["serverWaitMs"] = round(response.elapsed.total_seconds() * 1000, 2)
             
             if response.status_code == 200:
+                http_cache.store(url, response.text, response.headers)
+                http_cache.record("misses")
                 return response.text
                 
         except Exception:
@@ -159,11 +223,22 @@ class BaseCore:
         
         return None
     
-    def get_segments(self, quality: str, m3u8_url_master: str) -> list:
-        """获取HLS分段列表"""
+    def get_segments(self, quality: str, m3u8_url_master: str, context=None) -> list:
+        """获取HLS分段列表
+        
+        Args:
+            quality: 视频质量
+            m3u8_url_master: 主播放列表URL
+            context: 文档上下文（PageContext），与增强信息提取共享已获取的播放列表
+        """
+        from missav_api_core.page_context import current_context
+        
+        context = context or current_context()
+        fetch_playlist = (lambda url: context.playlist(url, core=self)) if context else self.fetch
+        
         try:
             # 获取主播放列表
-            master_content = self.fetch(m3u8_url_master)
+            master_content = fetch_playlist(m3u8_url_master)
             if not master_content:
                 return []
             
@@ -224,12 +299,18 @@ class BaseCore:
                 selected_url = f"{base_url}/{selected_url}"
             
             # 获取分段播放列表
-            segments_content = self.fetch(selected_url)
+            segments_content = fetch_playlist(selected_url)
             if not segments_content:
                 return []
             
             # 解析分段
             segment_lines = re.findall(r'^(?!#)(.+)$', segments_content, re.MULTILINE)
+            segment_durations = [float(d) for d in re.findall(r'#EXTINF:([\d.]+)', segments_content)]
+            self.last_playlist_info = {
+                'bandwidth': selected_stream['bandwidth'],
+                'resolution': selected_stream['resolution'],
+                'segment_durations': segment_durations
+            }
             
             # 构建完整的分段URL
             segments = []
@@ -300,6 +381,15 @@ class BaseCore:
             import requests
             import tempfile
             import shutil
+            from missav_api_core.download_stats import DownloadStats
+            
+            playlist_info = self.last_playlist_info or {}
+            stats = DownloadStats(
+                total_segments=len(segments),
+                bandwidth=playlist_info.get('bandwidth', 0),
+                segment_durations=playlist_info.get('segment_durations')
+            )
+            self.last_download_stats = stats
             
             with tempfile.TemporaryDirectory() as temp_dir:
                 temp_path = Path(temp_dir)
@@ -308,9 +398,7 @@ class BaseCore:
                 
                 # 下载所有分段
                 for i, segment_url in enumerate(segments):
-                    if callback:
-                        callback(i + 1, len(segments))
-                    
+                    segment_start = time.time()
                     try:
                         response = self.session.get(segment_url, timeout=30)
                         response.raise_for_status()
@@ -320,18 +408,29 @@ class BaseCore:
                             f.write(response.content)
                         
                         # 检查分段文件大小
-                        if segment_file.stat().st_size > 0:
+                        segment_size = segment_file.stat().st_size
+                        if segment_size > 0:
                             downloaded_segments += 1
                         else:
                             failed_segments += 1
                             print(f"分段 {i} 下载为空文件")
+                        stats.record_segment(i, segment_size, time.time() - segment_start, success=segment_size > 0)
                             
                     except Exception as e:
                         failed_segments += 1
+                        stats.record_segment(i, 0, time.time() - segment_start, success=False)
                         print(f"下载分段 {i} 失败: {e}")
-                        continue
+                    
+                    if callback:
+                        # 位置参数保持为分段计数以兼容旧回调，字节级数据通过关键字参数传递
+                        callback(i + 1, len(segments),
+                                 downloaded_bytes=stats.downloaded_bytes,
+                                 total_bytes=stats.estimated_total_bytes,
+                                 stats=stats)
                 
-                print(f"下载完成: 成功 {downloaded_segments} 个，失败 {failed_segments} 个")
+                stats.finish()
+                print(f"下载完成: 成功 {downloaded_segments} 个，失败 {failed_segments} 个，"
+                      f"平均速度 {DownloadStats.format_speed(stats.average_bytes_per_second)}")
                 
                 # 从环境变量获取最小成功率配置
                 import os
@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MissAV 离线基准测试的本地 HTTP 替身服务器
+提供录制的视频页面、搜索/热榜列表页、合成的 master/media m3u8 播放列表和 .ts 分段，
+支持可配置的延迟和错误注入。
+
+路由:
+- /<视频代码>                  视频页面（debug_content.html，站点/CDN/m3u8 地址被改写为本地地址）
+- /<uuid>/playlist.m3u8        master 播放列表
+- /<uuid>/<分辨率>/video.m3u8   media 播放列表
+- /<uuid>/<分辨率>/video<N>.ts  视频分段
+- /cdn/<视频代码>/preview.mp4   预览视频（HEAD 探测）
+- /subtitles/index.php         字幕搜索页（无结果）
+- POST /callback/...           异步下载回调
+- 其他 GET 路径                 搜索/热榜列表页
+- CONNECT                      一律拒绝，保证基准测试不会访问真实站点
+"""
+
+import re
+import random
+import hashlib
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional
+
+PLUGIN_DIR = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+# 与 debug_content.html 中混淆脚本一致的播放列表 UUID
+PLAYLIST_UUID = "bcd5b63a-0c80-43bb-ad3b-ebed168e256c"
+
+# (分辨率目录, 宽, 高, BANDWIDTH)
+VARIANTS = [
+    ("842x480", 842, 480, 1_200_000),
+    ("1280x720", 1280, 720, 2_800_000),
+    ("1920x1080", 1920, 1080, 5_000_000),
+]
+
+VIDEO_CODES = [
+    "SSIS-950", "OFJE-505", "JUL-875", "IPX-101", "MIDV-220", "SONE-314",
+    "STARS-804", "ABF-047", "CAWD-612", "PRED-553", "MEYD-876", "DASS-301",
+    "FSDSS-700", "JUQ-512", "ADN-540", "SAME-103", "HMN-487", "MIAA-991",
+    "WAAA-333", "EBWH-068",
+]
+
+
+class FixtureConfig:
+    """服务器行为配置"""
+
+    def __init__(self, latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 error_status: int = 503, segment_count: int = 20, segment_kb: int = 256,
+                 segment_duration: float = 4.0, listing_size: int = 20, seed: int = 42):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.segment_count = segment_count
+        self.segment_kb = segment_kb
+        self.segment_duration = segment_duration
+        self.listing_size = listing_size
+        self.seed = seed
+
+
+class FixtureServer:
+    """在后台线程中运行的本地替身服务器"""
+
+    def __init__(self, config: Optional[FixtureConfig] = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FixtureConfig()
+        self.host = host
+        self.port = port
+        self.request_counts: Counter = Counter()
+        self.blocked_external = 0
+        self.blocked_hosts: Counter = Counter()
+        self.injected_errors = 0
+        self._lock = threading.Lock()
+        self._random = random.Random(self.config.seed)
+        self._httpd = None
+        self._thread = None
+
+    # ---- 地址 ----
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def cdn_base_url(self) -> str:
+        return f"{self.base_url}/cdn"
+
+    @property
+    def subtitle_base_url(self) -> str:
+        return f"{self.base_url}/subtitles"
+
+    def video_url(self, video_code: str = "OFJE-505") -> str:
+        return f"{self.base_url}/{video_code}"
+
+    # ---- 生命周期 ----
+
+    def start(self) -> "FixtureServer":
+        self._httpd = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self.port = self._httpd.server_address[1]
+        self._build_fixtures()
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="fixture-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def reset_counters(self):
+        with self._lock:
+            self.request_counts.clear()
+            self.blocked_external = 0
+            self.blocked_hosts.clear()
+            self.injected_errors = 0
+
+    # ---- 夹具 ----
+
+    def _build_fixtures(self):
+        """生成本地化的页面、播放列表和分段数据"""
+        recorded = (FIXTURES_DIR / "video.html")
+        source = recorded if recorded.exists() else PLUGIN_DIR / "debug_content.html"
+        page = source.read_text(encoding="utf-8")
+        page = page.replace("https://missav.ws", self.base_url).replace("https://fourhoi.com", self.cdn_base_url)
+        # 混淆脚本倒序拼接出 scheme://p2.p3/uuid/playlist.m3u8，将 surrit.com 改写为本地地址
+        page = page.replace("|com|surrit|https|", f"|1:{self.port}|127.0.0|http|")
+        self.video_page = page.encode("utf-8")
+
+        self.search_page = self._listing_page("search.html", "Search results")
+        self.hot_page = self._listing_page("hot.html", "Hot videos")
+
+        master = ["#EXTM3U"]
+        for name, width, height, bandwidth in VARIANTS:
+            master.append(f"#EXT-X-STREAM-INF:BANDWIDTH={bandwidth},RESOLUTION={width}x{height}")
+            master.append(f"{name}/video.m3u8")
+        self.master_playlist = ("\n".join(master) + "\n").encode()
+
+        media = ["#EXTM3U", "#EXT-X-VERSION:3",
+                 f"#EXT-X-TARGETDURATION:{int(self.config.segment_duration + 1)}", "#EXT-X-MEDIA-SEQUENCE:0"]
+        for i in range(self.config.segment_count):
+            media.append(f"#EXTINF:{self.config.segment_duration:.3f},")
+            media.append(f"video{i}.ts")
+        media.append("#EXT-X-ENDLIST")
+        self.media_playlist = ("\n".join(media) + "\n").encode()
+
+        rng = random.Random(self.config.seed)
+        self.segment_data = bytes(rng.getrandbits(8) for _ in range(self.config.segment_kb * 1024))
+
+    def _listing_page(self, fixture_name: str, heading: str) -> bytes:
+        """录制的列表页（fixtures/ 下存在时）或合成的列表页"""
+        recorded = FIXTURES_DIR / fixture_name
+        if recorded.exists():
+            html = recorded.read_text(encoding="utf-8").replace("https://missav.ws", self.base_url)
+            return html.replace("https://fourhoi.com", self.cdn_base_url).encode("utf-8")
+
+        cards = []
+        for i in range(self.config.listing_size):
+            code = VIDEO_CODES[i % len(VIDEO_CODES)]
+            cards.append(
+                f'<div class="thumbnail group">'
+                f'<a href="{self.base_url}/{code}">'
+                f'<img data-src="{self.cdn_base_url}/{code.lower()}/cover-t.jpg" alt="{code} benchmark title {i}"></a>'
+                f'<div class="my-2 text-sm"><a href="{self.base_url}/{code}">{code} benchmark title {i}</a></div>'
+                f'<span class="absolute bottom-1 right-1">2:0{i % 10}:00</span>'
+                f'<time>2025-04-{i % 28 + 1:02d}</time></div>'
+            )
+        html = (f"<!DOCTYPE html><html><head><title>{heading}</title></head><body>"
+                f"<h1>{heading}</h1><div class=\"grid grid-cols-2\">{''.join(cards)}</div></body></html>")
+        return html.encode("utf-8")
+
+    # ---- 请求处理 ----
+
+    def _inject(self) -> Optional[int]:
+        """施加延迟，并按概率返回注入的错误状态码"""
+        cfg = self.config
+        with self._lock:
+            delay = cfg.latency_ms + (self._random.uniform(-cfg.jitter_ms, cfg.jitter_ms) if cfg.jitter_ms else 0)
+            fail = cfg.error_rate > 0 and self._random.random() < cfg.error_rate
+            if fail:
+                self.injected_errors += 1
+        if delay > 0:
+            time.sleep(delay / 1000)
+        return cfg.error_status if fail else None
+
+    def route(self, path: str) -> (str, bytes, str):
+        """返回 (路由名, 响应体, Content-Type)"""
+        path = path.split("?")[0]
+        if path.endswith(".ts"):
+            return "segment", self.segment_data, "video/mp2t"
+        if path.endswith("/playlist.m3u8"):
+            return "master_playlist", self.master_playlist, "application/vnd.apple.mpegurl"
+        if path.endswith(".m3u8"):
+            return "media_playlist", self.media_playlist, "application/vnd.apple.mpegurl"
+        if path.startswith("/subtitles/"):
+            return "subtitle_search", b"<html><body>No results</body></html>", "text/html; charset=utf-8"
+        if path.startswith("/cdn/"):
+            return "cdn", b"\x00" * 1024, "video/mp4"
+        if re.fullmatch(r"/[A-Za-z]{2,6}-\d{2,4}", path):
+            return "video_page", self.video_page, "text/html; charset=utf-8"
+        if "hot" in path or path.startswith(("/dm22", "/new", "/popular", "/trending")):
+            return "hot_page", self.hot_page, "text/html; charset=utf-8"
+        return "search_page", self.search_page, "text/html; charset=utf-8"
+
+
+def _make_handler(server: FixtureServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _count(self, name: str):
+            with server._lock:
+                server.request_counts[name] += 1
+
+        def _respond(self, include_body: bool):
+            name, body, content_type = server.route(self.path)
+            status = server._inject()
+            if status:
+                self._count(name)
+                self.send_response(status)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            # 页面和播放列表带 ETag，支持条件请求
+            etag = None
+            if name != "segment":
+                etag = f'"{hashlib.md5(body).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    self._count(f"{name}(304)")
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+            self._count(name)
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            if include_body:
+                self.wfile.write(body)
+
+        def do_GET(self):
+            self._respond(include_body=True)
+
+        def do_HEAD(self):
+            self._respond(include_body=False)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0) or 0)
+            if length:
+                self.rfile.read(length)
+            self._count("callback")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def do_CONNECT(self):
+            # 通过 HTTPS_PROXY 指向本服务器，拦截所有外部 HTTPS 访问
+            with server._lock:
+                server.blocked_external += 1
+                server.blocked_hosts[self.path] += 1
+            self.send_response(403)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            self.close_connection = True
+
+    return Handler
+
+
+def proxy_environment(server: FixtureServer) -> Dict[str, str]:
+    """将外部流量引向替身服务器的代理环境变量（本地地址直连）"""
+    return {
+        "HTTP_PROXY": server.base_url,
+        "HTTPS_PROXY": server.base_url,
+        "http_proxy": server.base_url,
+        "https_proxy": server.base_url,
+        "NO_PROXY": "127.0.0.1,localhost",
+        "no_proxy": "127.0.0.1,localhost",
+    }
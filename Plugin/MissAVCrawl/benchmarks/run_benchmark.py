@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MissAV 离线基准测试
+在本地替身服务器上运行插件的同步命令和异步下载引擎，输出吞吐量、延迟分位数、
+下载速度和峰值内存，用于在不访问真实站点的情况下比较优化前后的性能。
+
+用法:
+    python benchmarks/run_benchmark.py
+    python benchmarks/run_benchmark.py --iterations 10 --latency-ms 50 --error-rate 0.05
+    python benchmarks/run_benchmark.py --scenarios video_info,search --json results.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+PLUGIN_DIR = BENCH_DIR.parent
+sys.path.insert(0, str(BENCH_DIR))
+
+from fixture_server import FixtureConfig, FixtureServer, proxy_environment
+
+SCENARIOS = ["video_info", "search", "search_enhanced", "hot", "download", "async_download"]
+
+
+def peak_rss_mb() -> float:
+    """进程峰值常驻内存（MB）"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux 以 KB 为单位，macOS 以字节为单位
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+def configure_environment(server: FixtureServer, args, work_dir: Path):
+    """在导入插件模块之前把站点、CDN 和代理指向替身服务器"""
+    os.environ["MISSAV_BASE_URL"] = server.base_url
+    os.environ["MISSAV_CDN_BASE_URL"] = server.cdn_base_url
+    os.environ["MISSAV_SUBTITLE_BASE_URL"] = server.subtitle_base_url
+    if not args.keep_delays:
+        os.environ["MISSAV_MIN_REQUEST_DELAY"] = "0"
+        os.environ["MISSAV_MAX_REQUEST_DELAY"] = "0"
+    os.environ["MISSAV_HTTP_CACHE"] = "false" if args.no_http_cache else "true"
+    os.environ["MISSAV_HTTP_CACHE_DIR"] = str(work_dir / "http_cache")
+    if args.trace:
+        os.environ["MISSAV_TRACE"] = "true"
+        os.environ["MISSAV_TRACE_FILE"] = str(Path(args.trace).resolve())
+    os.environ.update(proxy_environment(server))
+
+
+def build_scenarios(server: FixtureServer, work_dir: Path):
+    """场景名 -> (执行函数, 每次迭代的下载字节数)"""
+    sys.path.insert(0, str(PLUGIN_DIR))
+    from request_handler import process_request
+
+    video_url = server.video_url()
+    segment_bytes = server.config.segment_count * server.config.segment_kb * 1024
+
+    def run_command(request):
+        def run(iteration):
+            result = process_request(dict(request))
+            if result.get("status") != "success":
+                raise RuntimeError(result.get("error", "unknown error"))
+        return run
+
+    def run_download(iteration):
+        target = work_dir / f"download_{iteration}"
+        result = process_request({
+            "command": "DownloadVideo", "url": video_url, "quality": "720p",
+            "download_dir": str(target), "downloader": "threaded",
+        })
+        if result.get("status") != "success":
+            raise RuntimeError(result.get("error", "unknown error"))
+
+    def run_async_download(iteration):
+        from missav_api_core import async_handler
+        task_id = f"bench-{iteration}"
+        # 结果文件写入 ../../VCPAsyncResults，因此在临时目录的两级子目录中运行
+        run_dir = work_dir / "async" / "plugin" / "MissAVCrawl"
+        run_dir.mkdir(parents=True, exist_ok=True)
+        previous = os.getcwd()
+        os.chdir(run_dir)
+        try:
+            async_handler.download_video_background(
+                video_url, "720p", str(work_dir / f"async_download_{iteration}"), task_id,
+                f"{server.base_url}/callback")
+            record = async_handler.load_async_result_file(task_id) or {}
+        finally:
+            os.chdir(previous)
+        if record.get("status") != "Succeed":
+            raise RuntimeError(record.get("message", "async download did not succeed"))
+
+    return {
+        "video_info": (run_command({"command": "GetEnhancedVideoInfo", "url": video_url, "use_cache": False}), 0),
+        "search": (run_command({"command": "SearchWithFilters", "keyword": "SSIS", "max_results": 20}), 0),
+        "search_enhanced": (run_command({"command": "SearchWithFilters", "keyword": "SSIS", "max_results": 5,
+                                         "enhanced_info": True}), 0),
+        "hot": (run_command({"command": "GetHotWithFilters", "category": "daily", "max_results": 20}), 0),
+        "download": (run_download, segment_bytes),
+        "async_download": (run_async_download, segment_bytes),
+    }
+
+
+def run_scenario(name, func, bytes_per_run, iterations, server: FixtureServer):
+    """运行一个场景并汇总结果"""
+    server.reset_counters()
+    latencies, errors = [], []
+    started = time.perf_counter()
+    for i in range(iterations):
+        t0 = time.perf_counter()
+        try:
+            func(i)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+        latencies.append(time.perf_counter() - t0)
+    wall = time.perf_counter() - started
+
+    succeeded = iterations - len(errors)
+    result = {
+        "scenario": name,
+        "iterations": iterations,
+        "succeeded": succeeded,
+        "opsPerSecond": round(iterations / wall, 3) if wall > 0 else None,
+        "p50Ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95Ms": round(percentile(latencies, 95) * 1000, 1),
+        "meanMs": round(statistics.mean(latencies) * 1000, 1),
+        "requests": dict(server.request_counts),
+        "injectedErrors": server.injected_errors,
+        "blockedExternal": server.blocked_external,
+        "blockedHosts": dict(server.blocked_hosts),
+        "peakRssMb": round(peak_rss_mb(), 1),
+    }
+    if bytes_per_run and succeeded:
+        result["mbPerSecond"] = round(bytes_per_run * succeeded / wall / (1024 * 1024), 2)
+    if errors:
+        result["errors"] = errors[:5]
+    return result
+
+
+def print_table(results):
+    header = f"{'场景':<18}{'成功':>8}{'ops/s':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'MB/s':>8}{'请求数':>8}{'峰值MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['scenario']:<18}{r['succeeded']:>4}/{r['iterations']:<3}{r['opsPerSecond'] or 0:>10.2f}"
+              f"{r['p50Ms']:>10.1f}{r['p95Ms']:>10.1f}{r.get('mbPerSecond', 0):>8.2f}"
+              f"{sum(r['requests'].values()):>8}{r['peakRssMb']:>9.1f}")
+        if r["blockedExternal"]:
+            hosts = ", ".join(f"{host}×{count}" for host, count in r["blockedHosts"].items())
+            print(f"  ⚠️ 拦截了 {r['blockedExternal']} 个外部请求: {hosts}")
+        for error in r.get("errors", []):
+            print(f"  ❌ {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MissAV 离线基准测试")
+    parser.add_argument("--iterations", type=int, default=5, help="每个场景的迭代次数")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"逗号分隔的场景: {','.join(SCENARIOS)}")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="每个请求注入的延迟（毫秒）")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="延迟抖动（毫秒）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="注入错误响应的概率 (0-1)")
+    parser.add_argument("--error-status", type=int, default=503, help="注入错误的状态码 (503/403)")
+    parser.add_argument("--segments", type=int, default=20, help="媒体播放列表的分段数")
+    parser.add_argument("--segment-kb", type=int, default=256, help="每个分段的大小（KB）")
+    parser.add_argument("--keep-delays", action="store_true", help="保留 BaseCore 的请求间隔限速")
+    parser.add_argument("--no-http-cache", action="store_true", help="禁用 BaseCore 的 HTTP 缓存以对比效果")
+    parser.add_argument("--trace", metavar="FILE", help="同时启用耗时追踪并写入指定的 JSONL 文件")
+    parser.add_argument("--json", metavar="FILE", help="将结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    if args.segments * args.segment_kb <= 1024:
+        parser.error("下载文件必须大于 1MB，请增加 --segments 或 --segment-kb")
+
+    selected = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = [s for s in selected if s not in SCENARIOS]
+    if unknown:
+        parser.error(f"未知场景: {', '.join(unknown)}")
+
+    config = FixtureConfig(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+                           error_status=args.error_status, segment_count=args.segments,
+                           segment_kb=args.segment_kb)
+
+    with FixtureServer(config) as server, tempfile.TemporaryDirectory(prefix="missav_bench_") as tmp:
+        configure_environment(server, args, Path(tmp))
+        scenarios = build_scenarios(server, Path(tmp))
+        print(f"🧪 替身服务器: {server.base_url}  迭代次数: {args.iterations}", file=sys.stderr)
+
+        results = []
+        for name in selected:
+            func, bytes_per_run = scenarios[name]
+            print(f"▶️ {name} ...", file=sys.stderr)
+            results.append(run_scenario(name, func, bytes_per_run, args.iterations, server))
+
+    print_table(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 结果已保存到: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
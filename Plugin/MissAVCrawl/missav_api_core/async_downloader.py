@@ -48,6 +48,7 @@ class MissAVAsyncDownloader:
         # 预获取视频标题，并保存会话状态
         video_title = "未知视频"
         core_session = None
+        page_context = None
         
         try:
             from base_api import BaseCore
@@ -60,6 +61,7 @@ class MissAVAsyncDownloader:
             core_session.initialize_session()
             
             temp_video = Video(url, core=core_session)
+            page_context = temp_video.context
             if temp_video.content:
                 video_title = temp_video.title
         except Exception:
@@ -83,7 +85,7 @@ class MissAVAsyncDownloader:
         
         download_thread = threading.Thread(
             target=self._download_task,
-            args=(url, quality, download_dir, downloader, tracker, core_session)
+            args=(url, quality, download_dir, downloader, tracker, core_session, page_context)
         )
         download_thread.daemon = False  # 不设置为守护线程，让它独立运行
         download_thread.start()
@@ -92,8 +94,8 @@ class MissAVAsyncDownloader:
         import time
         time.sleep(0.5)
     
-    def _download_task(self, url: str, quality: str, download_dir: str, downloader: str, tracker: ProgressTracker, core_session=None):
-        """后台下载线程执行的函数 - 重用已建立的会话"""
+    def _download_task(self, url: str, quality: str, download_dir: str, downloader: str, tracker: ProgressTracker, core_session=None, page_context=None):
+        """后台下载线程执行的函数 - 重用已建立的会话和已获取的页面"""
         try:
             # 设置环境变量（如果未设置）
             import os
@@ -109,8 +111,8 @@ class MissAVAsyncDownloader:
             
             # 使用已建立的会话或创建新会话
             if core_session:
-                # 重用已建立的会话
-                video = Video(url, core=core_session)
+                # 重用已建立的会话和预获取时的文档上下文，不再重复请求页面
+                video = Video(url, core=core_session, context=page_context)
             else:
                 # 创建新会话（备用方案）
                 from base_api import BaseCore
@@ -135,7 +137,10 @@ class MissAVAsyncDownloader:
             
             # 创建进度回调（和调试脚本完全一样）
             def thread_callback(current, total, **kwargs):
-                if total > 0:
+                if 'downloaded_bytes' in kwargs:
+                    # 使用字节级数据，而不是分段计数
+                    tracker.update(kwargs['downloaded_bytes'], kwargs.get('total_bytes', 0), kwargs.get('stats'))
+                elif total > 0:
                     tracker.update(current, total)
             
             # 执行下载（和调试脚本完全一样）
@@ -18,6 +18,7 @@ parent_dir = current_dir.parent
 sys.path.insert(0, str(parent_dir))
 
 from base_api import BaseCore
+from missav_api_core.download_stats import DownloadStats
 
 class AsyncDownloader:
     """异步下载器"""
@@ -29,9 +30,11 @@ class AsyncDownloader:
         self.semaphore = asyncio.Semaphore(max_concurrent)
     
     async def download_segment_async(self, session: aiohttp.ClientSession, url: str, 
-                                   output_path: Path, segment_index: int) -> bool:
-        """异步下载单个分段"""
+                                   output_path: Path, segment_index: int,
+                                   stats: Optional[DownloadStats] = None) -> bool:
+        """异步下载单个分段（提供 stats 时记录分段的字节数和耗时）"""
         async with self.semaphore:
+            segment_start = time.time()
             for attempt in range(self.retry_count):
                 try:
                     async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
@@ -43,6 +46,9 @@ class AsyncDownloader:
                             async with aiofiles.open(segment_file, 'wb') as f:
                                 await f.write(content)
                             
+                            if stats:
+                                stats.record_segment(segment_index, len(content), time.time() - segment_start,
+                                                     success=len(content) > 0)
                             return True
                         else:
                             print(f"❌ 分段 {segment_index} HTTP错误: {response.status}")
@@ -52,6 +58,8 @@ class AsyncDownloader:
                     if attempt < self.retry_count - 1:
                         await asyncio.sleep(1)
             
+            if stats:
+                stats.record_segment(segment_index, 0, time.time() - segment_start, success=False)
             return False
     
     async def download_video_async(self, video, quality: str = "worst", 
@@ -68,6 +76,14 @@ class AsyncDownloader:
             print(f"📺 开始异步下载: {video.title}")
             print(f"🔗 分段数量: {len(segments)}")
             
+            playlist_info = getattr(video.core, 'last_playlist_info', None) or {}
+            stats = DownloadStats(
+                total_segments=len(segments),
+                bandwidth=playlist_info.get('bandwidth', 0),
+                segment_durations=playlist_info.get('segment_durations')
+            )
+            video.core.last_download_stats = stats
+            
             # 创建输出目录
             output_dir = Path(output_path)
             temp_dir = output_dir / f"temp_{video.video_code}"
@@ -81,11 +97,10 @@ class AsyncDownloader:
                 # 创建下载任务
                 tasks = []
                 for i, segment_url in enumerate(segments):
-                    task = self.download_segment_async(session, segment_url, temp_dir, i)
+                    task = self.download_segment_async(session, segment_url, temp_dir, i, stats)
                     tasks.append(task)
                 
                 # 执行异步下载
-                start_time = time.time()
                 completed = 0
                 
                 for task in asyncio.as_completed(tasks):
@@ -93,12 +108,18 @@ class AsyncDownloader:
                     completed += 1
                     
                     if progress_callback:
-                        progress_callback(completed, len(segments))
+                        # 与 BaseCore.download 相同：位置参数为分段计数，字节级数据通过关键字参数传递
+                        progress_callback(completed, len(segments),
+                                          downloaded_bytes=stats.downloaded_bytes,
+                                          total_bytes=stats.estimated_total_bytes,
+                                          stats=stats)
                     
                     if completed % 10 == 0 or completed == len(segments):
-                        elapsed = time.time() - start_time
-                        speed = completed / elapsed if elapsed > 0 else 0
-                        print(f"   进度: {completed}/{len(segments)} ({speed:.1f} 分段/秒)")
+                        print(f"   进度: {completed}/{len(segments)} "
+                              f"({DownloadStats.format_speed(stats.bytes_per_second)}，剩余 {DownloadStats.format_eta(stats.eta_seconds)})")
+                
+                stats.finish()
+                print(f"   平均速度 {DownloadStats.format_speed(stats.average_bytes_per_second)}")
             
             # 合并分段
             print("🔄 合并视频分段...")
@@ -25,6 +25,7 @@ from base_api import BaseCore
 from missav_api_core.consts import HEADERS
 from missav_api_core.missav_api import Video
 from missav_api_core.subtitle_downloader import SubtitleDownloader, extract_video_code_from_title_or_url
+from missav_api_core.download_stats import DownloadStats
 
 # 常量
 LOG_FILE = "MissAVDownloadHistory.log"
@@ -59,6 +60,24 @@ def print_json_output(status, result=None, error=None, ai_message=None):
     print(json.dumps(output, ensure_ascii=False))
     log_event("debug", "Output sent to stdout", output)
 
+def get_async_result_file(task_id):
+    """获取任务对应的VCPAsyncResults文件路径"""
+    return Path("../../VCPAsyncResults") / f"{PLUGIN_NAME_FOR_CALLBACK}-{task_id}.json"
+
+def load_async_result_file(task_id):
+    """读取任务的VCPAsyncResults文件，不存在或无法解析时返回None"""
+    result_file = get_async_result_file(task_id)
+    if not result_file.exists():
+        return None
+    try:
+        with open(result_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        log_event("error", f"[{task_id}] Failed to read async result file", {
+            "error": str(e)
+        })
+        return None
+
 def update_async_result_file(task_id, status, message, additional_data=None):
     """更新VCPAsyncResults文件"""
     try:
@@ -76,11 +95,10 @@ def update_async_result_file(task_id, status, message, additional_data=None):
             result_data.update(additional_data)
         
         # 确保VCPAsyncResults目录存在
-        results_dir = Path("../../VCPAsyncResults")
-        results_dir.mkdir(exist_ok=True)
+        result_file = get_async_result_file(task_id)
+        result_file.parent.mkdir(exist_ok=True)
         
         # 写入结果文件
-        result_file = results_dir / f"{PLUGIN_NAME_FOR_CALLBACK}-{task_id}.json"
         with open(result_file, 'w', encoding='utf-8') as f:
             json.dump(result_data, f, ensure_ascii=False, indent=2)
         
@@ -210,19 +228,16 @@ def download_video_background(url, quality, download_dir, task_id, callback_base
                     
                     log_event("info", f"[{task_id}] Real download progress: {progress:.1f}% ({current}/{total})")
                     
-                    # 计算预计剩余时间（基于真实的下载进度）
-                    elapsed_time = current_time - progress_state['start_time']
-                    if current > 0 and elapsed_time > 0:
-                        avg_time_per_segment = elapsed_time / current
-                        remaining_segments = total - current
-                        estimated_remaining_time = avg_time_per_segment * remaining_segments
-                        
-                        if estimated_remaining_time > 60:
-                            time_str = f"约 {estimated_remaining_time/60:.1f} 分钟"
-                        else:
-                            time_str = f"约 {estimated_remaining_time:.0f} 秒"
+                    # 计算速度和预计剩余时间（基于实际下载字节数）
+                    stats = kwargs.get('stats')
+                    if stats is not None:
+                        time_str = DownloadStats.format_eta(stats.eta_seconds)
+                        speed_str = DownloadStats.format_speed(stats.bytes_per_second)
+                        stats_snapshot = stats.snapshot()
                     else:
                         time_str = "计算中..."
+                        speed_str = "计算中..."
+                        stats_snapshot = None
                     
                     # 获取字幕下载状态
                     subtitle_status_text = ""
@@ -242,6 +257,7 @@ def download_video_background(url, quality, download_dir, task_id, callback_base
                         "InProgress",
                         f"📥 下载中: {progress:.1f}% ({current}/{total})\n"
                         f"📺 {video_title} ({video_code})\n"
+                        f"🚀 速度: {speed_str}\n"
                         f"⏱️ 剩余: {time_str}\n"
                         f"{subtitle_status_text}",
                         {
@@ -253,7 +269,8 @@ def download_video_background(url, quality, download_dir, task_id, callback_base
                             "currentSegment": current,
                             "progress": round(progress, 1),
                             "estimatedRemainingTime": time_str,
-                            "downloadSpeed": f"{current/elapsed_time:.1f} 分段/秒" if elapsed_time > 0 else "计算中...",
+                            "downloadSpeed": speed_str,
+                            "downloadStats": stats_snapshot,
                             "subtitleStatus": subtitle_result.get("status", "unknown")
                         }
                     )
@@ -343,6 +360,10 @@ def download_video_background(url, quality, download_dir, task_id, callback_base
             no_title=True  # 重要：设置为True，避免路径被修改
         )
         
+        # 最终的下载统计（字节级吞吐量、分段延迟）
+        final_stats = video.core.last_download_stats
+        download_stats = final_stats.snapshot() if final_stats else None
+        
         if success:
             # 查找下载的文件 - 改进文件查找逻辑，支持递归查找
             video_files = []
@@ -638,6 +659,8 @@ def download_video_background(url, quality, download_dir, task_id, callback_base
                         "progress": 100,
                         "downloadTime": datetime.now().isoformat(),
                         "totalSegments": total_segments,
+                        "downloadSpeed": DownloadStats.format_speed(final_stats.average_bytes_per_second) if final_stats else "未知",
+                        "downloadStats": download_stats,
                         "subtitleStatus": subtitle_status,
                         "subtitleInfo": subtitle_info
                     }
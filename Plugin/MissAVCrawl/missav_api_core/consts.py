@@ -1,5 +1,10 @@
+import os
 import re
 
+# 站点与CDN地址，可通过环境变量指向镜像站或本地基准测试服务器
+BASE_URL = os.getenv("MISSAV_BASE_URL", "https://missav.ws").rstrip("/")
+CDN_BASE_URL = os.getenv("MISSAV_CDN_BASE_URL", "https://fourhoi.com").rstrip("/")
+
 HEADERS = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8",
     "Referer": "https://www.missav.ws",
@@ -156,7 +156,7 @@ class MissAVCrawler:
                 "traceback": traceback.format_exc()
             }
     
-    def silent_callback(self, current, total, speed=None):
+    def silent_callback(self, current, total, speed=None, **kwargs):
         """静默的进度回调函数，不输出到stdout"""
         # 什么都不做，避免输出干扰JSON响应
         pass
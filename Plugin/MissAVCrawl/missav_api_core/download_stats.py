@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MissAV 下载吞吐量统计模块
+基于实际字节数计算滑动窗口速度、分段延迟直方图和剩余时间
+"""
+
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+
+class DownloadStats:
+    """下载统计器 - 以字节为单位而不是分段数"""
+
+    # 分段延迟直方图的桶上界（毫秒），最后一个桶收集所有更慢的分段
+    LATENCY_BUCKETS_MS = (100, 250, 500, 1000, 2000, 5000, 10000)
+
+    def __init__(self, total_segments: int = 0, bandwidth: int = 0,
+                 segment_durations: Optional[List[float]] = None,
+                 window_seconds: float = 10.0):
+        """
+        Args:
+            total_segments: 分段总数
+            bandwidth: 播放列表中所选流的 BANDWIDTH（比特/秒）
+            segment_durations: 每个分段的 EXTINF 时长（秒）
+            window_seconds: 滑动窗口速度的窗口长度（秒）
+        """
+        self.total_segments = total_segments
+        self.bandwidth = bandwidth or 0
+        self.window_seconds = window_seconds
+
+        # 根据 带宽 × 时长 估算每个分段的字节数
+        durations = list(segment_durations or [])
+        if self.bandwidth > 0 and len(durations) == total_segments:
+            self.estimated_segment_bytes = [self.bandwidth / 8 * d for d in durations]
+        else:
+            self.estimated_segment_bytes = []
+        self.estimated_total_bytes_from_playlist = int(sum(self.estimated_segment_bytes))
+
+        self.start_time = time.time()
+        self.end_time = None
+        self.downloaded_bytes = 0
+        self.completed_segments = 0
+        self.failed_segments = 0
+        self._estimated_done_bytes = 0.0
+
+        # (时间戳, 字节数) 的滑动窗口样本
+        self._window = deque()
+        self._window_bytes = 0
+
+        self._latencies_ms = []
+        self._histogram = [0] * (len(self.LATENCY_BUCKETS_MS) + 1)
+
+    def record_segment(self, index: int, size_bytes: int, latency: float, success: bool = True):
+        """记录一个分段的下载结果
+
+        Args:
+            index: 分段序号（从0开始）
+            size_bytes: 实际下载的字节数
+            latency: 该分段请求耗时（秒）
+            success: 是否下载成功
+        """
+        now = time.time()
+
+        latency_ms = latency * 1000
+        self._latencies_ms.append(latency_ms)
+        for bucket, upper in enumerate(self.LATENCY_BUCKETS_MS):
+            if latency_ms <= upper:
+                self._histogram[bucket] += 1
+                break
+        else:
+            self._histogram[-1] += 1
+
+        if not success:
+            self.failed_segments += 1
+            return
+
+        self.completed_segments += 1
+        self.downloaded_bytes += size_bytes
+        if 0 <= index < len(self.estimated_segment_bytes):
+            self._estimated_done_bytes += self.estimated_segment_bytes[index]
+
+        self._window.append((now, size_bytes))
+        self._window_bytes += size_bytes
+        self._trim_window(now)
+
+    def finish(self):
+        """标记下载结束"""
+        self.end_time = time.time()
+
+    def _trim_window(self, now: float):
+        """移除滑动窗口外的样本（至少保留一个样本用于计算速度）"""
+        while len(self._window) > 1 and now - self._window[0][0] > self.window_seconds:
+            _, size = self._window.popleft()
+            self._window_bytes -= size
+
+    @property
+    def elapsed(self) -> float:
+        """已用时间（秒）"""
+        return (self.end_time or time.time()) - self.start_time
+
+    @property
+    def bytes_per_second(self) -> float:
+        """滑动窗口内的下载速度（字节/秒）"""
+        if not self._window:
+            return 0.0
+        now = self.end_time or time.time()
+        self._trim_window(now)
+        span = now - self._window[0][0]
+        if span <= 0 or len(self._window) < 2:
+            # 窗口内只有一个样本时退化为平均速度
+            return self.average_bytes_per_second
+        # 第一个样本的字节是在窗口开始之前下载的，因此不计入
+        return (self._window_bytes - self._window[0][1]) / span
+
+    @property
+    def average_bytes_per_second(self) -> float:
+        """整个下载过程的平均速度（字节/秒）"""
+        elapsed = self.elapsed
+        return self.downloaded_bytes / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def estimated_total_bytes(self) -> int:
+        """预计总字节数"""
+        if self.estimated_total_bytes_from_playlist > 0:
+            return self.downloaded_bytes + int(self.remaining_bytes)
+        if self.completed_segments > 0 and self.total_segments > 0:
+            return int(self.downloaded_bytes / self.completed_segments * self.total_segments)
+        return self.downloaded_bytes
+
+    @property
+    def remaining_bytes(self) -> float:
+        """预计剩余字节数
+
+        优先使用播放列表的 带宽 × 时长 估算，并用已下载分段的实际大小与估算值之比进行校正；
+        没有播放列表信息时按已下载分段的平均大小估算。
+        """
+        pending_segments = self.total_segments - self.completed_segments - self.failed_segments
+        if pending_segments <= 0:
+            return 0.0
+        if self.estimated_total_bytes_from_playlist > 0:
+            remaining = self.estimated_total_bytes_from_playlist - self._estimated_done_bytes
+            if self._estimated_done_bytes > 0:
+                remaining *= self.downloaded_bytes / self._estimated_done_bytes
+            return max(remaining, 0.0)
+        if self.completed_segments > 0:
+            return self.downloaded_bytes / self.completed_segments * pending_segments
+        return 0.0
+
+    @property
+    def eta_seconds(self) -> Optional[float]:
+        """预计剩余时间（秒），无法估算时返回 None"""
+        remaining = self.remaining_bytes
+        if remaining <= 0:
+            return 0.0 if self.completed_segments else None
+        speed = self.bytes_per_second
+        if speed <= 0:
+            return None
+        return remaining / speed
+
+    def latency_summary(self) -> Dict:
+        """分段延迟统计（毫秒）"""
+        if not self._latencies_ms:
+            return {"count": 0}
+        ordered = sorted(self._latencies_ms)
+
+        def percentile(p):
+            return round(ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))], 1)
+
+        labels = [f"<={upper}ms" for upper in self.LATENCY_BUCKETS_MS]
+        labels.append(f">{self.LATENCY_BUCKETS_MS[-1]}ms")
+        return {
+            "count": len(ordered),
+            "minMs": round(ordered[0], 1),
+            "avgMs": round(sum(ordered) / len(ordered), 1),
+            "p50Ms": percentile(50),
+            "p95Ms": percentile(95),
+            "maxMs": round(ordered[-1], 1),
+            "histogram": dict(zip(labels, self._histogram))
+        }
+
+    @staticmethod
+    def format_speed(bytes_per_second: float) -> str:
+        """格式化速度显示"""
+        return f"{bytes_per_second / (1024 * 1024):.2f} MB/s"
+
+    @staticmethod
+    def format_eta(seconds: Optional[float]) -> str:
+        """格式化剩余时间显示"""
+        if seconds is None:
+            return "计算中..."
+        if seconds > 60:
+            return f"约 {seconds / 60:.1f} 分钟"
+        return f"约 {seconds:.0f} 秒"
+
+    def snapshot(self) -> Dict:
+        """导出统计数据，用于写入结果文件"""
+        eta = self.eta_seconds
+        return {
+            "downloadedBytes": self.downloaded_bytes,
+            "estimatedTotalBytes": self.estimated_total_bytes,
+            "remainingBytes": int(self.remaining_bytes),
+            "playlistBandwidth": self.bandwidth,
+            "bytesPerSecond": round(self.bytes_per_second, 1),
+            "averageBytesPerSecond": round(self.average_bytes_per_second, 1),
+            "windowSeconds": self.window_seconds,
+            "etaSeconds": round(eta, 1) if eta is not None else None,
+            "elapsedSeconds": round(self.elapsed, 1),
+            "totalSegments": self.total_segments,
+            "completedSegments": self.completed_segments,
+            "failedSegments": self.failed_segments,
+            "segmentLatency": self.latency_summary()
+        }
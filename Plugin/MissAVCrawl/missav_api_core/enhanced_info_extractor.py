@@ -12,6 +12,10 @@ from typing import Dict, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 from pathlib import Path
 
+from missav_api_core.consts import BASE_URL, CDN_BASE_URL
+from missav_api_core.tracing import tracer
+from missav_api_core.page_context import current_context
+
 
 class EnhancedInfoExtractor:
     """增强的信息提取器"""
@@ -32,19 +36,21 @@ class EnhancedInfoExtractor:
         }
         
         # 基础URL
-        self.base_url = "https://missav.ws"
+        self.base_url = BASE_URL
     
-    def extract_enhanced_video_info(self, url: str, use_cache: bool = True) -> Dict:
+    def extract_enhanced_video_info(self, url: str, use_cache: bool = True, context=None) -> Dict:
         """
         提取增强的视频信息
         
         Args:
             url: 视频URL
             use_cache: 是否使用缓存作为备选方案
+            context: 文档上下文（PageContext），与 Video 共享页面和主播放列表
             
         Returns:
             包含详细信息的字典
         """
+        context = context or current_context()
         try:
             # 优先进行实时查找
             if not self.core:
@@ -58,7 +64,7 @@ class EnhancedInfoExtractor:
                 return {"success": False, "error": "核心模块未初始化"}
             
             # 尝试获取页面内容
-            content = self.core.fetch(url)
+            content = context.page(url, core=self.core) if context else self.core.fetch(url)
             if not content:
                 # 如果无法获取页面内容，尝试从缓存获取
                 if use_cache:
@@ -72,40 +78,48 @@ class EnhancedInfoExtractor:
             # 实时提取信息
             try:
                 # 提取基础信息
-                basic_info = self._extract_basic_info(content, url)
+                with tracer.span("extract.basic"):
+                    basic_info = self._extract_basic_info(content, url)
                 
                 # 提取分辨率信息
-                resolution_info = self._extract_resolution_info(content, url)
+                with tracer.span("extract.resolution"):
+                    resolution_info = self._extract_resolution_info(content, url, context=context)
                 
                 # 提取视频时长
-                duration_info = self._extract_duration_info(content)
+                with tracer.span("extract.duration"):
+                    duration_info = self._extract_duration_info(content)
                 
                 # 提取详细信息（演员、标签、系列等）
-                detailed_info = self._extract_detailed_info(content, url)
+                with tracer.span("extract.detailed"):
+                    detailed_info = self._extract_detailed_info(content, url)
                 
                 # 提取预览视频信息
-                preview_info = self._extract_preview_info(content, url)
+                with tracer.span("extract.preview"):
+                    preview_info = self._extract_preview_info(content, url)
                 
                 # 提取封面信息
-                cover_info = self._extract_cover_info(content, url)
+                with tracer.span("extract.cover"):
+                    cover_info = self._extract_cover_info(content, url)
                 
                 # 合并所有信息
-                enhanced_info = {
-                    "success": True,
-                    "url": url,
-                    "extraction_time": time.time(),
-                    "from_cache": False,  # 明确标注这是实时获取的
-                    **basic_info,
-                    **resolution_info,
-                    **duration_info,
-                    **detailed_info,
-                    **preview_info,
-                    **cover_info
-                }
+                with tracer.span("extract.merge"):
+                    enhanced_info = {
+                        "success": True,
+                        "url": url,
+                        "extraction_time": time.time(),
+                        "from_cache": False,  # 明确标注这是实时获取的
+                        **basic_info,
+                        **resolution_info,
+                        **duration_info,
+                        **detailed_info,
+                        **preview_info,
+                        **cover_info
+                    }
                 
                 # 保存到缓存
                 if use_cache:
-                    self._save_to_cache(url, enhanced_info)
+                    with tracer.span("extract.save_cache"):
+                        self._save_to_cache(url, enhanced_info)
                 
                 return enhanced_info
                 
@@ -192,7 +206,7 @@ class EnhancedInfoExtractor:
         
         return info
     
-    def _extract_resolution_info(self, content: str, url: str) -> Dict:
+    def _extract_resolution_info(self, content: str, url: str, context=None) -> Dict:
         """提取分辨率信息"""
         info = {}
         
@@ -222,7 +236,7 @@ class EnhancedInfoExtractor:
                 info['m3u8_url'] = m3u8_url
                 
                 # 获取可用分辨率
-                resolutions = self._get_available_resolutions(m3u8_url)
+                resolutions = self._get_available_resolutions(m3u8_url, context=context)
                 if resolutions:
                     info['available_resolutions'] = resolutions
                     info['resolution_count'] = len(resolutions)
@@ -258,17 +272,26 @@ class EnhancedInfoExtractor:
         
         return info
     
-    def _get_available_resolutions(self, m3u8_url: str) -> List[Dict]:
+    def _get_available_resolutions(self, m3u8_url: str, context=None) -> List[Dict]:
         """获取M3U8播放列表中的可用分辨率"""
         try:
             if not self.core:
                 return []
             
-            # 获取主播放列表
-            master_content = self.core.fetch(m3u8_url)
+            # 获取主播放列表（有上下文时与 BaseCore.get_segments 共享）
+            master_content = context.playlist(m3u8_url, core=self.core) if context else self.core.fetch(m3u8_url)
             if not master_content:
                 return []
             
+            with tracer.span("extract.parse_master_playlist"):
+                return self._parse_master_playlist(master_content)
+            
+        except Exception as e:
+            return []
+    
+    def _parse_master_playlist(self, master_content: str) -> List[Dict]:
+        """解析主播放列表中的 EXT-X-STREAM-INF 条目"""
+        try:
             resolutions = []
             
             # 解析EXT-X-STREAM-INF标签
@@ -866,7 +889,7 @@ class EnhancedInfoExtractor:
                 # 基于发现的cdnUrl函数构造预览视频URL
                 # cdnUrl(path) { return `https://fourhoi.com${path}` }
                 # 预览视频模式: cdnUrl(`/${item.dvd_id}/preview.mp4`)
-                preview_url = f"https://fourhoi.com/{dvd_id}/preview.mp4"
+                preview_url = f"{CDN_BASE_URL}/{dvd_id}/preview.mp4"
                 
                 # 验证预览视频URL是否可访问
                 if self._verify_preview_url(preview_url):
@@ -937,7 +960,10 @@ class EnhancedInfoExtractor:
                 'Accept': 'video/mp4,video/*,*/*;q=0.9',
             }
             
-            response = requests.head(preview_url, headers=headers, timeout=10)
+            with tracer.span("extract.probe_preview", url=preview_url) as probe_span:
+                response = requests.head(preview_url, headers=headers, timeout=10)
+                if probe_span is not None:
+                    probe_span["status"] = response.status_code
             return response.status_code == 200
             
         except Exception:
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MissAV HTTP 缓存模块
+为 BaseCore.fetch 提供遵循 HTTP 语义的页面缓存:
+- 进程内 LRU 记忆化: 新鲜期内的重复请求直接命中内存，不发起网络请求
+- 条件请求: 过期条目携带 If-None-Match / If-Modified-Since 重新验证，304 时复用缓存正文
+- 磁盘缓存: 正文以 gzip 压缩保存，跨命令（跨进程）复用；按最近使用时间（文件修改时间）淘汰，
+  条目数和总大小都有上限
+
+配置:
+- MISSAV_HTTP_CACHE: 是否启用（默认 true）
+- MISSAV_HTTP_CACHE_DIR: 磁盘缓存目录（默认 ./cache/http）
+- MISSAV_HTTP_CACHE_TTL: 响应未提供 max-age 时的新鲜期（秒，默认 60）
+- MISSAV_HTTP_CACHE_MAX_ENTRIES: 内存中最多保留的条目数（默认 64）
+- MISSAV_HTTP_CACHE_MAX_DISK_ENTRIES: 磁盘上最多保留的条目数（默认 512）
+- MISSAV_HTTP_CACHE_MAX_DISK_MB: 磁盘缓存总大小上限（MB，默认 64）
+"""
+
+import os
+import re
+import gzip
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+DEFAULT_CACHE_DIR = "./cache/http"
+
+# 每个进程第一次写磁盘时清理一次，之后每写入这么多次再清理（清理需要列出整个目录）
+DISK_PRUNE_INTERVAL = 32
+
+
+def _env_enabled(name: str, default: str = "true") -> bool:
+    return os.getenv(name, default).strip().lower() in ("true", "1", "yes", "on")
+
+
+class CacheEntry:
+    """一个缓存的响应"""
+
+    __slots__ = ("url", "body", "etag", "last_modified", "stored_at", "max_age")
+
+    def __init__(self, url: str, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None,
+                 stored_at: Optional[float] = None, max_age: float = 0):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at if stored_at is not None else time.time()
+        self.max_age = max_age
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() - self.stored_at < self.max_age
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """重新验证时使用的条件请求头"""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_dict(self) -> Dict:
+        return {
+            "url": self.url,
+            "etag": self.etag,
+            "lastModified": self.last_modified,
+            "storedAt": self.stored_at,
+            "maxAge": self.max_age,
+            "body": self.body,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CacheEntry":
+        return cls(data["url"], data["body"], data.get("etag"), data.get("lastModified"),
+                   data.get("storedAt"), data.get("maxAge", 0))
+
+
+class HttpCache:
+    """进程级 HTTP 缓存（内存 LRU + gzip 磁盘缓存）"""
+
+    def __init__(self, cache_dir: Optional[str] = None, default_ttl: Optional[float] = None,
+                 max_entries: Optional[int] = None, enabled: Optional[bool] = None):
+        self.enabled = _env_enabled("MISSAV_HTTP_CACHE") if enabled is None else enabled
+        self.cache_dir = Path(cache_dir or os.getenv("MISSAV_HTTP_CACHE_DIR", DEFAULT_CACHE_DIR))
+        self.default_ttl = float(os.getenv("MISSAV_HTTP_CACHE_TTL", "60")) if default_ttl is None else default_ttl
+        self.max_entries = int(os.getenv("MISSAV_HTTP_CACHE_MAX_ENTRIES", "64")) if max_entries is None else max_entries
+        self.max_disk_entries = int(os.getenv("MISSAV_HTTP_CACHE_MAX_DISK_ENTRIES", "512"))
+        self.max_disk_bytes = int(float(os.getenv("MISSAV_HTTP_CACHE_MAX_DISK_MB", "64")) * 1024 * 1024)
+        self._disk_writes = 0
+        self._memory: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memoryHits": 0, "diskHits": 0, "revalidated": 0, "misses": 0, "stores": 0}
+
+    # ---- 查找 ----
+
+    def _disk_path(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json.gz"
+
+    def _load_from_disk(self, url: str) -> Optional[CacheEntry]:
+        path = self._disk_path(url)
+        if not path.exists():
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = CacheEntry.from_dict(json.load(f))
+            if entry.url != url:
+                return None
+            os.utime(path)  # 修改时间即最近使用时间，供淘汰使用
+            return entry
+        except Exception:
+            return None
+
+    def lookup(self, url: str) -> Tuple[Optional[CacheEntry], Optional[str]]:
+        """按 URL 查找缓存条目（先内存后磁盘），不判断新鲜度
+
+        Returns:
+            (条目, 来源)，来源为 "memory" 或 "disk"；未命中时为 (None, None)
+        """
+        if not self.enabled:
+            return None, None
+        with self._lock:
+            entry = self._memory.get(url)
+            if entry is not None:
+                self._memory.move_to_end(url)
+                return entry, "memory"
+
+        entry = self._load_from_disk(url)
+        if entry is None:
+            return None, None
+        self._remember(entry)
+        return entry, "disk"
+
+    def _remember(self, entry: CacheEntry):
+        with self._lock:
+            self._memory[entry.url] = entry
+            self._memory.move_to_end(entry.url)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    # ---- 写入 ----
+
+    def _freshness(self, cache_control: str) -> Optional[float]:
+        """从 Cache-Control 计算新鲜期；返回 None 表示不可缓存"""
+        directives = cache_control.lower()
+        if "no-store" in directives:
+            return None
+        if "no-cache" in directives:
+            return 0
+        match = re.search(r"max-age=(\d+)", directives)
+        if match:
+            return float(match.group(1))
+        return self.default_ttl
+
+    def store(self, url: str, body: str, headers) -> Optional[CacheEntry]:
+        """保存 200 响应；headers 为响应头（大小写不敏感的映射）"""
+        if not self.enabled:
+            return None
+        max_age = self._freshness(headers.get("Cache-Control", ""))
+        if max_age is None:
+            return None
+
+        entry = CacheEntry(url, body, headers.get("ETag"), headers.get("Last-Modified"), max_age=max_age)
+        self._remember(entry)
+        self.stats["stores"] += 1
+
+        # 只有可以重新验证或仍在新鲜期内的条目才值得写入磁盘
+        if entry.has_validators or max_age > 0:
+            self._write_to_disk(entry)
+        return entry
+
+    def refresh(self, entry: CacheEntry, headers) -> CacheEntry:
+        """304 响应后刷新条目的存储时间和验证器"""
+        max_age = self._freshness(headers.get("Cache-Control", ""))
+        entry.stored_at = time.time()
+        entry.max_age = max_age if max_age is not None else 0
+        entry.etag = headers.get("ETag") or entry.etag
+        entry.last_modified = headers.get("Last-Modified") or entry.last_modified
+        self._remember(entry)
+        self._write_to_disk(entry)
+        return entry
+
+    def _write_to_disk(self, entry: CacheEntry):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._disk_path(entry.url)
+            temp_path = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+            with gzip.open(temp_path, "wt", encoding="utf-8", compresslevel=6) as f:
+                json.dump(entry.to_dict(), f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except Exception:
+            return
+        with self._lock:
+            self._disk_writes += 1
+            should_prune = self._disk_writes % DISK_PRUNE_INTERVAL == 1
+        if should_prune:
+            self.prune_disk()
+
+    def prune_disk(self):
+        """按最近使用时间淘汰磁盘条目，直到条目数和总大小都不超过上限"""
+        files = []
+        try:
+            for path in self.cache_dir.glob("*.json.gz"):
+                try:
+                    stat = path.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            return
+        files.sort(key=lambda item: item[0], reverse=True)
+        total_bytes = 0
+        for index, (_, size, path) in enumerate(files):
+            total_bytes += size
+            if index >= self.max_disk_entries or total_bytes > self.max_disk_bytes:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def invalidate(self, url: str):
+        """删除某个 URL 的缓存"""
+        with self._lock:
+            self._memory.pop(url, None)
+        try:
+            self._disk_path(url).unlink()
+        except (FileNotFoundError, OSError):
+            pass
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+
+    def record(self, outcome: str):
+        """记录一次查找结果: memoryHits / diskHits / revalidated / misses"""
+        self.stats[outcome] += 1
+
+
+# 进程级缓存，所有 BaseCore 实例共享
+http_cache = HttpCache()
@@ -12,6 +12,7 @@ sys.path.insert(0, str(parent_dir))
 
 from base_api import BaseCore
 from functools import cached_property
+from missav_api_core.page_context import PageContext, current_context
 
 def setup_logger(name, log_file=None, level=logging.INFO):
     """简单的日志设置函数"""
@@ -59,13 +60,17 @@ except (ModuleNotFoundError, ImportError):
 
 
 class Video:
-    def __init__(self, url: str, core: Optional[BaseCore] = None) -> None:
+    def __init__(self, url: str, core: Optional[BaseCore] = None,
+                 context: Optional[PageContext] = None) -> None:
         self.url = url
         self.core = core
         self.logger = setup_logger(name="MISSAV API - [Video]", log_file=None, level=logging.CRITICAL)
         
-        # 直接获取页面内容，就像原项目一样
-        self.content = self.core.fetch(url)
+        # 文档上下文：显式传入 > 当前命令的上下文 > 仅供本对象使用的上下文
+        self.context = context or current_context() or PageContext(core)
+        
+        # 页面内容在同一上下文内只获取一次
+        self.content = self.context.page(url, core=self.core)
 
 
 
@@ -126,7 +131,8 @@ class Video:
         try:
             # 使用增强信息提取器
             if hasattr(self.core, 'info_extractor'):
-                return self.core.info_extractor.extract_enhanced_video_info(self.url, use_cache)
+                return self.core.info_extractor.extract_enhanced_video_info(self.url, use_cache,
+                                                                            context=self.context)
             else:
                 # 回退到基础信息
                 return {
@@ -148,7 +154,8 @@ class Video:
 
     def get_segments(self, quality: str) -> list:
         """Returns the list of HLS segments for a given quality"""
-        return self.core.get_segments(quality=quality, m3u8_url_master=self.m3u8_base_url)
+        return self.core.get_segments(quality=quality, m3u8_url_master=self.m3u8_base_url,
+                                      context=self.context)
 
     def download(self, quality: str, downloader: str, path: str = "./", no_title=False,
                  callback=Callback.text_progress_bar,
@@ -182,25 +189,28 @@ class Client:
         # 将信息提取器绑定到核心，以便Video类可以使用
         self.core.info_extractor = self.info_extractor
 
-    def get_video(self, url: str) -> Video:
+    def get_video(self, url: str, context: Optional[PageContext] = None) -> Video:
         """Returns the video object"""
-        return Video(url, core=self.core)
+        return Video(url, core=self.core, context=context)
     
-    def get_enhanced_video_info(self, url: str, use_cache: bool = True) -> dict:
+    def get_enhanced_video_info(self, url: str, use_cache: bool = True,
+                                context: Optional[PageContext] = None) -> dict:
         """
         获取增强的视频信息，包括分辨率、时长、简介等
         
         Args:
             url: 视频URL
             use_cache: 是否使用缓存
+            context: 文档上下文，与同一命令中的 Video 共享页面和播放列表
             
         Returns:
             包含详细信息的字典
         """
-        return self.info_extractor.extract_enhanced_video_info(url, use_cache)
+        return self.info_extractor.extract_enhanced_video_info(url, use_cache, context=context)
     
     def get_preview_videos(self, url: str, download: bool = False, 
-                          video_code: str = None, output_dir: str = None) -> dict:
+                          video_code: str = None, output_dir: str = None,
+                          context: Optional[PageContext] = None) -> dict:
         """
         获取或下载预览视频
         
@@ -209,14 +219,15 @@ class Client:
             download: 是否下载预览视频
             video_code: 视频代码（用于命名）
             output_dir: 输出目录
+            context: 文档上下文
             
         Returns:
             预览视频信息或下载结果
         """
         if download:
-            return self.preview_downloader.download_all_previews(url, video_code, output_dir)
+            return self.preview_downloader.download_all_previews(url, video_code, output_dir, context=context)
         else:
-            return self.preview_downloader.get_preview_info(url)
+            return self.preview_downloader.get_preview_info(url, context=context)
     
     def search_videos_with_filters(self, keyword: str, page: int = 1, 
                                   sort: str = None, filter_type: str = None,
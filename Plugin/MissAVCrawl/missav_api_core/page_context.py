@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MissAV 请求级文档上下文
+一个命令内共享视频页面 HTML 和 m3u8 播放列表，
+使 Video、EnhancedInfoExtractor、PreviewDownloader 和 BaseCore.get_segments
+对同一资源只发起一次网络请求。
+
+用法:
+    with request_context(core) as context:
+        info = client.get_enhanced_video_info(url, context=context)
+        video = client.get_video(url, context=context)
+        video.download(...)            # 复用页面和主播放列表
+
+未显式传入 context 时，各组件使用 current_context() 返回的当前命令上下文；
+两者都没有时退化为直接调用 core.fetch。
+"""
+
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+
+class PageContext:
+    """请求级文档上下文"""
+
+    def __init__(self, core=None):
+        self.core = core
+        self._pages: Dict[str, Optional[str]] = {}
+        self._playlists: Dict[str, Optional[str]] = {}
+        # 每个 URL 实际发起的获取次数，用于验证“每个资源只获取一次”
+        self.fetch_counts: Counter = Counter()
+        self.reuse_counts: Counter = Counter()
+        self._lock = threading.Lock()
+        # 同一 URL 的并发获取串行化，避免增强搜索的并发线程重复请求
+        self._url_locks: Dict[str, threading.Lock] = {}
+
+    def _url_lock(self, url: str) -> threading.Lock:
+        with self._lock:
+            lock = self._url_locks.get(url)
+            if lock is None:
+                lock = self._url_locks[url] = threading.Lock()
+            return lock
+
+    def _get(self, store: Dict[str, Optional[str]], url: str, core=None) -> Optional[str]:
+        if url in store:
+            self.reuse_counts[url] += 1
+            return store[url]
+
+        with self._url_lock(url):
+            if url in store:
+                self.reuse_counts[url] += 1
+                return store[url]
+            fetcher = core or self.core
+            if fetcher is None:
+                return None
+            content = fetcher.fetch(url)
+            self.fetch_counts[url] += 1
+            # 获取失败不缓存，允许后续调用重试
+            if content:
+                store[url] = content
+            return content
+
+    def page(self, url: str, core=None) -> Optional[str]:
+        """视频页面 HTML"""
+        return self._get(self._pages, url, core)
+
+    def playlist(self, url: str, core=None) -> Optional[str]:
+        """m3u8 播放列表（主播放列表或分段播放列表）"""
+        return self._get(self._playlists, url, core)
+
+    def summary(self) -> Dict:
+        return {
+            "fetches": sum(self.fetch_counts.values()),
+            "reused": sum(self.reuse_counts.values()),
+            "duplicateFetches": sum(count - 1 for count in self.fetch_counts.values() if count > 1),
+        }
+
+
+# 当前命令的上下文（每个插件进程同一时间只处理一个命令，后台线程共享该上下文）
+_current: Optional[PageContext] = None
+
+
+def current_context() -> Optional[PageContext]:
+    """返回当前命令的文档上下文，没有时返回 None"""
+    return _current
+
+
+@contextmanager
+def request_context(core=None):
+    """在一个命令的范围内启用文档上下文"""
+    global _current
+    previous = _current
+    context = PageContext(core)
+    _current = context
+    try:
+        yield context
+    finally:
+        _current = previous
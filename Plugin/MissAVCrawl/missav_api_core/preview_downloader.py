@@ -15,6 +15,8 @@ from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 from urllib.parse import urljoin, urlparse
 
+from missav_api_core.page_context import current_context
+
 
 class PreviewDownloader:
     """预览视频下载器"""
@@ -44,24 +46,26 @@ class PreviewDownloader:
             r'onmouseover[^"]*"([^"]*\.(?:mp4|webm|mov))"',
         ]
     
-    def extract_preview_urls(self, url: str, content: Optional[str] = None) -> Dict:
+    def extract_preview_urls(self, url: str, content: Optional[str] = None, context=None) -> Dict:
         """
         从视频页面提取预览视频URL
         
         Args:
             url: 视频页面URL
             content: 页面内容（可选，如果不提供会自动获取）
+            context: 文档上下文（PageContext），未提供页面内容时从中获取
             
         Returns:
             包含预览视频URL的字典
         """
+        context = context or current_context()
         try:
             # 获取页面内容
             if not content:
                 if not self.core:
                     return {"success": False, "error": "核心模块未初始化且未提供页面内容"}
                 
-                content = self.core.fetch(url)
+                content = context.page(url, core=self.core) if context else self.core.fetch(url)
                 if not content:
                     return {"success": False, "error": "无法获取页面内容"}
             
@@ -364,7 +368,7 @@ class PreviewDownloader:
         }
     
     def download_all_previews(self, url: str, video_code: str = None, 
-                            output_dir: str = None, enable_cache: bool = True) -> Dict:
+                            output_dir: str = None, enable_cache: bool = True, context=None) -> Dict:
         """
         下载视频的所有预览视频
         
@@ -373,13 +377,14 @@ class PreviewDownloader:
             video_code: 视频代码
             output_dir: 输出目录
             enable_cache: 是否启用缓存
+            context: 文档上下文（PageContext）
             
         Returns:
             下载结果字典
         """
         try:
             # 提取预览视频URL
-            extract_result = self.extract_preview_urls(url)
+            extract_result = self.extract_preview_urls(url, context=context)
             
             if not extract_result["success"]:
                 return extract_result
@@ -441,19 +446,20 @@ class PreviewDownloader:
                 "error": f"批量下载预览视频失败: {str(e)}"
             }
     
-    def get_preview_info(self, url: str) -> Dict:
+    def get_preview_info(self, url: str, context=None) -> Dict:
         """
         获取预览视频信息（不下载）
         
         Args:
             url: 视频页面URL
+            context: 文档上下文（PageContext）
             
         Returns:
             预览视频信息字典
         """
         try:
             # 提取预览视频URL
-            extract_result = self.extract_preview_urls(url)
+            extract_result = self.extract_preview_urls(url, context=context)
             
             if not extract_result["success"]:
                 return extract_result
@@ -5,6 +5,7 @@ MissAV 进度处理模块
 """
 
 import os
+import sys
 import json
 import time
 import requests
@@ -59,23 +60,32 @@ class ProgressHandler:
         """标记任务开始"""
         self._write_status("running", "下载已开始...")
 
-    def update(self, current_bytes: int, total_bytes: int):
-        """更新下载进度"""
+    def update(self, current_bytes: int, total_bytes: int, stats=None):
+        """更新下载进度
+
+        Args:
+            current_bytes: 已下载字节数
+            total_bytes: 预计总字节数
+            stats: 可选的 DownloadStats，提供时使用其滑动窗口速度和ETA
+        """
         current_time = time.time()
         time_diff = current_time - self.last_update_time
         
         if time_diff < 1 and current_bytes < total_bytes: # 每秒最多更新一次
             return
 
-        bytes_diff = current_bytes - self.last_downloaded
-        speed = bytes_diff / time_diff if time_diff > 0 else 0
+        if stats is not None:
+            speed = stats.bytes_per_second
+            remaining_seconds = stats.eta_seconds
+        else:
+            bytes_diff = current_bytes - self.last_downloaded
+            speed = bytes_diff / time_diff if time_diff > 0 else 0
+            remaining_seconds = (total_bytes - current_bytes) / speed if speed > 0 else None
         
         progress = (current_bytes / total_bytes) * 100 if total_bytes > 0 else 0
         
         eta = "N/A"
-        if speed > 0:
-            remaining_bytes = total_bytes - current_bytes
-            remaining_seconds = remaining_bytes / speed
+        if remaining_seconds is not None:
             eta = time.strftime('%H:%M:%S', time.gmtime(remaining_seconds))
 
         message = f"正在下载: {progress:.1f}% - {speed / (1024*1024):.2f} MB/s"
@@ -117,7 +127,10 @@ class ProgressHandler:
         """用于 missav_api 的回调处理器 - 兼容多种回调格式"""
         try:
             # 尝试不同的参数格式
-            if len(args) >= 2:
+            if 'downloaded_bytes' in kwargs and 'total_bytes' in kwargs:
+                # 格式0: 下载引擎提供的字节级数据
+                self.update(kwargs['downloaded_bytes'], kwargs['total_bytes'], kwargs.get('stats'))
+            elif len(args) >= 2:
                 # 格式1: progress_callback_handler(current, total, ...)
                 current, total = args[0], args[1]
                 self.update(current, total)
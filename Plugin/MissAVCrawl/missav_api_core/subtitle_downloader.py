@@ -26,8 +26,9 @@ except ImportError:
     LangDetectException = Exception
 
 # 严格照搬原始配置常量
-baseSearchLink = "https://www.subtitlecat.com/index.php?search="
-baseLink = "https://www.subtitlecat.com/"
+# 字幕站点地址可通过 MISSAV_SUBTITLE_BASE_URL 覆盖（离线基准测试指向本地替身服务器）
+baseLink = os.getenv("MISSAV_SUBTITLE_BASE_URL", "https://www.subtitlecat.com").rstrip("/") + "/"
+baseSearchLink = baseLink + "index.php?search="
 
 # 严格照搬原始重试策略配置
 MAX_REQUEST_RETRIES = 5
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MissAV 热路径追踪模块
+轻量级的 span 计时工具，用于定位请求耗时（连接、TLS、服务器等待、解析、休眠）
+
+启用方式:
+- 请求参数 debug=true: 在 JSON 响应中附带 timing 耗时分解，并写入追踪文件
+- 环境变量 MISSAV_TRACE=true: 只写入追踪文件，不改变响应内容
+追踪文件为 JSONL 格式，每个命令一行，路径由 MISSAV_TRACE_FILE 指定
+"""
+
+import os
+import json
+import time
+import uuid
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+from pathlib import Path
+from typing import Dict, List, Optional
+
+DEFAULT_TRACE_FILE = "./cache/traces/missav_trace.jsonl"
+
+# 单个请求最多保留的 span 数量，避免增强搜索时追踪数据无限增长
+MAX_SPANS = 2000
+
+
+def _env_enabled(name: str) -> bool:
+    return os.getenv(name, "").strip().lower() in ("true", "1", "yes", "on")
+
+
+class Tracer:
+    """请求级追踪器 - 每个插件进程同一时间只处理一个命令"""
+
+    def __init__(self):
+        self.enabled = False
+        self.command = None
+        self.trace_id = None
+        self.start_time = 0.0
+        self.spans: List[Dict] = []
+        self.dropped_spans = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def start(self, command: str, enabled: bool = False):
+        """开始追踪一个命令"""
+        with self._lock:
+            self.enabled = enabled or _env_enabled("MISSAV_TRACE")
+            self.command = command
+            self.trace_id = uuid.uuid4().hex[:12]
+            self.start_time = time.perf_counter()
+            self.spans = []
+            self.dropped_spans = 0
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _append(self, span: Dict):
+        with self._lock:
+            if len(self.spans) < MAX_SPANS:
+                self.spans.append(span)
+            else:
+                self.dropped_spans += 1
+
+    @contextmanager
+    def span(self, name: str, **attrs):
+        """计时一段代码；未启用时几乎没有开销
+
+        用法:
+            with tracer.span("fetch", url=url) as s:
+                ...
+                if s is not None:
+                    s["status"] = 200
+        """
+        if not self.enabled:
+            yield None
+            return
+
+        stack = self._stack()
+        span = {
+            "name": name,
+            "parent": stack[-1]["name"] if stack else None,
+            "startMs": round((time.perf_counter() - self.start_time) * 1000, 2),
+            "thread": threading.current_thread().name,
+        }
+        if attrs:
+            span.update(attrs)
+        stack.append(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            span["error"] = type(e).__name__
+            raise
+        finally:
+            span["durationMs"] = round((time.perf_counter() - started) * 1000, 2)
+            stack.pop()
+            self._append(span)
+
+    def record(self, name: str, duration: float, **attrs):
+        """记录一个在外部计时的阶段（秒）"""
+        if not self.enabled:
+            return
+        stack = self._stack()
+        span = {
+            "name": name,
+            "parent": stack[-1]["name"] if stack else None,
+            "startMs": round((time.perf_counter() - self.start_time - duration) * 1000, 2),
+            "durationMs": round(duration * 1000, 2),
+            "thread": threading.current_thread().name,
+        }
+        if attrs:
+            span.update(attrs)
+        self._append(span)
+
+    def sleep(self, seconds: float, reason: str = "sleep"):
+        """带追踪的 time.sleep，用于统计限速/重试等待所占的时间"""
+        if seconds <= 0:
+            return
+        with self.span("sleep", reason=reason):
+            time.sleep(seconds)
+
+    def summary(self) -> Dict:
+        """按 span 名称聚合的耗时分解"""
+        with self._lock:
+            spans = list(self.spans)
+
+        breakdown = {}
+        for span in spans:
+            entry = breakdown.setdefault(span["name"], {"count": 0, "totalMs": 0.0, "maxMs": 0.0})
+            entry["count"] += 1
+            entry["totalMs"] += span["durationMs"]
+            entry["maxMs"] = max(entry["maxMs"], span["durationMs"])
+        for entry in breakdown.values():
+            entry["totalMs"] = round(entry["totalMs"], 2)
+
+        return {
+            "traceId": self.trace_id,
+            "command": self.command,
+            "totalMs": round((time.perf_counter() - self.start_time) * 1000, 2),
+            "breakdown": dict(sorted(breakdown.items(), key=lambda item: item[1]["totalMs"], reverse=True)),
+            "spanCount": len(spans),
+            "droppedSpans": self.dropped_spans,
+        }
+
+    def finish(self) -> Optional[Dict]:
+        """结束追踪，写入 JSONL 追踪文件并返回耗时分解；未启用时返回 None"""
+        if not self.enabled:
+            return None
+
+        summary = self.summary()
+        with self._lock:
+            record = {
+                "timestamp": datetime.now().isoformat(),
+                **summary,
+                "spans": list(self.spans),
+            }
+            self.enabled = False
+
+        trace_file = Path(os.getenv("MISSAV_TRACE_FILE", DEFAULT_TRACE_FILE))
+        try:
+            trace_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(trace_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        except Exception:
+            pass
+
+        return summary
+
+
+class HttpPhaseRecorder:
+    """将 httpx/httpcore 的 trace 扩展事件转换为连接阶段的 span
+
+    httpcore 不单独报告 DNS 解析，connect_tcp 阶段包含 DNS + TCP 握手。
+    """
+
+    PHASE_NAMES = {
+        "connect_tcp": "http.connect",
+        "start_tls": "http.tls",
+        "send_request_headers": "http.send",
+        "send_request_body": "http.send",
+        "receive_response_headers": "http.server_wait",
+        "receive_response_body": "http.receive_body",
+    }
+
+    def __init__(self, tracer: "Tracer"):
+        self.tracer = tracer
+        self._started = {}
+
+    def __call__(self, event_name: str, info: dict):
+        # 事件名形如 "connection.connect_tcp.started" 或 "http11.receive_response_headers.complete"
+        parts = event_name.split(".")
+        if len(parts) != 3:
+            return
+        phase, state = parts[1], parts[2]
+        if phase not in self.PHASE_NAMES:
+            return
+        if state == "started":
+            self._started[phase] = time.perf_counter()
+        elif phase in self._started:
+            duration = time.perf_counter() - self._started.pop(phase)
+            self.tracer.record(self.PHASE_NAMES[phase], duration, failed=state == "failed")
+
+    @property
+    def extensions(self) -> Dict:
+        return {"trace": self}
+
+
+# 进程级追踪器
+tracer = Tracer()
+
+
+def span(name: str, **attrs):
+    """tracer.span 的快捷方式"""
+    return tracer.span(name, **attrs)
+
+
+def traced(name: str):
+    """为方法添加 span 的装饰器"""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with tracer.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -16,12 +16,13 @@ from typing import List, Dict, Optional, Tuple
 from bs4 import BeautifulSoup
 
 from .debug_utils import debug_print
+from .tracing import tracer
 
 # 添加当前目录到 Python 路径
 current_dir = Path(__file__).parent
 sys.path.insert(0, str(current_dir))
 
-from consts import HEADERS
+from consts import HEADERS, BASE_URL
 from sort_filter_module import SortFilterModule
 
 
@@ -29,12 +30,15 @@ class UnifiedSearchModule:
     """统一搜索模块"""
     
     def __init__(self):
-        self.base_url = "https://missav.ws"
+        self.base_url = BASE_URL
         self.headers = HEADERS.copy()
         self.session = requests.Session()
         self.session.headers.update(self.headers)
         self.sort_filter = SortFilterModule()
         
+        # 增强信息使用的API客户端，首次需要时创建，在整个命令内复用连接
+        self._api_client = None
+        
         # 添加更多的User-Agent轮换和反爬虫措施
         self.user_agents = [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
@@ -66,6 +70,17 @@ class UnifiedSearchModule:
             'User-Agent': self.user_agents[self.current_ua_index]
         })
     
+    def _traced_get(self, url: str, timeout: int = 30, **attrs) -> requests.Response:
+        """带追踪的 session.get，记录状态码、响应大小和服务器响应时间"""
+        with tracer.span("search.get", url=url, **attrs) as get_span:
+            response = self.session.get(url, timeout=timeout)
+            if get_span is not None:
+                get_span["status"] = response.status_code
+                get_span["bytes"] = len(response.content)
+                # requests 的 elapsed 为发出请求到解析完响应头的时间（含连接建立与服务器等待）
+                get_span["serverWaitMs"] = round(response.elapsed.total_seconds() * 1000, 2)
+            return response
+    
     def _build_search_url_candidates(self, keyword: str, page: int = 1, 
                                    sort: Optional[str] = None, filter_type: Optional[str] = None) -> List[str]:
         """构建多个候选搜索URL"""
@@ -202,7 +217,7 @@ class UnifiedSearchModule:
                     
                     for retry in range(max_retries):
                         try:
-                            response = self.session.get(search_url, timeout=30)
+                            response = self._traced_get(search_url, timeout=30, attempt=retry + 1)
                             response.raise_for_status()
                             successful_url = search_url
                             success = True
@@ -211,7 +226,7 @@ class UnifiedSearchModule:
                         except requests.exceptions.HTTPError as e:
                             if e.response.status_code in [403, 404] and retry < max_retries - 1:
                                 debug_print(f"⚠️ 遇到{e.response.status_code}错误，等待{1 + retry}秒后重试...")
-                                time.sleep(1 + retry)
+                                tracer.sleep(1 + retry, "retry_http_error")
                                 self._rotate_user_agent()
                                 continue
                             else:
@@ -230,7 +245,8 @@ class UnifiedSearchModule:
                     break
                 
                 # 解析结果
-                page_results = self._parse_search_page(response.text, keyword, enhanced_info, max_results)
+                with tracer.span("search.parse", page=current_page):
+                    page_results = self._parse_search_page(response.text, keyword, enhanced_info, max_results)
                 
                 if page_results:
                     all_results.extend(page_results)
@@ -252,10 +268,11 @@ class UnifiedSearchModule:
                         for fallback_url in fallback_candidates[:3]:  # 只尝试前3个URL
                             debug_print(f"🔍 尝试回退搜索URL: {fallback_url}")
                             try:
-                                fallback_response = self.session.get(fallback_url, timeout=30)
+                                fallback_response = self._traced_get(fallback_url, timeout=30)
                                 fallback_response.raise_for_status()
                                 
-                                fallback_results = self._parse_search_page(fallback_response.text, first_keyword, enhanced_info, max_results)
+                                with tracer.span("search.parse", page=current_page, fallback=True):
+                                    fallback_results = self._parse_search_page(fallback_response.text, first_keyword, enhanced_info, max_results)
                                 if fallback_results:
                                     debug_print(f"✅ 回退搜索成功，找到 {len(fallback_results)} 个结果")
                                     all_results.extend(fallback_results)
@@ -277,7 +294,7 @@ class UnifiedSearchModule:
                 
                 # 添加延迟避免被封
                 if current_page < page + max_pages - 1:
-                    time.sleep(1)
+                    tracer.sleep(1, "page_delay")
             
             # 修复所有结果的封面图片URL
             for video in all_results:
@@ -365,20 +382,21 @@ class UnifiedSearchModule:
                 max_retries = 3
                 for retry in range(max_retries):
                     try:
-                        response = self.session.get(hot_url, timeout=30)
+                        response = self._traced_get(hot_url, timeout=30, attempt=retry + 1)
                         response.raise_for_status()
                         break
                     except requests.exceptions.HTTPError as e:
                         if e.response.status_code == 403 and retry < max_retries - 1:
                             debug_print(f"⚠️ 遇到403错误，等待{2 ** retry}秒后重试...")
-                            time.sleep(2 ** retry)
+                            tracer.sleep(2 ** retry, "retry_403")
                             self._rotate_user_agent()
                             continue
                         else:
                             raise
                 
                 # 解析结果
-                page_results = self._parse_hot_videos_page(response.text, category, enhanced_info, max_results)
+                with tracer.span("search.parse", page=current_page):
+                    page_results = self._parse_hot_videos_page(response.text, category, enhanced_info, max_results)
                 
                 if page_results:
                     all_results.extend(page_results)
@@ -395,7 +413,7 @@ class UnifiedSearchModule:
                 
                 # 添加延迟避免被封
                 if current_page < page + max_pages - 1:
-                    time.sleep(1)
+                    tracer.sleep(1, "page_delay")
             
             # 修复所有结果的封面图片URL
             for video in all_results:
@@ -783,12 +801,13 @@ class UnifiedSearchModule:
                 debug_print(f"📊 获取第 {i+1}/{len(results)} 个视频的增强信息: {video.get('video_code', '未知')}")
                 
                 # 尝试从视频页面获取更详细的信息
-                enhanced_video = self._get_enhanced_video_info(video)
+                with tracer.span("search.enrich", video_code=video.get('video_code')):
+                    enhanced_video = self._get_enhanced_video_info(video)
                 enriched_results.append(enhanced_video)
                 
                 # 添加延迟避免请求过快
                 if i < len(results) - 1:
-                    time.sleep(0.5)
+                    tracer.sleep(0.5, "enrich_delay")
                     
             except Exception as e:
                 debug_print(f"⚠️ 获取视频 {video.get('video_code', '未知')} 的增强信息失败: {str(e)}")
@@ -822,7 +841,9 @@ class UnifiedSearchModule:
             try:
                 # 导入并使用相同的信息提取器
                 from .missav_api import Client
-                api_client = Client()
+                if self._api_client is None:
+                    self._api_client = Client()
+                api_client = self._api_client
                 
                 if hasattr(api_client, 'get_enhanced_video_info'):
                     enhanced_result = api_client.get_enhanced_video_info(video_url, use_cache=False)
@@ -884,11 +905,12 @@ class UnifiedSearchModule:
                 debug_print(f"⚠️ 使用API方法失败，回退到自定义方法: {str(api_error)}")
             
             # 回退到自定义的信息提取方法
-            response = self.session.get(video_url, timeout=15)
+            response = self._traced_get(video_url, timeout=15)
             response.raise_for_status()
             
             # 解析页面内容
-            enhanced_info = self._extract_enhanced_info_from_page(response.text, video_url)
+            with tracer.span("search.parse_video_page"):
+                enhanced_info = self._extract_enhanced_info_from_page(response.text, video_url)
             
             # 合并基础信息和增强信息
             result = basic_video_info.copy()
@@ -15,9 +15,36 @@ sys.path.insert(0, str(current_dir))
 
 # 导入模块化组件
 from missav_api_core import MissAVCrawler
+from missav_api_core.tracing import tracer
+from missav_api_core.http_cache import http_cache
+from missav_api_core.page_context import request_context
 
 
 def process_request(request_data: dict) -> dict:
+    """处理请求，debug=true 时在响应中附带耗时分解"""
+    debug = request_data.get('debug', False)
+    if isinstance(debug, str):
+        debug = debug.lower() in ['true', '1', 'yes', 'on']
+    
+    cache_stats_before = dict(http_cache.stats)
+    tracer.start(str(request_data.get('command', '')).strip(), enabled=bool(debug))
+    try:
+        # 命令内共享页面和播放列表，同一资源只获取一次
+        with tracer.span("command"), request_context() as page_context:
+            result = _process_request(request_data)
+    finally:
+        timing = tracer.finish()
+    
+    if debug and timing is not None:
+        # 本次命令的HTTP缓存命中情况
+        timing["httpCache"] = {key: http_cache.stats[key] - cache_stats_before.get(key, 0)
+                               for key in http_cache.stats}
+        timing["pageContext"] = page_context.summary()
+        result["timing"] = timing
+    return result
+
+
+def _process_request(request_data: dict) -> dict:
     """处理请求"""
     try:
         command = request_data.get('command', '').strip()
@@ -29,7 +56,8 @@ def process_request(request_data: dict) -> dict:
             }
         
         # 初始化爬虫
-        crawler = MissAVCrawler()
+        with tracer.span("init_crawler"):
+            crawler = MissAVCrawler()
         
         if command == "GetVideoInfo":
             url = request_data.get('url', '') or ''
@@ -928,6 +956,53 @@ def process_request(request_data: dict) -> dict:
                     "error": "增强热榜功能不可用"
                 }
         
+        elif command == "GetDownloadStats":
+            task_id = request_data.get('task_id', request_data.get('taskId', '')) or ''
+            task_id = str(task_id).strip()
+            if not task_id:
+                return {
+                    "status": "error",
+                    "error": "缺少 task_id 参数"
+                }
+
+            from missav_api_core.async_handler import load_async_result_file
+            from missav_api_core.download_stats import DownloadStats
+
+            task_result = load_async_result_file(task_id)
+            if not task_result:
+                return {
+                    "status": "error",
+                    "error": f"未找到下载任务: {task_id}"
+                }
+
+            stats = task_result.get("downloadStats")
+            response_text = f"""### MissAV 下载统计 ###
+
+任务ID: {task_id}
+任务状态: {task_result.get('status', '未知')}
+视频: {task_result.get('videoTitle', '未知')} ({task_result.get('videoCode', '未知')})
+"""
+            if stats:
+                latency = stats.get("segmentLatency", {})
+                eta = stats.get("etaSeconds")
+                response_text += f"""已下载: {stats['downloadedBytes'] / (1024*1024):.2f} MB / 预计 {stats['estimatedTotalBytes'] / (1024*1024):.2f} MB
+分段: {stats['completedSegments']}/{stats['totalSegments']} (失败 {stats['failedSegments']})
+当前速度: {DownloadStats.format_speed(stats['bytesPerSecond'])} (最近 {stats['windowSeconds']:.0f} 秒)
+平均速度: {DownloadStats.format_speed(stats['averageBytesPerSecond'])}
+预计剩余时间: {DownloadStats.format_eta(eta)}
+"""
+                if latency.get("count"):
+                    response_text += f"分段延迟: p50 {latency['p50Ms']}ms, p95 {latency['p95Ms']}ms, 最大 {latency['maxMs']}ms\n"
+                    response_text += "延迟分布: " + ", ".join(f"{k}: {v}" for k, v in latency["histogram"].items()) + "\n"
+            else:
+                response_text += "暂无下载统计数据（任务可能尚未开始下载分段）。\n"
+
+            return {
+                "status": "success",
+                "result": response_text,
+                "stats": stats
+            }
+
         else:
             return {
                 "status": "error",
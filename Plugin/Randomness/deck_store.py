@@ -0,0 +1,182 @@
+"""
+有状态牌堆的持久化存储
+
+每个牌堆保存为存储目录中的一个 JSON 文件（<deck_id>.json），每次调用只读写用到的那个牌堆，
+无状态的命令完全不接触存储。文件的修改时间即最后访问时间：只查询时仅更新修改时间，不重写文件。
+过期的牌堆在读取时惰性删除，创建新牌堆时顺带按修改时间清理一次目录。
+修改牌堆的读-改-写过程持有目录锁，并发调用不会互相覆盖。
+
+牌的顺序保存为基础牌堆下标的排列（array('H')，小端序后 base64 编码），不保存牌本身。
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import base64
+import threading
+from array import array
+from contextlib import contextmanager
+
+# 超过该时间未被访问的牌堆视为过期
+DECK_EXPIRATION_SECONDS = 24 * 60 * 60
+
+LOCK_FILE = '.lock'
+
+_DECK_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+# array('H') 的下标上限
+MAX_DECK_SIZE = 1 << 16
+
+
+def encode_order(order):
+    """把下标排列编码为字符串（固定小端序，与平台无关）"""
+    if sys.byteorder == 'big':
+        order = array('H', order)
+        order.byteswap()
+    return base64.b64encode(order.tobytes()).decode('ascii')
+
+
+def decode_order(data):
+    order = array('H')
+    order.frombytes(base64.b64decode(data))
+    if sys.byteorder == 'big':
+        order.byteswap()
+    return order
+
+
+@contextmanager
+def _file_lock(path):
+    """跨进程的排他锁（POSIX 使用 fcntl.flock，Windows 使用 msvcrt.locking）"""
+    with open(path, 'a+b') as f:
+        if os.name == 'nt':
+            import msvcrt
+            f.seek(0)
+            # LK_LOCK 在锁被占用时每秒重试一次，最多 10 次
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class DeckStore:
+    """每个牌堆一个文件的存储"""
+
+    def __init__(self, directory, legacy_file=None, expiration=DECK_EXPIRATION_SECONDS):
+        self.directory = directory
+        self.legacy_file = legacy_file
+        self.expiration = expiration
+        self._legacy_checked = False
+
+    @staticmethod
+    def is_valid_id(deck_id):
+        return isinstance(deck_id, str) and bool(_DECK_ID_PATTERN.match(deck_id))
+
+    def _path(self, deck_id):
+        if not self.is_valid_id(deck_id):
+            raise ValueError(f"无效的 'deck_id': {deck_id}。")
+        return os.path.join(self.directory, f"{deck_id}.json")
+
+    @contextmanager
+    def lock(self):
+        """持有存储目录的排他锁，用于读-改-写（同一进程内不可嵌套）"""
+        self._migrate_legacy()
+        os.makedirs(self.directory, exist_ok=True)
+        with _file_lock(os.path.join(self.directory, LOCK_FILE)):
+            yield
+
+    def _is_expired(self, mtime):
+        return time.time() - mtime > self.expiration
+
+    def load(self, deck_id):
+        """读取牌堆；不存在或已过期时返回 None（过期的文件顺便删除）"""
+        path = self._path(deck_id)
+        self._migrate_legacy()
+        try:
+            if self._is_expired(os.path.getmtime(path)):
+                os.remove(path)
+                return None
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save(self, deck_id, deck):
+        """原子地写入牌堆（同时刷新最后访问时间）"""
+        path = self._path(deck_id)
+        os.makedirs(self.directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(deck, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, path)
+
+    def touch(self, deck_id):
+        """只刷新最后访问时间"""
+        try:
+            os.utime(self._path(deck_id))
+        except OSError:
+            pass
+
+    def delete(self, deck_id):
+        try:
+            os.remove(self._path(deck_id))
+            return True
+        except OSError:
+            return False
+
+    def purge_expired(self):
+        """按文件修改时间删除过期的牌堆，只 stat 不解析文件"""
+        removed = 0
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return 0
+        for name in names:
+            if not name.endswith('.json'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                if self._is_expired(os.path.getmtime(path)):
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def _migrate_legacy(self):
+        """把旧版单文件存储（所有牌堆在一个 JSON 里）中未过期的牌堆拆分为单独的文件，只执行一次"""
+        if self._legacy_checked:
+            return
+        self._legacy_checked = True
+        if not self.legacy_file or not os.path.exists(self.legacy_file):
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with _file_lock(os.path.join(self.directory, LOCK_FILE)):
+            if not os.path.exists(self.legacy_file):
+                return
+            try:
+                with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                legacy_decks = json.loads(content) if content else {}
+            except (OSError, ValueError):
+                legacy_decks = {}
+            for deck_id, deck in legacy_decks.items():
+                last_accessed = deck.pop('last_accessed', 0) if isinstance(deck, dict) else 0
+                if not self.is_valid_id(deck_id) or self._is_expired(last_accessed):
+                    continue
+                self.save(deck_id, deck)
+                os.utime(self._path(deck_id), (last_accessed, last_accessed))
+            try:
+                os.replace(self.legacy_file, f"{self.legacy_file}.migrated")
+            except OSError:
+                pass
@@ -8,14 +8,17 @@ import random
 import os
 import re
 import secrets
-import time
+from array import array
 from datetime import datetime, timezone
 
 from dice_roller import roll_dice, format_dice_results
+from deck_store import DeckStore, MAX_DECK_SIZE, encode_order, decode_order
 
 # --- 全局状态 ---
-ACTIVE_DECKS = {}
-ACTIVE_DECKS_FILE = os.path.join(os.getenv('PROJECT_BASE_PATH', '.'), 'Plugin/Randomness/data/active_decks.json')
+# 每个牌堆一个文件；旧版把所有牌堆保存在 active_decks.json 中，首次访问时自动拆分迁移
+ACTIVE_DECKS_DIR = os.path.join(os.getenv('PROJECT_BASE_PATH', '.'), os.getenv('ACTIVE_DECKS_PATH', 'Plugin/Randomness/data/decks'))
+LEGACY_ACTIVE_DECKS_FILE = os.path.join(os.getenv('PROJECT_BASE_PATH', '.'), 'Plugin/Randomness/data/active_decks.json')
+DECK_STORE = DeckStore(ACTIVE_DECKS_DIR, legacy_file=LEGACY_ACTIVE_DECKS_FILE)
 
 # --- 命名规范转换辅助函数 ---
 def snake_to_camel(snake_str):
@@ -108,6 +111,51 @@ except ValueError as e:
     sys.exit(1)
 
 # --- 有状态的牌堆管理函数 ---
+# 牌堆记录只保存对基础牌堆的引用和一个下标排列：
+#   {"base": 牌堆名称, "deck_count": 副数, "base_size": 基础牌堆张数, "order": 编码后的 array('H'), "cursor": 已抽张数}
+# 自定义牌堆的 "base" 为 None，卡牌列表保存在 "custom_cards" 中。下标 i 对应基础牌堆的第 i % base_size 张牌，
+# order[:cursor] 是已抽出的牌，order[cursor:] 是剩余的牌。
+# 抽牌时对剩余部分逐张做 Fisher–Yates 交换，无论排列当前是什么顺序，抽到的牌都是均匀随机的，
+# 因此创建时无需洗牌，重置时只需把 cursor 归零。
+
+def _new_deck_record(base, base_size, deck_count=1, custom_cards=None):
+    total = base_size * deck_count
+    if total > MAX_DECK_SIZE: raise ValueError(f"牌堆总数 ({total}) 不能超过 {MAX_DECK_SIZE}。")
+    deck_info = {"base": base, "deck_count": deck_count, "base_size": base_size, "order": array('H', range(total)), "cursor": 0}
+    if custom_cards is not None: deck_info["custom_cards"] = custom_cards
+    return deck_info
+
+def _upgrade_legacy_deck(deck_info):
+    """把旧格式的记录（保存完整卡牌列表 initial_cards / cards / drawn_cards）转换为排列表示"""
+    initial_cards = deck_info["initial_cards"]
+    positions = {}
+    for index, card in enumerate(initial_cards):
+        positions.setdefault(json.dumps(card, sort_keys=True), []).append(index)
+    # 旧格式从 cards 末尾抽牌：已抽的牌在前，剩余的牌按原抽牌顺序在后
+    sequence = deck_info["drawn_cards"] + deck_info["cards"][::-1]
+    order = array('H', (positions[json.dumps(card, sort_keys=True)].pop() for card in sequence))
+    upgraded = _new_deck_record(None, len(initial_cards), custom_cards=initial_cards)
+    upgraded.update({"order": order, "cursor": len(deck_info["drawn_cards"])})
+    return upgraded
+
+def _load_deck(deck_id):
+    """读取牌堆，不存在或已过期时报错"""
+    deck_info = DECK_STORE.load(deck_id) if DECK_STORE.is_valid_id(deck_id) else None
+    if deck_info is None: raise ValueError(f"无效的 'deck_id': {deck_id}。")
+    if "initial_cards" in deck_info: return _upgrade_legacy_deck(deck_info)
+    deck_info["order"] = decode_order(deck_info["order"])
+    return deck_info
+
+def _save_deck(deck_id, deck_info):
+    DECK_STORE.save(deck_id, {**deck_info, "order": encode_order(deck_info["order"])})
+
+def _base_cards(deck_info):
+    base = deck_info["base"]
+    cards = deck_info["custom_cards"] if base is None else AVAILABLE_DECKS.get(base)
+    if cards is None or len(cards) != deck_info["base_size"]:
+        raise ValueError(f"牌堆 '{base}' 的数据已变更，请重新创建牌堆。")
+    return cards
+
 def create_deck(params):
     deck_name = _get_param(params, ['deck_name', 'deck_type'])
     deck_count = _get_int_param(params, ['deck_count', 'decks_count'], default=1)
@@ -116,69 +164,64 @@ def create_deck(params):
         raise ValueError(f"无效的牌堆名称: '{deck_name}'。可用牌堆: {list(AVAILABLE_DECKS.keys())}")
     if deck_count <= 0: raise ValueError("'deck_count' 必须是正整数。")
     
-    initial_cards = AVAILABLE_DECKS[deck_name] * deck_count
-    random.shuffle(initial_cards)
+    deck_info = _new_deck_record(deck_name, len(AVAILABLE_DECKS[deck_name]), deck_count)
     deck_id = secrets.token_hex(16)
-    ACTIVE_DECKS[deck_id] = {
-        "initial_cards": initial_cards[:], "cards": initial_cards[:],
-        "drawn_cards": [], "last_accessed": time.time()
-    }
-    return {"deck_id": deck_id, "deck_name": deck_name, "total_cards": len(initial_cards), "remaining_cards": len(initial_cards)}
+    DECK_STORE.purge_expired()
+    _save_deck(deck_id, deck_info)
+    total = len(deck_info["order"])
+    return {"deck_id": deck_id, "deck_name": deck_name, "total_cards": total, "remaining_cards": total}
 
 def create_custom_deck(params):
     cards = _get_list_param(params, 'cards')
     if cards is None: raise ValueError("必需的 'cards' 参数缺失或格式不正确。")
     
     deck_name = _get_param(params, 'deck_name', 'custom')
-    initial_cards = cards[:]
-    random.shuffle(initial_cards)
+    deck_info = _new_deck_record(None, len(cards), custom_cards=cards)
     deck_id = secrets.token_hex(16)
-    ACTIVE_DECKS[deck_id] = {
-        "initial_cards": initial_cards[:], "cards": initial_cards[:],
-        "drawn_cards": [], "last_accessed": time.time()
-    }
-    return {"deck_id": deck_id, "deck_name": deck_name, "total_cards": len(initial_cards), "remaining_cards": len(initial_cards)}
+    DECK_STORE.purge_expired()
+    _save_deck(deck_id, deck_info)
+    return {"deck_id": deck_id, "deck_name": deck_name, "total_cards": len(cards), "remaining_cards": len(cards)}
 
 def draw_from_deck(params):
     deck_id = _get_param(params, 'deck_id')
     count = _get_int_param(params, ['count', 'num_cards'], default=1)
+    if count <= 0: raise ValueError("'count'（或 'num_cards'）参数必须是正整数。")
     
-    if not deck_id or deck_id not in ACTIVE_DECKS: raise ValueError(f"无效的 'deck_id': {deck_id}。")
-    
-    ACTIVE_DECKS[deck_id]['last_accessed'] = time.time()
-    deck = ACTIVE_DECKS[deck_id]["cards"]
-    if count > len(deck): raise ValueError(f"抽牌数量 ({count}) 超过了牌堆剩余牌数 ({len(deck)})。")
-        
-    drawn_cards = [deck.pop() for _ in range(count)]
-    ACTIVE_DECKS[deck_id]["drawn_cards"].extend(drawn_cards)
-    return {"deck_id": deck_id, "drawn_cards": drawn_cards, "remaining_cards": len(deck)}
+    with DECK_STORE.lock():
+        deck_info = _load_deck(deck_id)
+        base_cards = _base_cards(deck_info)
+        order, cursor = deck_info["order"], deck_info["cursor"]
+        remaining = len(order) - cursor
+        if count > remaining: raise ValueError(f"抽牌数量 ({count}) 超过了牌堆剩余牌数 ({remaining})。")
+
+        for i in range(cursor, cursor + count):
+            j = random.randrange(i, len(order))
+            order[i], order[j] = order[j], order[i]
+        drawn_cards = [base_cards[index % len(base_cards)] for index in order[cursor:cursor + count]]
+        deck_info["cursor"] = cursor + count
+        _save_deck(deck_id, deck_info)
+    return {"deck_id": deck_id, "drawn_cards": drawn_cards, "remaining_cards": remaining - count}
 
 def reset_deck(params):
     deck_id = _get_param(params, 'deck_id')
-    if not deck_id or deck_id not in ACTIVE_DECKS: raise ValueError(f"无效的 'deck_id': {deck_id}。")
-    
-    deck_info = ACTIVE_DECKS[deck_id]
-    deck_info['last_accessed'] = time.time()
-    new_cards = deck_info["initial_cards"][:]
-    random.shuffle(new_cards)
-    deck_info["cards"] = new_cards
-    deck_info["drawn_cards"] = []
-    return {"deck_id": deck_id, "status": "reset_success", "remaining_cards": len(new_cards)}
+    with DECK_STORE.lock():
+        deck_info = _load_deck(deck_id)
+        deck_info["cursor"] = 0
+        _save_deck(deck_id, deck_info)
+    return {"deck_id": deck_id, "status": "reset_success", "remaining_cards": len(deck_info["order"])}
 
 def destroy_deck(params):
     deck_id = _get_param(params, 'deck_id')
-    if deck_id in ACTIVE_DECKS:
-        del ACTIVE_DECKS[deck_id]
+    if DECK_STORE.is_valid_id(deck_id) and DECK_STORE.delete(deck_id):
         return {"deck_id": deck_id, "status": "destroyed"}
     return {"deck_id": deck_id, "status": "not_found_or_already_destroyed"}
 
 def query_deck(params):
     deck_id = _get_param(params, 'deck_id')
-    if not deck_id or deck_id not in ACTIVE_DECKS: raise ValueError(f"无效的 'deck_id': {deck_id}。")
-    
-    deck_info = ACTIVE_DECKS[deck_id]
-    deck_info['last_accessed'] = time.time()
-    return {"deck_id": deck_id, "remaining_cards": len(deck_info["cards"]), "drawn_cards_count": len(deck_info["drawn_cards"]), "total_cards": len(deck_info["initial_cards"])}
+    deck_info = _load_deck(deck_id)
+    DECK_STORE.touch(deck_id)
+    total, cursor = len(deck_info["order"]), deck_info["cursor"]
+    return {"deck_id": deck_id, "remaining_cards": total - cursor, "drawn_cards_count": cursor, "total_cards": total}
 
 # --- 无状态的随机函数 ---
 def get_cards(params):
@@ -274,28 +317,10 @@ def format_rune_results(data): return f"为您抽取的卢恩符文是：{', '.j
 def format_select_from_list_results(data): return f"从列表中随机选择的结果是：**{', '.join(map(str, data.get('selection', [])))}**"
 def format_get_random_date_time_results(data): return f"在指定范围内生成的随机时间是：**{data.get('datetime_str')}**"
 
-# --- 状态管理 ---
-def cleanup_old_decks():
-    now = time.time()
-    expiration_time = 24 * 60 * 60
-    decks_to_delete = [
-        deck_id for deck_id, deck_data in ACTIVE_DECKS.items()
-        if now - deck_data.get('last_accessed', 0) > expiration_time
-    ]
-    for deck_id in decks_to_delete:
-        if deck_id in ACTIVE_DECKS:
-            del ACTIVE_DECKS[deck_id]
-
 # --- 主函数 ---
 def main():
     command = None
     try:
-        if os.path.exists(ACTIVE_DECKS_FILE):
-            with open(ACTIVE_DECKS_FILE, 'r', encoding='utf-8') as f:
-                content = f.read()
-                if content: ACTIVE_DECKS.update(json.loads(content))
-        cleanup_old_decks()
-
         input_json = sys.stdin.read()
         args = keys_to_snake_case(json.loads(input_json)) if input_json else {}
         
@@ -338,13 +363,6 @@ def main():
         error_cmd_str = f" '{command}'" if command else ""
         error_message = f"执行命令{error_cmd_str}时发生错误: {str(e)}"
         response = {"status": "error", "error": error_message}
-        
-    finally:
-        try:
-            with open(ACTIVE_DECKS_FILE, 'w', encoding='utf-8') as f:
-                json.dump(ACTIVE_DECKS, f, ensure_ascii=False, indent=4)
-        except Exception:
-            pass
 
     final_output = json.dumps(keys_to_camel_case(response), ensure_ascii=False)
     sys.stdout.write(final_output)
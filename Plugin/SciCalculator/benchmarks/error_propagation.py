@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+SciCalculator 误差传递基准
+
+对几组公式比较：
+- sympy: 逐个变量 diff + subs + evalf（公式无法编译时的回退路径，也是原来的实现）
+- jacobian: 由缓存的公式源码一次求出函数值和整个雅可比矩阵（不含首次生成公式的耗时）
+- mc: 向量化蒙特卡洛传递，每次在整个样本数组上求值
+
+用法:
+    python benchmarks/error_propagation.py
+    python benchmarks/error_propagation.py --repeat 5 --samples 1000000 --json errprop.json
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+PLUGIN_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PLUGIN_DIR))
+
+from sympy import Symbol, sympify, diff
+
+import calculator
+from calculator import get_base_sympy_locals, propagate_error, monte_carlo_error
+
+# 公式只缓存在内存中，不读写磁盘上的表达式缓存
+calculator.expression_cache.path = os.devnull
+
+CASES = [
+    ('a*sin(b)/c', {'a': (2, 0.1), 'b': (0.5, 0.01), 'c': (3, 0.2)}),
+    ('sqrt(x**2 + y**2)', {'x': (3, 0.1), 'y': (4, 0.2)}),
+    ('m*g*h*exp(-k*t)/(1 + v**2)', {'m': (2, 0.01), 'g': (9.81, 0.01), 'h': (1.5, 0.02),
+                                    'k': (0.3, 0.01), 't': (2, 0.05), 'v': (1.2, 0.03)}),
+    ('log(p/q)*atan(r) + p**q', {'p': (5, 0.1), 'q': (2, 0.05), 'r': (0.7, 0.02)}),
+]
+
+
+def sympy_propagation(expr_str, vars_errors):
+    symbols_map = {name: Symbol(name) for name in vars_errors}
+    expr = sympify(expr_str, locals={**get_base_sympy_locals(), **symbols_map})
+    subs_values = {symbols_map[name]: value for name, (value, _) in vars_errors.items()}
+    value = float(expr.subs(subs_values).evalf())
+    variance = 0.0
+    for name, (_, error) in vars_errors.items():
+        variance += (float(diff(expr, symbols_map[name]).subs(subs_values).evalf()) * error) ** 2
+    return value, variance ** 0.5
+
+
+def best_ms(func, repeat):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return result, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SciCalculator 误差传递基准")
+    parser.add_argument("--repeat", type=int, default=3, help="每种方式重复次数（取最快一次）")
+    parser.add_argument("--samples", type=int, default=100_000, help="蒙特卡洛样本数")
+    parser.add_argument("--json", metavar="FILE", help="将结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    results = []
+    header = f"{'公式':<30}{'变量':>6}{'sympy(ms)':>11}{'雅可比(ms)':>12}{'加速':>8}{'MC(ms)':>10}{'线性误差':>12}{'MC 标准差':>12}"
+    print(header)
+    print("-" * len(header))
+    for expr_str, vars_errors in CASES:
+        (value, sympy_error), sympy_ms = best_ms(lambda: sympy_propagation(expr_str, vars_errors), args.repeat)
+        propagate_error(expr_str, vars_errors) # 生成并缓存公式
+        (_, linear), jacobian_ms = best_ms(lambda: propagate_error(expr_str, vars_errors), args.repeat)
+        mc, mc_ms = best_ms(lambda: monte_carlo_error(expr_str, vars_errors, samples=args.samples), args.repeat)
+        mc_std = float(mc.split('Std = ')[1].split(',')[0])
+        results.append({
+            'expression': expr_str, 'variables': len(vars_errors), 'value': value,
+            'sympy_ms': round(sympy_ms, 3), 'jacobian_ms': round(jacobian_ms, 4), 'mc_ms': round(mc_ms, 2),
+            'speedup': round(sympy_ms / jacobian_ms) if jacobian_ms else None,
+            'linear_error': linear, 'sympy_error': sympy_error, 'mc_std': mc_std, 'samples': args.samples
+        })
+        print(f"{expr_str:<30}{len(vars_errors):>6}{sympy_ms:>11.2f}{jacobian_ms:>12.4f}"
+              f"{sympy_ms / jacobian_ms:>7.0f}x{mc_ms:>10.1f}{linear:>12.4g}{mc_std:>12.4g}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'repeat': args.repeat, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 结果已保存到: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+SciCalculator 数值积分回退路径基准
+
+对一组 SymPy 无法给出闭式结果的定积分，分别用逐点 subs 求值（旧实现）和
+lambdify 编译后的 NumPy 函数作为 quad 的被积函数，比较耗时和结果差异。
+只测量数值积分本身，不包含符号积分的尝试时间。
+
+用法:
+    python benchmarks/integral_fallback.py
+    python benchmarks/integral_fallback.py --repeat 5 --json integral.json
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+PLUGIN_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PLUGIN_DIR))
+
+from sympy import Symbol, sympify
+from scipy.integrate import quad
+
+from calculator import get_base_sympy_locals, make_subs_integrand, make_quad_integrand
+
+# (被积函数, 下限, 上限)
+CASES = [
+    ('x*tan(x)/(x**2 + cos(x))', 0, 1),
+    ('sin(x)/log(x + 2)', 0, 5),
+    ('exp(-x**2)*cos(x**3)', 0, float('inf')),
+    ('x**x', 0, 1),
+    ('sqrt(1 + x**5)', 0, 2),
+    ('1/(1 + x**3 + sin(x))', 0, 10),
+    ('log(1 + x)*exp(-x)/(1 + x**2)', 0, float('inf')),
+    ('gamma(1 + x)*sin(x)', 0, 3),
+]
+
+
+def time_quad(integrand, lower, upper, repeat):
+    best = float('inf')
+    value = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        value, _ = quad(integrand, lower, upper, limit=150, epsabs=1.49e-07, epsrel=1.49e-07)
+        best = min(best, time.perf_counter() - started)
+    return value, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SciCalculator 数值积分回退路径基准")
+    parser.add_argument("--repeat", type=int, default=3, help="每种方式重复次数（取最快一次）")
+    parser.add_argument("--json", metavar="FILE", help="将结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    x = Symbol('x')
+    locals_map = {**get_base_sympy_locals(), 'x': x}
+    results = []
+
+    header = f"{'被积函数':<34}{'subs(ms)':>10}{'编译(ms)':>10}{'加速':>8}{'方式':>10}{'差异':>10}"
+    print(header)
+    print("-" * len(header))
+    for expr_str, lower, upper in CASES:
+        expr = sympify(expr_str, locals=locals_map)
+        subs_value, subs_ms = time_quad(make_subs_integrand(expr, x), lower, upper, args.repeat)
+        integrand, method = make_quad_integrand(expr, x)
+        fast_value, fast_ms = time_quad(integrand, lower, upper, args.repeat)
+        diff = abs(fast_value - subs_value)
+        results.append({
+            'expression': expr_str, 'lower': lower, 'upper': upper,
+            'subs_ms': round(subs_ms, 2), 'compiled_ms': round(fast_ms, 2),
+            'speedup': round(subs_ms / fast_ms, 1) if fast_ms else None,
+            'method': method, 'value': fast_value, 'abs_diff': diff
+        })
+        print(f"{expr_str:<34}{subs_ms:>10.1f}{fast_ms:>10.2f}{subs_ms / fast_ms:>7.0f}x{method:>10}{diff:>10.1e}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'repeat': args.repeat, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 结果已保存到: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+SciCalculator 启动耗时基准
+
+VCP 每次调用都会启动一个新的 calculator.py 进程，因此启动耗时直接计入每次计算。
+本基准在独立的解释器中分别测量：
+- import: 导入 calculator 模块的耗时
+- fast: 导入后计算纯算术 / math 函数表达式的耗时，并检查期间没有加载 SymPy、SciPy、NumPy
+- process: 通过标准输入完整运行一次 calculator.py 的墙钟时间（包含解释器启动）
+
+快速路径的导入耗时超过 --max-import-ms，或加载了重量级模块时以非零状态退出。
+
+用法:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 10 --max-import-ms 80 --json startup.json
+"""
+
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from pathlib import Path
+
+PLUGIN_DIR = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ('sympy', 'scipy', 'numpy')
+
+FAST_EXPRESSIONS = ['2+2', 'sin(pi/4)**2 + log(8, 2)', 'sqrt(2)*floor(7.5)', 'mean([1, 2, 3, 4])']
+SLOW_EXPRESSIONS = ["integral('x**2', 0, 3)", 'norm_cdf(1, 0, 1)']
+
+PROBE = r"""
+import sys, time, json
+started = time.perf_counter()
+import calculator
+imported = time.perf_counter()
+results = [calculator.evaluate(expression) for expression in json.loads(sys.argv[1])]
+finished = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - started) * 1000,
+    'evaluate_ms': (finished - imported) * 1000,
+    'results': results,
+    'heavy_modules': [name for name in json.loads(sys.argv[2]) if name in sys.modules],
+}))
+"""
+
+
+def probe(expressions):
+    output = subprocess.run(
+        [sys.executable, '-c', PROBE, json.dumps(expressions), json.dumps(HEAVY_MODULES)],
+        cwd=PLUGIN_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def process_ms(expression):
+    started = time.perf_counter()
+    subprocess.run(
+        [sys.executable, 'calculator.py'], cwd=PLUGIN_DIR, input=expression + '\n',
+        capture_output=True, text=True
+    )
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SciCalculator 启动耗时基准")
+    parser.add_argument("--runs", type=int, default=5, help="每项测量的次数（取中位数）")
+    parser.add_argument("--max-import-ms", type=float, default=100, help="快速路径导入耗时上限（毫秒）")
+    parser.add_argument("--json", metavar="FILE", help="将结果写入 JSON 文件")
+    args = parser.parse_args()
+
+    fast_probes = [probe(FAST_EXPRESSIONS) for _ in range(args.runs)]
+    slow_probes = [probe(SLOW_EXPRESSIONS) for _ in range(args.runs)]
+    results = {
+        'fast': {
+            'import_ms': round(statistics.median(p['import_ms'] for p in fast_probes), 1),
+            'evaluate_ms': round(statistics.median(p['evaluate_ms'] for p in fast_probes), 1),
+            'process_ms': round(statistics.median(process_ms(FAST_EXPRESSIONS[0]) for _ in range(args.runs)), 1),
+            'heavy_modules': sorted({name for p in fast_probes for name in p['heavy_modules']}),
+        },
+        'slow': {
+            'import_ms': round(statistics.median(p['import_ms'] for p in slow_probes), 1),
+            'evaluate_ms': round(statistics.median(p['evaluate_ms'] for p in slow_probes), 1),
+            'process_ms': round(statistics.median(process_ms(SLOW_EXPRESSIONS[0]) for _ in range(args.runs)), 1),
+            'heavy_modules': sorted({name for p in slow_probes for name in p['heavy_modules']}),
+        },
+    }
+
+    print(f"{'路径':<8}{'导入(ms)':>10}{'计算(ms)':>10}{'进程(ms)':>10}  已加载的重量级模块")
+    for name, r in results.items():
+        print(f"{name:<8}{r['import_ms']:>10}{r['evaluate_ms']:>10}{r['process_ms']:>10}  {', '.join(r['heavy_modules']) or '-'}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'runs': args.runs, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 结果已保存到: {args.json}")
+
+    failures = []
+    if results['fast']['heavy_modules']:
+        failures.append(f"fast path loaded {', '.join(results['fast']['heavy_modules'])}")
+    if results['fast']['import_ms'] > args.max_import_ms:
+        failures.append(f"fast path import took {results['fast']['import_ms']}ms (limit {args.max_import_ms}ms)")
+    if failures:
+        print("\n❌ " + '; '.join(failures))
+        sys.exit(1)
+    print(f"\n✅ 快速路径导入耗时 {results['fast']['import_ms']}ms，未加载 {', '.join(HEAVY_MODULES)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,20 @@
 import ast
 import operator
 import math
+import os
+import re
 import statistics
 import sys # 用于 stdin, stdout, stderr
-from typing import Union, Dict, Tuple, Any, List
-
-import sympy # 导入 sympy 模块本身
-# SymPy imports
-from sympy import (
-    sympify, Symbol, integrate, diff, sin, cos, tan, pi as sympy_pi,
-    atan, asin, acos, sqrt, exp as sympy_exp, log as sympy_log, E as sympy_E, Abs,
-    sinh, cosh, tanh, asinh, acosh, atanh, oo as sympy_inf,
-    Integral as SympyIntegral, I as sympy_I, zoo as sympy_zoo, nan as sympy_nan_symbol, # I, zoo, nan for checking
-    latex, Add, Mul, Pow, Integer, Float, Rational, Function, Number # Added Number
-)
-from scipy import stats
-from scipy.integrate import quad
-from numpy import inf as numpy_inf, nan as numpy_nan # For numerical integration with quad
+import time
+import warnings
+import functools
+import threading
+from typing import Union, Dict, Tuple, Any, List, Optional
+
+from expression_cache import ExpressionCache, ast_to_json, ast_from_json, normalize_expression
+
+# SymPy、SciPy 和 NumPy 的导入耗时数百毫秒，只在用到符号计算、积分或统计分布的函数内部导入，
+# 使纯算术和 math 函数的调用不必加载它们
 
 # 支持的操作符 (保持不变)
 allowed_operators = {
@@ -35,41 +33,376 @@ math_functions = {
     'log': math.log, 'exp': math.exp, 'abs': math.fabs, 'ceil': math.ceil,
     'floor': math.floor, 'mean': statistics.mean, 'median': statistics.median,
     'mode': statistics.mode, 'variance': statistics.variance, 'stdev': statistics.stdev,
-    'norm_pdf': stats.norm.pdf, 'norm_cdf': stats.norm.cdf,
-    't_test': lambda data, mu: stats.ttest_1samp(data, mu).pvalue,
+    'norm_pdf': lambda x, loc=0, scale=1: _scipy_stats().norm.pdf(x, loc=loc, scale=scale),
+    'norm_cdf': lambda x, loc=0, scale=1: _scipy_stats().norm.cdf(x, loc=loc, scale=scale),
 }
 
+# 整数乘方结果的最大位数（二进制位）
+MAX_INT_POW_BITS = 1_000_000
+
 # 支持的常数 (用于直接数值计算)
 constants = { 'pi': math.pi, 'e': math.e }
 
-# 基础的 SymPy 符号和函数，用于符号计算
-base_sympy_locals = {
-    'sin': sympy.sin, 'cos': sympy.cos, 'tan': sympy.tan,
-    'asin': sympy.asin, 'acos': sympy.acos, 'atan': sympy.atan, 'atan2': sympy.atan2,
-    'arctan': sympy.atan, 'arcsin': sympy.asin, 'arccos': sympy.acos,
-    'sqrt': sympy.sqrt, 'exp': sympy_exp, 'E': sympy_E, 'log': sympy_log, 
-    'abs': Abs, 'Abs': Abs, 
-    'pi': sympy_pi, 'I': sympy_I, 'oo': sympy_inf, 'zoo': sympy_zoo, 'nan': sympy_nan_symbol,
-    'sinh': sympy.sinh, 'cosh': sympy.cosh, 'tanh': sympy.tanh,
-    'asinh': sympy.asinh, 'acosh': sympy.acosh, 'atanh': sympy.atanh,
-    'gamma': sympy.gamma, 'factorial': sympy.factorial,
-    'Min': sympy.Min, 'Max': sympy.Max,
-    'DiracDelta': sympy.DiracDelta, 'Heaviside': sympy.Heaviside,
-    'Symbol': Symbol, 'Integer': Integer, 'Float': Float, 'Rational': Rational, 'Function': Function,
-    'Add': Add, 'Mul': Mul, 'Pow': Pow, 'Number': Number
-}
+_base_sympy_locals = None
+
+
+def _scipy_stats():
+    from scipy import stats
+    return stats
+
+
+def get_base_sympy_locals() -> Dict[str, Any]:
+    """基础的 SymPy 符号和函数，用于符号计算（首次使用时才导入 SymPy）"""
+    global _base_sympy_locals
+    if _base_sympy_locals is None:
+        import sympy
+        _base_sympy_locals = {
+            'sin': sympy.sin, 'cos': sympy.cos, 'tan': sympy.tan,
+            'asin': sympy.asin, 'acos': sympy.acos, 'atan': sympy.atan, 'atan2': sympy.atan2,
+            'arctan': sympy.atan, 'arcsin': sympy.asin, 'arccos': sympy.acos,
+            'sqrt': sympy.sqrt, 'exp': sympy.exp, 'E': sympy.E, 'log': sympy.log, 
+            'abs': sympy.Abs, 'Abs': sympy.Abs, 
+            'pi': sympy.pi, 'I': sympy.I, 'oo': sympy.oo, 'zoo': sympy.zoo, 'nan': sympy.nan,
+            'sinh': sympy.sinh, 'cosh': sympy.cosh, 'tanh': sympy.tanh,
+            'asinh': sympy.asinh, 'acosh': sympy.acosh, 'atanh': sympy.atanh,
+            'gamma': sympy.gamma, 'factorial': sympy.factorial,
+            'Min': sympy.Min, 'Max': sympy.Max,
+            'DiracDelta': sympy.DiracDelta, 'Heaviside': sympy.Heaviside,
+            'Symbol': sympy.Symbol, 'Integer': sympy.Integer, 'Float': sympy.Float, 'Rational': sympy.Rational,
+            'Function': sympy.Function,
+            'Add': sympy.Add, 'Mul': sympy.Mul, 'Pow': sympy.Pow, 'Number': sympy.Number
+        }
+    return _base_sympy_locals
+
+
+def __getattr__(name: str) -> Any:
+    # 兼容直接从模块读取 base_sympy_locals 的代码
+    if name == 'base_sympy_locals':
+        return get_base_sympy_locals()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def preprocess_expression_string(expr_str: str) -> str:
     expr_str = expr_str.replace('^', '**')
     return expr_str
 
+def make_subs_integrand(expr, var_symbol):
+    """逐点 subs + evalf 的被积函数，适用于任何 SymPy 表达式，但每次求值都要遍历整棵表达式树"""
+    import sympy
+    from numpy import inf as numpy_inf, nan as numpy_nan
+
+    def f_for_quad(x_val_np: float) -> float:
+        try:
+            substituted_expr = expr.subs({var_symbol: x_val_np})
+            val_sympy = substituted_expr.evalf(n=15, chop=True)
+
+            if val_sympy is sympy.S.NaN: return numpy_nan
+            if val_sympy is sympy.S.Infinity: return numpy_inf
+            if val_sympy is sympy.S.NegativeInfinity: return -numpy_inf
+            if val_sympy is sympy.S.ComplexInfinity: return numpy_nan # zoo for quad
+
+            if isinstance(val_sympy, sympy.Number):
+                if val_sympy.is_infinite:
+                    if hasattr(val_sympy, 'is_extended_positive') and val_sympy.is_extended_positive: return numpy_inf
+                    if hasattr(val_sympy, 'is_extended_negative') and val_sympy.is_extended_negative: return -numpy_inf
+                    return numpy_nan 
+
+                if not val_sympy.is_extended_real: # Checks if it's complex
+                    if hasattr(val_sympy, 'as_real_imag'):
+                        _real, _imag = val_sympy.as_real_imag()
+                        # Check imag part with tolerance
+                        if abs(float(_imag.evalf(chop=True))) < 1e-9:
+                            val_to_check = float(_real.evalf(chop=True))
+                            # Check real part for NaN/Inf
+                            if math.isnan(val_to_check): return numpy_nan
+                            if math.isinf(val_to_check): return numpy_inf if val_to_check > 0 else -numpy_inf
+                            return val_to_check
+                        else: # Genuinely complex
+                            return numpy_nan
+                    else: # Should have as_real_imag if complex Number
+                        return numpy_nan
+
+                # Is extended_real and finite (infinites handled above)
+                # Convert to Python float; this handles sympy.Float('nan') correctly.
+                py_float_val = float(val_sympy)
+                if math.isnan(py_float_val): return numpy_nan
+                # Should not be infinite here if sympy's is_infinite was False, but for safety:
+                if math.isinf(py_float_val): return numpy_inf if py_float_val > 0 else -numpy_inf
+                return py_float_val
+
+            # Not a recognized symbolic constant and not a SymPy Number after evalf.
+            # This implies it's still symbolic or an unhandled type.
+            return numpy_nan
+
+        except Exception: 
+            return numpy_nan 
+    return f_for_quad
+
+
+@functools.lru_cache(maxsize=128)
+def make_quad_integrand(expr, var_symbol):
+    """为 quad 构造被积函数
+
+    优先用 lambdify 把表达式一次性编译为 NumPy 函数；表达式含有其它自由符号、
+    无法编译，或编译后的函数在求值时遇到无法翻译的函数时，回退到逐点 subs 求值。
+
+    Returns:
+        (被积函数, 无参函数)；后者返回实际使用的求值方式 'lambdify' 或 'subs'，
+        在 quad 结束后调用才能反映求值中途的回退。同一进程内相同的表达式复用编译结果
+    """
+    import numpy
+    from numpy import nan as numpy_nan
+    from sympy import lambdify
+
+    subs_integrand = make_subs_integrand(expr, var_symbol)
+    if expr.free_symbols - {var_symbol}:
+        return subs_integrand, lambda: 'subs'
+    try:
+        compiled = lambdify(var_symbol, expr, modules=['scipy', 'numpy'])
+    except Exception:
+        return subs_integrand, lambda: 'subs'
+
+    state = {'compiled': True}
+
+    def f_for_quad(x_val_np: float) -> float:
+        if state['compiled']:
+            try:
+                with numpy.errstate(all='ignore'):
+                    val = complex(compiled(x_val_np))
+            except (NameError, TypeError, AttributeError):
+                # 编译结果引用了 NumPy/SciPy 中不存在的函数，此后都使用 subs 求值
+                state['compiled'] = False
+            except (ValueError, ZeroDivisionError, OverflowError):
+                return numpy_nan
+            else:
+                if abs(val.imag) >= 1e-9:
+                    return numpy_nan
+                return val.real
+        return subs_integrand(x_val_np)
+
+    return f_for_quad, lambda: 'lambdify' if state['compiled'] else 'subs'
+
+
+# 符号积分的时间预算（秒），超时后终止符号积分进程，只使用数值结果
+SYMBOLIC_TIMEOUT = float(os.getenv('SCICALC_SYMBOLIC_TIMEOUT', '8'))
+
+# 单个表达式的默认计算时限（秒），应小于插件超时
+EXPRESSION_TIMEOUT = float(os.getenv('SCICALC_EXPRESSION_TIMEOUT', '12'))
+
+# 整批的总时限（秒），应小于插件超时，保证超时前输出已完成各项的结果
+BATCH_TIMEOUT = float(os.getenv('SCICALC_BATCH_TIMEOUT', '13'))
+
+# 表达式缓存：解析后的 AST 和误差传递公式的偏导数，跨进程复用；条目数为 0 时关闭
+EXPRESSION_CACHE_PATH = os.getenv('SCICALC_CACHE_PATH') or \
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'expressions.json')
+EXPRESSION_CACHE_ENTRIES = int(os.getenv('SCICALC_CACHE_ENTRIES', '512'))
+expression_cache = ExpressionCache(EXPRESSION_CACHE_PATH, EXPRESSION_CACHE_ENTRIES)
+
+# 每个计算线程各自的状态：notes 为本次 evaluate 中各积分、方程等实际使用的方法
+# （(函数名, 方法) 对，附加在结果后面），
+# deadline 为当前表达式的截止时间（批量模式下限制符号积分的时间预算）
+_evaluation_state = threading.local()
+
+
+def evaluation_notes() -> List[Tuple[str, str]]:
+    notes = getattr(_evaluation_state, 'notes', None)
+    if notes is None:
+        notes = _evaluation_state.notes = []
+    return notes
+
+
+def symbolic_budget() -> float:
+    """符号计算的时间预算：SCICALC_SYMBOLIC_TIMEOUT 与当前表达式剩余时间中的较小者"""
+    deadline = getattr(_evaluation_state, 'deadline', None)
+    if deadline is None:
+        return SYMBOLIC_TIMEOUT
+    # 留出终止子进程和整理结果的时间，使表达式在时限内返回数值结果而不是超时错误
+    return max(0.0, min(SYMBOLIC_TIMEOUT, deadline - time.monotonic() - 0.25))
+
+
+def _symbolic_worker(conn, target, args):
+    """在子进程中执行符号计算，结果通过管道返回"""
+    try:
+        conn.send(('ok', target(*args)))
+    except Exception as e:
+        conn.send(('error', f"{type(e).__name__} - {str(e)}"))
+    finally:
+        conn.close()
+
+
+def _integrate(expr, integration_args):
+    from sympy import integrate
+    return integrate(expr, integration_args)
+
+
+_symbolic_context = None
+
+
+def symbolic_context():
+    """符号计算子进程的 multiprocessing 上下文
+
+    SymbolicTask 在 evaluate_with_timeout 的工作线程中创建，批量模式下可能还有超时的计算线程在运行；
+    在多线程进程中 fork 会让子进程继承其它线程持有的锁而死锁，因此不使用 fork。
+    POSIX 上使用 forkserver：服务进程只启动一次并预先导入 SymPy，之后每个任务从单线程的服务进程 fork；
+    其它平台使用 spawn。
+    """
+    global _symbolic_context
+    if _symbolic_context is None:
+        import multiprocessing
+        if 'forkserver' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('forkserver')
+            context.set_forkserver_preload(['__main__', 'sympy'])
+        else:
+            context = multiprocessing.get_context('spawn')
+        _symbolic_context = context
+    return _symbolic_context
+
+
+class SymbolicTask:
+    """在独立进程中运行的符号计算，超过时间预算后可以直接终止"""
+
+    def __init__(self, target, args: tuple, budget: float):
+        context = symbolic_context()
+        self.deadline = time.monotonic() + budget
+        self.budget = budget
+        self._conn, child_conn = context.Pipe(duplex=False)
+        self._process = context.Process(
+            target=_symbolic_worker, args=(child_conn, target, args), daemon=True
+        )
+        self._process.start()
+        child_conn.close()
+
+    def wait(self) -> Tuple[str, Any]:
+        """等待到截止时间
+
+        Returns:
+            ('ok', 结果)、('error', 错误信息) 或 ('timeout', None)
+        """
+        try:
+            if self._conn.poll(max(0.0, self.deadline - time.monotonic())):
+                return self._conn.recv()
+            return 'timeout', None
+        except (EOFError, OSError):
+            return 'error', 'Symbolic computation process exited unexpectedly'
+        finally:
+            self.cancel()
+
+    def outcome(self) -> Tuple[str, Any, str]:
+        """等待结果
+
+        Returns:
+            (状态, 结果, 失败原因)：状态为 'ok'、'error' 或 'timeout'
+        """
+        status, result = self.wait()
+        if status == 'timeout':
+            return status, None, f"did not finish within {self.budget:.3g}s"
+        if status == 'error':
+            return status, None, f"failed ({result})"
+        return status, result, ''
+
+    def cancel(self):
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process.join(1)
+        self._conn.close()
+
+
+class SymbolicIntegration(SymbolicTask):
+    """在独立进程中运行的符号积分"""
+
+    def __init__(self, expr, integration_args, budget: float):
+        super().__init__(_integrate, (expr, integration_args), budget)
+
+
+def compute_numeric_integral(expr, var_symbol, sympy_lower, sympy_upper) -> Tuple[Any, str]:
+    """用 quad 计算定积分
+
+    Returns:
+        (数值结果, 说明)：结果可信时数值结果为 float；失败或误差过大时为 None，说明给出原因
+    """
+    from sympy import latex, oo as sympy_inf, zoo as sympy_zoo, nan as sympy_nan_symbol
+    from scipy.integrate import quad, IntegrationWarning
+    from numpy import inf as numpy_inf, nan as numpy_nan
+
+    q_lower_sympy_evalf = sympy_lower.evalf()
+    q_upper_sympy_evalf = sympy_upper.evalf()
+
+    # (Limit checking logic for q_lower, q_upper remains mostly same,
+    #  but ensure float conversion handles potential NaN/Inf from evalf robustly)
+    if q_lower_sympy_evalf.has(sympy_nan_symbol, sympy_zoo) or \
+       q_upper_sympy_evalf.has(sympy_nan_symbol, sympy_zoo) or \
+       (hasattr(q_lower_sympy_evalf, 'is_finite') and q_lower_sympy_evalf.is_finite is False and not q_lower_sympy_evalf.is_infinite) or \
+       (hasattr(q_upper_sympy_evalf, 'is_finite') and q_upper_sympy_evalf.is_finite is False and not q_upper_sympy_evalf.is_infinite) : # e.g. if limit expression evaluates to NaN or other non-finite non-infinite
+        return None, f"Numerical integration failed: Could not evaluate limits to finite numbers for numerical integration (Lower: {latex(sympy_lower)}, Upper: {latex(sympy_upper)})."
+
+    try:
+        q_lower = float(q_lower_sympy_evalf) if q_lower_sympy_evalf.is_finite else (numpy_inf if (q_lower_sympy_evalf == sympy_inf or (hasattr(q_lower_sympy_evalf,'is_extended_positive') and q_lower_sympy_evalf.is_extended_positive)) else (-numpy_inf if (q_lower_sympy_evalf == -sympy_inf or (hasattr(q_lower_sympy_evalf,'is_extended_negative') and q_lower_sympy_evalf.is_extended_negative)) else numpy_nan))
+        q_upper = float(q_upper_sympy_evalf) if q_upper_sympy_evalf.is_finite else (numpy_inf if (q_upper_sympy_evalf == sympy_inf or (hasattr(q_upper_sympy_evalf,'is_extended_positive') and q_upper_sympy_evalf.is_extended_positive)) else (-numpy_inf if (q_upper_sympy_evalf == -sympy_inf or (hasattr(q_upper_sympy_evalf,'is_extended_negative') and q_upper_sympy_evalf.is_extended_negative)) else numpy_nan))
+    except TypeError:
+        # 上下限中含有积分变量以外的符号
+        return None, f"Numerical integration failed: Limits are not numeric (Lower: {latex(sympy_lower)}, Upper: {latex(sympy_upper)})."
+
+    if q_lower is numpy_nan or q_upper is numpy_nan:
+        return None, f"Numerical integration failed: Limits evaluated to NaN (Lower: {latex(sympy_lower)}, Upper: {latex(sympy_upper)})."
+
+    if q_lower >= q_upper and not (math.isinf(q_lower) and math.isinf(q_upper) and q_lower == q_upper) :
+        return None, f"Numerical integration error: lower limit {q_lower} must be less than upper limit {q_upper}."
+
+    integrand, integrand_method = make_quad_integrand(expr, var_symbol)
+
+    def f_for_quad(x_val_np: float) -> float:
+        # 任一采样点为 NaN 时积分结果必然是 NaN；提前终止，也避免 QUADPACK 在 NaN 附近细分时崩溃
+        val = integrand(x_val_np)
+        if math.isnan(val):
+            raise FloatingPointError("integrand is NaN")
+        return val
+
+    try:
+        with warnings.catch_warnings(record=True) as caught_warnings:
+            warnings.simplefilter('always')
+            numeric_val, num_error = quad(f_for_quad, q_lower, q_upper, limit=150, epsabs=1.49e-07, epsrel=1.49e-07)
+        if math.isnan(numeric_val):
+            return None, "Numerical integration resulted in NaN."
+        if abs(num_error) > 0.01 * abs(numeric_val) and abs(num_error) > 1e-4:
+            return None, f"Numerical result: {numeric_val:.7g} (Warning: Potentially large error: {num_error:.2g})"
+        integration_warnings = [w for w in caught_warnings if issubclass(w.category, IntegrationWarning)]
+        if integration_warnings:
+            # quad 判断积分可能发散或未达到精度时，结果不可信，交给符号积分；
+            # 被积函数求值中的其它警告（NumPy、lambdify 等）不影响 quad 的收敛判断
+            warning_text = ' '.join(str(integration_warnings[0].message).split())
+            return None, f"Numerical result: {numeric_val:.7g} (Warning: {warning_text})"
+        return float(numeric_val), f"numeric (quad, {integrand_method()})"
+    except FloatingPointError:
+        return None, "Numerical integration resulted in NaN."
+    except Exception as quad_e:
+        return None, f"Numerical integration failed: {type(quad_e).__name__} - {str(quad_e)}"
+
+
+@functools.lru_cache(maxsize=128)
+def sympify_integrand(expr_str: str, var_name: str):
+    """解析积分表达式（同一进程内的重复表达式直接复用）"""
+    from sympy import Symbol, sympify
+    var_symbol = Symbol(var_name)
+    sympy_locals = get_base_sympy_locals().copy()
+    sympy_locals[var_name] = var_symbol
+    return sympify(expr_str, locals=sympy_locals), var_symbol
+
+
 def compute_integral(original_expr_str: str, var_name_str: str,
                      lower_limit_in: Any, upper_limit_in: Any) -> Any:
+    """计算积分
+
+    符号积分在独立进程中运行，时间预算为 SCICALC_SYMBOLIC_TIMEOUT 秒；定积分同时在本进程中
+    用 quad 计算数值结果，先得到可信结果的一方胜出，使用的方法记录在 evaluation_notes() 中。
+    """
+    from sympy import (
+        sympify, latex, Integer, Float, Rational, Integral as SympyIntegral,
+        oo as sympy_inf, zoo as sympy_zoo, nan as sympy_nan_symbol
+    )
+
     try:
-        var_symbol = Symbol(var_name_str)
-        sympy_integration_locals = base_sympy_locals.copy()
+        expr, var_symbol = sympify_integrand(original_expr_str, var_name_str)
+        sympy_integration_locals = get_base_sympy_locals().copy()
         sympy_integration_locals[var_name_str] = var_symbol
-        expr = sympify(original_expr_str, locals=sympy_integration_locals)
 
         def standardize_limit(lim_val: Any, locals_for_eval: Dict[str, Any]) -> Any:
             # (No changes to standardize_limit from previous version)
@@ -92,116 +425,54 @@ def compute_integral(original_expr_str: str, var_name_str: str,
                     raise ValueError(f"Invalid limit type '{type(lim_val).__name__}' for value '{lim_val}': {e_sympify_lim_other}")
         
         if lower_limit_in is None and upper_limit_in is None:
-            result_sympy = integrate(expr, var_symbol)
+            budget = symbolic_budget()
+            status, result_sympy = SymbolicIntegration(expr, var_symbol, budget).wait()
+            if status == 'timeout':
+                return f"Error: Symbolic integration of '{original_expr_str}' did not finish within {budget:.3g}s (indefinite integrals have no numeric fallback)."
+            if status == 'error':
+                return f"Error in integral computation for '{original_expr_str}': {result_sympy}"
+            evaluation_notes().append(('integral', 'symbolic'))
             return f"$$ {latex(result_sympy)} + C $$"
         else:
             sympy_lower = standardize_limit(lower_limit_in, sympy_integration_locals)
             sympy_upper = standardize_limit(upper_limit_in, sympy_integration_locals)
-            result_sympy = integrate(expr, (var_symbol, sympy_lower, sympy_upper))
+
+            # 符号积分在子进程中进行，同时在本进程中计算数值结果
+            budget = symbolic_budget()
+            symbolic = SymbolicIntegration(expr, (var_symbol, sympy_lower, sympy_upper), budget)
+            numeric_val, numeric_message = compute_numeric_integral(expr, var_symbol, sympy_lower, sympy_upper)
+            if numeric_val is not None:
+                symbolic.cancel()
+                evaluation_notes().append(('integral', numeric_message))
+                return numeric_val
+
+            status, result_sympy = symbolic.wait()
+            if status == 'timeout':
+                return f"Symbolic integration did not finish within {budget:.3g}s. {numeric_message}"
+            if status == 'error':
+                return f"Symbolic integration failed ({result_sympy}). {numeric_message}"
+
             evaluated_sympy_result = result_sympy.evalf(chop=True)
             is_unevaluated_integral = isinstance(result_sympy, SympyIntegral)
             is_eval_problematic = evaluated_sympy_result.has(sympy_inf, -sympy_inf, sympy_zoo, sympy_nan_symbol) or \
                                   (evaluated_sympy_result.is_real is False and evaluated_sympy_result.is_complex is False)
 
-            if is_unevaluated_integral or is_eval_problematic:
-                numerical_attempt_message_prefix = ""
-                if is_unevaluated_integral:
-                    numerical_attempt_message_prefix = f"Symbolic integration unevaluated ($${latex(result_sympy)}$$). "
-                else:
-                    numerical_attempt_message_prefix = f"Symbolic result ($${latex(result_sympy)}$$) evaluated to ($${latex(evaluated_sympy_result)}$$). "
-
-                # MODIFIED f_for_quad STARTS HERE
-                def f_for_quad(x_val_np: float) -> float:
-                    try:
-                        substituted_expr = expr.subs({var_symbol: x_val_np})
-                        val_sympy = substituted_expr.evalf(subs_options={'chop': True}, n=15)
-
-                        if val_sympy is sympy.S.NaN: return numpy_nan
-                        if val_sympy is sympy.S.Infinity: return numpy_inf
-                        if val_sympy is sympy.S.NegativeInfinity: return -numpy_inf
-                        if val_sympy is sympy.S.ComplexInfinity: return numpy_nan # zoo for quad
-
-                        if isinstance(val_sympy, sympy.Number):
-                            if val_sympy.is_infinite:
-                                if hasattr(val_sympy, 'is_extended_positive') and val_sympy.is_extended_positive: return numpy_inf
-                                if hasattr(val_sympy, 'is_extended_negative') and val_sympy.is_extended_negative: return -numpy_inf
-                                return numpy_nan 
-
-                            if not val_sympy.is_extended_real: # Checks if it's complex
-                                if hasattr(val_sympy, 'as_real_imag'):
-                                    _real, _imag = val_sympy.as_real_imag()
-                                    # Check imag part with tolerance
-                                    if abs(float(_imag.evalf(chop=True))) < 1e-9:
-                                        val_to_check = float(_real.evalf(chop=True))
-                                        # Check real part for NaN/Inf
-                                        if math.isnan(val_to_check): return numpy_nan
-                                        if math.isinf(val_to_check): return numpy_inf if val_to_check > 0 else -numpy_inf
-                                        return val_to_check
-                                    else: # Genuinely complex
-                                        return numpy_nan
-                                else: # Should have as_real_imag if complex Number
-                                    return numpy_nan
-                            
-                            # Is extended_real and finite (infinites handled above)
-                            # Convert to Python float; this handles sympy.Float('nan') correctly.
-                            py_float_val = float(val_sympy)
-                            if math.isnan(py_float_val): return numpy_nan
-                            # Should not be infinite here if sympy's is_infinite was False, but for safety:
-                            if math.isinf(py_float_val): return numpy_inf if py_float_val > 0 else -numpy_inf
-                            return py_float_val
-
-                        # Not a recognized symbolic constant and not a SymPy Number after evalf.
-                        # This implies it's still symbolic or an unhandled type.
-                        return numpy_nan
-
-                    except Exception: 
-                        return numpy_nan 
-                # MODIFIED f_for_quad ENDS HERE
-                
-                q_lower_sympy_evalf = sympy_lower.evalf()
-                q_upper_sympy_evalf = sympy_upper.evalf()
-
-                # (Limit checking logic for q_lower, q_upper remains mostly same,
-                #  but ensure float conversion handles potential NaN/Inf from evalf robustly)
-                if q_lower_sympy_evalf.has(sympy_nan_symbol, sympy_zoo) or \
-                   q_upper_sympy_evalf.has(sympy_nan_symbol, sympy_zoo) or \
-                   (hasattr(q_lower_sympy_evalf, 'is_finite') and q_lower_sympy_evalf.is_finite is False and not q_lower_sympy_evalf.is_infinite) or \
-                   (hasattr(q_upper_sympy_evalf, 'is_finite') and q_upper_sympy_evalf.is_finite is False and not q_upper_sympy_evalf.is_infinite) : # e.g. if limit expression evaluates to NaN or other non-finite non-infinite
-                    return f"{numerical_attempt_message_prefix}Numerical integration failed: Could not evaluate limits to finite numbers for numerical integration (Lower: {latex(sympy_lower)}, Upper: {latex(sympy_upper)})."
-
-                q_lower = float(q_lower_sympy_evalf) if q_lower_sympy_evalf.is_finite else (numpy_inf if (q_lower_sympy_evalf == sympy_inf or (hasattr(q_lower_sympy_evalf,'is_extended_positive') and q_lower_sympy_evalf.is_extended_positive)) else (-numpy_inf if (q_lower_sympy_evalf == -sympy_inf or (hasattr(q_lower_sympy_evalf,'is_extended_negative') and q_lower_sympy_evalf.is_extended_negative)) else numpy_nan))
-                q_upper = float(q_upper_sympy_evalf) if q_upper_sympy_evalf.is_finite else (numpy_inf if (q_upper_sympy_evalf == sympy_inf or (hasattr(q_upper_sympy_evalf,'is_extended_positive') and q_upper_sympy_evalf.is_extended_positive)) else (-numpy_inf if (q_upper_sympy_evalf == -sympy_inf or (hasattr(q_upper_sympy_evalf,'is_extended_negative') and q_upper_sympy_evalf.is_extended_negative)) else numpy_nan))
-
-                if q_lower is numpy_nan or q_upper is numpy_nan:
-                     return f"{numerical_attempt_message_prefix}Numerical integration failed: Limits evaluated to NaN (Lower: {latex(sympy_lower)}, Upper: {latex(sympy_upper)})."
+            if is_unevaluated_integral:
+                return f"Symbolic integration unevaluated ($${latex(result_sympy)}$$). {numeric_message}"
+            if is_eval_problematic:
+                return f"Symbolic result ($${latex(result_sympy)}$$) evaluated to ($${latex(evaluated_sympy_result)}$$). {numeric_message}"
 
-
-                if q_lower >= q_upper and not (math.isinf(q_lower) and math.isinf(q_upper) and q_lower == q_upper) :
-                     return f"{numerical_attempt_message_prefix}Numerical integration error: lower limit {q_lower} must be less than upper limit {q_upper}."
-
-                try:
-                    numeric_val, num_error = quad(f_for_quad, q_lower, q_upper, limit=150, epsabs=1.49e-07, epsrel=1.49e-07)
-                    if math.isnan(numeric_val):
-                        return f"{numerical_attempt_message_prefix}Numerical integration resulted in NaN."
-                    if abs(num_error) > 0.01 * abs(numeric_val) and abs(num_error) > 1e-4:
-                        # Return the number, but also include a warning string.
-                        # The calling function will need to handle this tuple.
-                        # For now, let's just return the formatted string to avoid breaking things.
-                        return f"{numerical_attempt_message_prefix}Numerical result: {numeric_val:.7g} (Warning: Potentially large error: {num_error:.2g})"
-                    return float(numeric_val)
-                except Exception as quad_e:
-                    return f"{numerical_attempt_message_prefix}Numerical integration failed: {type(quad_e).__name__} - {str(quad_e)}"
+            evaluation_notes().append(('integral', 'symbolic'))
+            if evaluated_sympy_result.is_extended_real and evaluated_sympy_result.is_finite:
+                return float(evaluated_sympy_result)
+            elif evaluated_sympy_result.is_extended_real: # Non-finite real
+                return f"Symbolic result: $${latex(result_sympy)}$$ evaluated to non-finite $${latex(evaluated_sympy_result)}$$"
+            elif evaluated_sympy_result.is_complex and evaluated_sympy_result.is_finite:
+                return f"$${latex(evaluated_sympy_result)}$$" # Return complex as string
+            elif evaluated_sympy_result.is_complex: # Non-finite complex
+                return f"Symbolic result: $${latex(result_sympy)}$$ evaluated to non-finite complex $${latex(evaluated_sympy_result)}$$"
             else:
-                if evaluated_sympy_result.is_extended_real and evaluated_sympy_result.is_finite:
-                    return float(evaluated_sympy_result)
-                elif evaluated_sympy_result.is_extended_real: # Non-finite real
-                    return f"Symbolic result: $${latex(result_sympy)}$$ evaluated to non-finite $${latex(evaluated_sympy_result)}$$"
-                elif evaluated_sympy_result.is_complex and evaluated_sympy_result.is_finite:
-                    return f"$${latex(evaluated_sympy_result)}$$" # Return complex as string
-                elif evaluated_sympy_result.is_complex: # Non-finite complex
-                    return f"Symbolic result: $${latex(result_sympy)}$$ evaluated to non-finite complex $${latex(evaluated_sympy_result)}$$"
-                else:
-                    return f"Symbolic result: $${latex(result_sympy)}$$ (evaluated to $${latex(evaluated_sympy_result)}$$, but type is unexpected)"
+                return f"Symbolic result: $${latex(result_sympy)}$$ (evaluated to $${latex(evaluated_sympy_result)}$$, but type is unexpected)"
 
     except ValueError as ve:
         return f"Error in integral setup for '{original_expr_str}' with var '{var_name_str}': {str(ve)}"
@@ -213,6 +484,995 @@ def compute_integral(original_expr_str: str, var_name_str: str,
         return f"Error in integral computation for '{original_expr_str}': {type(e).__name__} - {str(e)}\nTraceback:\n{tb_str}"
 
 
+# ---- 方程、常微分方程、极限、级数与矩阵 ----
+# 符号计算与积分一样在子进程中按 symbolic_budget() 限时，超时或无法求解时回退到数值方法；
+# 成功的结果按 SymPy 规范化后的参数持久化到表达式缓存
+
+# 多项式次数超过该值时直接求数值根（五次及以上的符号解通常只能表示为 CRootOf）
+SOLVE_MAX_SYMBOLIC_DEGREE = 4
+# 非多项式方程的数值回退在 [-SOLVE_SCAN_RANGE, SOLVE_SCAN_RANGE] 内按符号变化搜索实根
+SOLVE_SCAN_RANGE = 100.0
+SOLVE_SCAN_POINTS = 4001
+# 不超过该阶数的整数/符号矩阵用 SymPy 精确计算，更大的矩阵和浮点矩阵直接使用 numpy.linalg
+MATRIX_EXACT_MAX_SIZE = 8
+
+# 多个解之间的 LaTeX 分隔
+_LATEX_SEPARATOR = r' \quad '
+
+_EQUATION_SPLIT = re.compile(r'(?<![<>!=])==?(?!=)')
+# y'(x)、y''(x) 形式的导数
+_PRIME_CALL = re.compile(r"\b([A-Za-z_]\w*)('+)\(([^()]*)\)")
+
+
+def get_solver_sympy_locals() -> Dict[str, Any]:
+    """方程和微分方程可用的 SymPy 名称：基础名称加上求导和方程"""
+    import sympy
+    return {**get_base_sympy_locals(), 'diff': sympy.diff, 'Derivative': sympy.Derivative, 'Eq': sympy.Eq}
+
+
+def sympify_equation(equation_str: str, sympy_locals: Dict[str, Any]):
+    """把 'lhs = rhs'（或 'lhs == rhs'、Eq(lhs, rhs)）转换为 lhs - rhs；不含等号时表示 expr = 0"""
+    from sympy import sympify, Eq
+    text = _PRIME_CALL.sub(
+        lambda m: f"Derivative({m.group(1)}({m.group(3)}), {m.group(3)}, {len(m.group(2))})",
+        preprocess_expression_string(equation_str)
+    )
+    parts = _EQUATION_SPLIT.split(text)
+    if len(parts) > 2:
+        raise ValueError(f"Equation '{equation_str}' contains more than one '='.")
+    if len(parts) == 2:
+        return sympify(parts[0], locals=sympy_locals) - sympify(parts[1], locals=sympy_locals)
+    expr = sympify(text, locals=sympy_locals)
+    return expr.lhs - expr.rhs if isinstance(expr, Eq) else expr
+
+
+def sympify_point(value: Any, sympy_locals: Dict[str, Any]):
+    """极限点、展开点等：数字，或 'inf'、'-inf'、'pi/2' 这样的字符串"""
+    from sympy import sympify, oo
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in ('inf', 'oo', '+inf', 'infinity'): return oo
+        if text in ('-inf', '-oo', '-infinity'): return -oo
+        return sympify(preprocess_expression_string(value), locals=sympy_locals)
+    if isinstance(value, float) and math.isinf(value):
+        return oo if value > 0 else -oo
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return sympify(value)
+    raise ValueError(f"Expected a number or a string such as 'inf' or 'pi/2', got {type(value).__name__}.")
+
+
+def _names(value: Any, func_name: str) -> List[str]:
+    names = [value] if isinstance(value, str) else value
+    if not isinstance(names, (list, tuple)) or not names or not all(isinstance(n, str) and n.isidentifier() for n in names):
+        raise ValueError(f"{func_name}() variables must be a name string or a list of name strings, e.g. 'x' or ['x', 'y'].")
+    return list(names)
+
+
+def memoized_symbolic(func_name: str, canonical_args: tuple, compute) -> Any:
+    """
+    以 SymPy 规范化后的参数（srepr）为键，把结果持久化到表达式缓存。
+    compute() 返回 (结果, 方法, 是否可缓存)；方法为 None 表示失败，此时结果为错误信息。
+    """
+    from sympy import srepr
+    cache_key = f"sym:{func_name}:{srepr(canonical_args)}"
+    cached = expression_cache.get(cache_key)
+    if isinstance(cached, list) and len(cached) == 2:
+        evaluation_notes().append((func_name, f"{cached[1]}, cached"))
+        return cached[0]
+
+    result, method, cacheable = compute()
+    if method is not None:
+        evaluation_notes().append((func_name, method))
+        if cacheable:
+            expression_cache.put(cache_key, [result, method])
+    return result
+
+
+def run_symbolic(target, args: tuple) -> Tuple[str, Any, str]:
+    """在时间预算内运行符号计算，返回 SymbolicTask.outcome()"""
+    return SymbolicTask(target, args, symbolic_budget()).outcome()
+
+
+def numeric_fallback(solver, *args) -> Tuple[Any, Optional[str]]:
+    """调用数值回退 solver(*args) -> (结果, 方法)；异常转换为失败说明"""
+    try:
+        return solver(*args)
+    except Exception as e:
+        return f"{type(e).__name__} - {str(e)}", None
+
+
+def _latex_value(value) -> str:
+    """LaTeX 形式，非有理数的数值附带近似值"""
+    from sympy import latex
+    text = latex(value)
+    if value.is_number and value.is_finite and not value.is_Rational:
+        try:
+            approx = complex(value.evalf(15))
+        except (TypeError, ValueError):
+            return text
+        text += rf" \approx {format_result(approx.real if abs(approx.imag) < 1e-12 else approx)}"
+    return text
+
+
+# -- solve --
+
+def _solve(exprs, symbols):
+    from sympy import solve
+    return solve(exprs, symbols, dict=True)
+
+
+def _polynomial_degree(expr, symbol) -> Optional[int]:
+    from sympy import Poly
+    try:
+        return Poly(expr, symbol).degree()
+    except Exception:
+        return None
+
+
+def _unique_roots(roots: List[Any]) -> List[Any]:
+    unique = []
+    for root in sorted(roots, key=lambda r: (r.real, r.imag) if isinstance(r, complex) else (r, 0)):
+        if not unique or abs(root - unique[-1]) > 1e-9 * max(1.0, abs(root)):
+            unique.append(root)
+    return unique
+
+
+def numeric_solve(exprs, symbols) -> Tuple[Any, Optional[str]]:
+    """数值解：单变量多项式用 numpy.roots，单变量方程在扫描区间内用 brentq 求实根，方程组用 scipy.optimize.root"""
+    import numpy
+    from sympy import Poly, lambdify
+
+    if len(exprs) == 1 and len(symbols) == 1:
+        expr, symbol = exprs[0], symbols[0]
+        if expr.free_symbols - {symbol}:
+            return f"Numeric solve needs an equation in '{symbol}' only.", None
+        if _polynomial_degree(expr, symbol) is not None:
+            roots = numpy.roots([complex(c) for c in Poly(expr, symbol).all_coeffs()])
+            roots = [float(r.real) if abs(r.imag) < 1e-12 * max(1.0, abs(r)) else complex(r) for r in roots]
+            return ', '.join(f"{symbol} = {format_result(r)}" for r in _unique_roots(roots)), 'numeric (numpy.roots)'
+
+        from scipy.optimize import brentq
+        f = lambdify(symbol, expr, modules=['scipy', 'numpy'])
+
+        def f_real(t: float) -> float:
+            value = complex(f(t))
+            return value.real if abs(value.imag) < 1e-9 else math.nan
+
+        grid = numpy.linspace(-SOLVE_SCAN_RANGE, SOLVE_SCAN_RANGE, SOLVE_SCAN_POINTS)
+        with numpy.errstate(all='ignore'):
+            values = numpy.broadcast_to(numpy.asarray(f(grid), dtype=complex), grid.shape)
+        values = numpy.where(numpy.abs(values.imag) < 1e-9, values.real, numpy.nan)
+        roots = [float(t) for t, v in zip(grid, values) if v == 0]
+        for i in numpy.nonzero(values[:-1] * values[1:] < 0)[0]:
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore')
+                root = brentq(f_real, grid[i], grid[i + 1], xtol=1e-14)
+                # 跨过极点（如 tan、1/x）的符号变化不是根
+                if abs(f_real(root)) < 1e-6:
+                    roots.append(root)
+        if not roots:
+            return f"No real roots found in [{-SOLVE_SCAN_RANGE:g}, {SOLVE_SCAN_RANGE:g}].", None
+        return (', '.join(f"{symbol} = {format_result(r)}" for r in _unique_roots(roots)),
+                f"numeric (brentq, real roots in [{-SOLVE_SCAN_RANGE:g}, {SOLVE_SCAN_RANGE:g}])")
+
+    if len(exprs) != len(symbols):
+        return "Numeric solve of a system needs as many equations as variables.", None
+    from scipy.optimize import root
+    f = lambdify(symbols, exprs, modules=['scipy', 'numpy'])
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        solution = root(lambda v: numpy.asarray(f(*v), dtype=float), numpy.ones(len(symbols)))
+    if not solution.success:
+        return f"scipy.optimize.root did not converge ({solution.message}).", None
+    return (', '.join(f"{s} = {format_result(float(v))}" for s, v in zip(symbols, solution.x)),
+            'numeric (scipy.optimize.root, one solution from x0 = 1)')
+
+
+def compute_solve(equations: Any, variables: Any = None) -> Any:
+    """solve('x**2 = 4' [, 'x']) 或 solve(['x + y = 3', 'x - y = 1'], ['x', 'y'])"""
+    from sympy import Symbol
+    equation_strs = [equations] if isinstance(equations, str) else equations
+    if not isinstance(equation_strs, (list, tuple)) or not equation_strs or not all(isinstance(e, str) for e in equation_strs):
+        raise ValueError("solve() requires an equation string or a list of equation strings, e.g. solve('x**2 = 4', 'x').")
+    sympy_locals = get_solver_sympy_locals()
+    exprs = [sympify_equation(e, sympy_locals) for e in equation_strs]
+    if variables is None:
+        symbols = sorted(set().union(*(e.free_symbols for e in exprs)), key=str)
+    else:
+        symbols = [Symbol(name) for name in _names(variables, 'solve')]
+    if not symbols:
+        raise ValueError("solve() found no variables to solve for.")
+
+    def compute():
+        if len(exprs) == 1 and len(symbols) == 1:
+            degree = _polynomial_degree(exprs[0], symbols[0])
+            if degree is not None and degree > SOLVE_MAX_SYMBOLIC_DEGREE:
+                result, method = numeric_fallback(numeric_solve, exprs, symbols)
+                return (result if method else f"Error: {result}"), method and f"{method}, degree {degree}", True
+
+        status, solutions, reason = run_symbolic(_solve, (exprs, symbols))
+        if status == 'ok':
+            if not solutions:
+                return "No solution.", 'symbolic', True
+            formatted = [
+                r',\ '.join(f"{s} = {_latex_value(solution[s])}" for s in symbols if s in solution)
+                for solution in solutions
+            ]
+            return f"$$ {_LATEX_SEPARATOR.join(formatted)} $$", 'symbolic', True
+
+        result, method = numeric_fallback(numeric_solve, exprs, symbols)
+        if method is None:
+            return f"Error: Symbolic solve {reason}; numeric solve: {result}", None, False
+        return result, method, status != 'timeout'
+
+    return memoized_symbolic('solve', (tuple(exprs), tuple(symbols)), compute)
+
+
+# -- dsolve --
+
+# 初始条件的键：y(0)、y'(0)、y''(1) ...
+_INITIAL_CONDITION_KEY = re.compile(r"^\s*([A-Za-z_]\w*)('*)\((.+)\)\s*$")
+
+
+def _dsolve(equation, func, ics):
+    from sympy import dsolve
+    return dsolve(equation, func, ics=ics or None)
+
+
+def numeric_dsolve(equation, func, conditions: List[Tuple[int, Any, Any]], x_value) -> Tuple[Any, Optional[str]]:
+    """用 solve_ivp（LSODA，自动在刚性和非刚性方法间切换）求初值问题在 x_value 处的数值解"""
+    from sympy import Dummy, Derivative, solve, lambdify
+    from sympy.solvers.deutils import ode_order
+    var = func.args[0]
+    order = ode_order(equation, func)
+    points = {point for _, point, _ in conditions}
+    if order < 1 or len(points) != 1 or sorted(k for k, _, _ in conditions) != list(range(order)):
+        return f"Numeric fallback needs {func}, and its first {order - 1} derivative(s) at one point.", None
+
+    highest = solve(equation, func.diff(var, order))
+    if len(highest) != 1:
+        return "Numeric fallback could not isolate the highest derivative.", None
+    states = [Dummy(f"y{k}") for k in range(order)]
+    rhs = highest[0]
+    for k in range(order - 1, 0, -1):
+        rhs = rhs.subs(func.diff(var, k), states[k])
+    rhs = rhs.subs(func, states[0])
+    if rhs.has(func) or rhs.atoms(Derivative) or rhs.free_symbols - {var, *states}:
+        return "Numeric fallback needs an ODE in one unknown function without other symbols.", None
+
+    x0 = float(points.pop())
+    y0 = [float(value) for _, _, value in sorted(conditions, key=lambda c: c[0])]
+    x_end = float(x_value)
+    if x_end == x0:
+        return y0[0], 'initial condition'
+    from scipy.integrate import solve_ivp
+    f = lambdify((var, states), rhs, modules=['scipy', 'numpy'])
+    solution = solve_ivp(lambda t, y: [*y[1:], f(t, y)], (x0, x_end), y0, method='LSODA', rtol=1e-12, atol=1e-14)
+    if not solution.success:
+        return f"solve_ivp failed ({solution.message}).", None
+    return float(solution.y[0, -1]), f"numeric (solve_ivp LSODA from {var} = {x0:g})"
+
+
+def compute_dsolve(equation: Any, function: Any = None, initial_conditions: Any = None, x_value: Any = None) -> Any:
+    """dsolve("y''(x) + y(x) = 0" [, 'y'] [, {'y(0)': 0, "y'(0)": 1}] [, x])"""
+    from sympy import Symbol, sympify
+    from sympy.core.function import AppliedUndef
+    if isinstance(function, dict):
+        function, initial_conditions, x_value = None, function, initial_conditions
+    if not isinstance(equation, str):
+        raise ValueError("dsolve() requires an ODE string, e.g. dsolve(\"y'(x) = -2*y(x)\").")
+    if initial_conditions is not None and not isinstance(initial_conditions, dict):
+        raise ValueError("dsolve() initial conditions must be a dict such as {'y(0)': 1, \"y'(0)\": 0}.")
+    if x_value is not None and not isinstance(x_value, (int, float)):
+        raise ValueError("dsolve() evaluation point must be a number.")
+
+    sympy_locals = get_solver_sympy_locals()
+    ode = sympify_equation(equation, sympy_locals)
+    candidates = [f for f in ode.atoms(AppliedUndef) if function is None or f.func.__name__ == function]
+    if len(candidates) != 1 or len(candidates[0].args) != 1 or not isinstance(candidates[0].args[0], Symbol):
+        raise ValueError("dsolve() needs exactly one unknown function of one variable, e.g. y(x); pass its name as the second argument.")
+    func = candidates[0]
+    var = func.args[0]
+
+    conditions = []
+    sympy_ics = {}
+    for key, value in (initial_conditions or {}).items():
+        match = _INITIAL_CONDITION_KEY.match(str(key))
+        if not match or match.group(1) != func.func.__name__ or not isinstance(value, (int, float)):
+            raise ValueError(f"Invalid initial condition {key!r}: {value!r}; expected e.g. {{'{func.func.__name__}(0)': 1}}.")
+        order = len(match.group(2))
+        point = sympify_point(match.group(3), sympy_locals)
+        target = func.diff(var, order) if order else func
+        sympy_ics[target.subs(var, point)] = sympify(value)
+        conditions.append((order, point, value))
+
+    def compute():
+        symbolic = SymbolicTask(_dsolve, (ode, func, sympy_ics), symbolic_budget())
+        numeric_result = None
+        if x_value is not None and conditions:
+            # 与定积分相同：符号求解在子进程中进行的同时在本进程中求数值解，数值解成功时直接采用
+            numeric_result, method = numeric_fallback(numeric_dsolve, ode, func, conditions, x_value)
+            if method is not None:
+                symbolic.cancel()
+                return numeric_result, method, True
+
+        status, solutions, reason = symbolic.outcome()
+        if status == 'ok':
+            solutions = solutions if isinstance(solutions, list) else [solutions]
+            if x_value is None:
+                from sympy import latex
+                return f"$$ {_LATEX_SEPARATOR.join(latex(s) for s in solutions)} $$", 'symbolic', True
+            values = [s.rhs.subs(var, x_value).evalf() for s in solutions]
+            if len(values) == 1 and values[0].is_number:
+                value = values[0]
+                return (float(value) if value.is_real else f"$$ {_latex_value(value)} $$"), 'symbolic', True
+            reason = "left free constants; give initial conditions for all of them"
+
+        if numeric_result is None:
+            return f"Error: Symbolic dsolve {reason} (the numeric fallback needs initial conditions and an evaluation point).", None, False
+        return f"Error: Symbolic dsolve {reason}; numeric fallback: {numeric_result}", None, False
+
+    canonical_ics = tuple(sorted(sympy_ics.items(), key=lambda item: str(item[0])))
+    return memoized_symbolic('dsolve', (ode, func, canonical_ics, sympify(x_value)), compute)
+
+
+# -- limit / series --
+
+def _limit(expr, symbol, point, direction):
+    from sympy import limit
+    return limit(expr, symbol, point, direction)
+
+
+def _series(expr, symbol, point, order):
+    from sympy import series
+    return series(expr, symbol, point, order)
+
+
+def numeric_limit(expr, symbol, point, direction: str) -> Tuple[Any, Optional[str]]:
+    """用 mpmath 高精度求值逼近点附近的数列，估计极限"""
+    import mpmath
+    from sympy import lambdify, oo
+    if expr.free_symbols - {symbol}:
+        return f"Numeric limit needs an expression in '{symbol}' only.", None
+    f = lambdify(symbol, expr, modules='mpmath')
+    estimates = []
+    with mpmath.workdps(50):
+        for side in ([1, -1] if direction == '+-' else [1 if direction == '+' else -1]):
+            if point in (oo, -oo):
+                samples = [mpmath.mpf(10) ** k * (1 if point == oo else -1) for k in range(4, 24, 2)]
+            else:
+                samples = [mpmath.mpf(str(point.evalf(30))) + side * mpmath.mpf(10) ** -k for k in range(4, 24, 2)]
+            try:
+                values = [complex(f(t)) for t in samples]
+            except (ZeroDivisionError, ValueError, TypeError) as e:
+                return f"Numeric limit evaluation failed ({type(e).__name__}).", None
+            last, previous = values[-1], values[-2]
+            if abs(last - previous) > 1e-8 * max(1.0, abs(last)):
+                return "Numeric limit estimate did not converge (the limit may not exist or may be infinite).", None
+            estimates.append(last)
+            if point in (oo, -oo):
+                break
+    if len(estimates) == 2 and abs(estimates[0] - estimates[1]) > 1e-6 * max(1.0, abs(estimates[0])):
+        right, left = (e.real if abs(e.imag) < 1e-12 else e for e in estimates)
+        return f"One-sided limits differ ({format_result(right)} from the right, {format_result(left)} from the left).", None
+    value = estimates[0]
+    return (value.real if abs(value.imag) < 1e-12 else value), 'numeric (mpmath sequence)'
+
+
+def compute_limit(expression: Any, variable: Any = 'x', point: Any = 0, direction: Any = '+-') -> Any:
+    """limit('sin(x)/x', 'x', 0 [, '+' | '-' | '+-'])"""
+    from sympy import Symbol, Limit
+    if not isinstance(expression, str):
+        raise ValueError("limit() requires an expression string, e.g. limit('sin(x)/x', 'x', 0).")
+    if direction not in ('+', '-', '+-'):
+        raise ValueError("limit() direction must be '+', '-' or '+-'.")
+    symbol = Symbol(_names(variable, 'limit')[0])
+    sympy_locals = {**get_base_sympy_locals(), symbol.name: symbol}
+    expr = sympify_equation(expression, sympy_locals)
+    sympy_point = sympify_point(point, sympy_locals)
+
+    def compute():
+        status, result, reason = run_symbolic(_limit, (expr, symbol, sympy_point, direction))
+        if status == 'ok' and not isinstance(result, Limit):
+            if result.is_number and result.is_real and result.is_finite:
+                return float(result), 'symbolic', True
+            return f"$$ {_latex_value(result)} $$", 'symbolic', True
+        reason = reason or "returned an unevaluated limit"
+        value, method = numeric_fallback(numeric_limit, expr, symbol, sympy_point, direction)
+        if method is None:
+            return f"Error: Symbolic limit {reason}; numeric estimate: {value}", None, False
+        return value, method, status != 'timeout'
+
+    return memoized_symbolic('limit', (expr, symbol, sympy_point, Symbol(direction)), compute)
+
+
+def compute_series(expression: Any, variable: Any = 'x', point: Any = 0, order: Any = 6) -> Any:
+    """series('exp(x)', 'x' [, x0] [, n])：在 x0 处展开到 O((x - x0)^n)"""
+    from sympy import Symbol, Integer, latex
+    if not isinstance(expression, str):
+        raise ValueError("series() requires an expression string, e.g. series('exp(x)', 'x', 0, 6).")
+    if not isinstance(order, int) or not 1 <= order <= 50:
+        raise ValueError("series() order must be an integer between 1 and 50.")
+    symbol = Symbol(_names(variable, 'series')[0])
+    sympy_locals = {**get_base_sympy_locals(), symbol.name: symbol}
+    expr = sympify_equation(expression, sympy_locals)
+    sympy_point = sympify_point(point, sympy_locals)
+
+    def compute():
+        status, result, reason = run_symbolic(_series, (expr, symbol, sympy_point, order))
+        if status != 'ok':
+            # 级数展开没有合适的数值替代
+            return f"Error: Symbolic series expansion {reason}.", None, False
+        return f"$$ {latex(result)} $$", 'symbolic', True
+
+    return memoized_symbolic('series', (expr, symbol, sympy_point, Integer(order)), compute)
+
+
+# -- det / inv / eig --
+
+def _matrix_operation(matrix, operation: str):
+    if operation == 'det':
+        return matrix.det()
+    if operation == 'inv':
+        return matrix.inv()
+    return matrix.eigenvals()
+
+
+def _matrix_rows(matrix: Any, func_name: str) -> List[List[Any]]:
+    """方阵：行组成的列表，元素为数字或表达式字符串"""
+    if not is_data(matrix) or not len(matrix) or not all(is_data(row) or isinstance(row, tuple) for row in matrix):
+        raise ValueError(f"{func_name}() requires a square matrix given as a list of rows, e.g. {func_name}([[1, 2], [3, 4]]).")
+    rows = [list(row) for row in matrix]
+    if any(len(row) != len(rows) for row in rows):
+        raise ValueError(f"{func_name}() requires a square matrix; got {len(rows)} rows of lengths {[len(r) for r in rows]}.")
+    if not all(isinstance(v, (int, float, str)) and not isinstance(v, bool) for row in rows for v in row):
+        raise ValueError(f"{func_name}() matrix entries must be numbers or expression strings.")
+    return rows
+
+
+def numeric_matrix(operation: str, rows: List[List[Any]]) -> Tuple[Any, Optional[str]]:
+    import numpy
+    matrix = numpy.array(rows, dtype=float)
+    try:
+        if operation == 'det':
+            return float(numpy.linalg.det(matrix)), 'numeric (numpy.linalg)'
+        if operation == 'inv':
+            inverse = numpy.linalg.inv(matrix)
+            return '[' + ', '.join(_format_numbers(row) for row in inverse) + ']', 'numeric (numpy.linalg)'
+        eigenvalues = numpy.real_if_close(numpy.linalg.eigvals(matrix), tol=1000)
+        values = sorted(eigenvalues.tolist(), key=lambda v: (v.real, v.imag) if isinstance(v, complex) else (v, 0))
+        return '[' + ', '.join(format_result(v) for v in values) + ']', 'numeric (numpy.linalg)'
+    except numpy.linalg.LinAlgError as e:
+        return f"{e}.", None
+
+
+def _format_exact_matrix_result(operation: str, result) -> Any:
+    from sympy import latex
+    if operation == 'det':
+        if result.is_Integer:
+            return int(result)
+        return f"$$ {_latex_value(result)} $$"
+    if operation == 'inv':
+        if all(v.is_Rational for v in result):
+            return '[' + ', '.join('[' + ', '.join(str(v) for v in result.row(i)) + ']' for i in range(result.rows)) + ']'
+        return f"$$ {latex(result)} $$"
+    values = [value for value, multiplicity in result.items() for _ in range(multiplicity)]
+    if all(v.is_Rational for v in values):
+        return '[' + ', '.join(str(v) for v in sorted(values)) + ']'
+    return "$$ " + r',\ '.join(_latex_value(v) for v in values) + " $$"
+
+
+def compute_matrix(operation: str, matrix: Any) -> Any:
+    """det / inv / eig：小的整数或符号矩阵精确计算，浮点矩阵和大矩阵使用 numpy.linalg"""
+    rows = _matrix_rows(matrix, operation)
+    entries = [v for row in rows for v in row]
+    symbolic_entries = any(isinstance(v, str) for v in entries)
+    exact = len(rows) <= MATRIX_EXACT_MAX_SIZE and all(isinstance(v, (int, str)) for v in entries)
+    if not exact:
+        if symbolic_entries:
+            raise ValueError(f"{operation}() supports symbolic entries only in integer matrices up to {MATRIX_EXACT_MAX_SIZE}x{MATRIX_EXACT_MAX_SIZE}.")
+        result, method = numeric_fallback(numeric_matrix, operation, rows)
+        if method is None:
+            return f"Error: {result}"
+        evaluation_notes().append((operation, method))
+        return result
+
+    from sympy import ImmutableMatrix, sympify
+    sympy_locals = get_base_sympy_locals()
+    sympy_matrix = ImmutableMatrix([
+        [sympify(preprocess_expression_string(v), locals=sympy_locals) if isinstance(v, str) else v for v in row]
+        for row in rows
+    ])
+
+    def compute():
+        status, result, reason = run_symbolic(_matrix_operation, (sympy_matrix, operation))
+        if status == 'ok':
+            return _format_exact_matrix_result(operation, result), 'symbolic', True
+        if symbolic_entries:
+            return f"Error: Symbolic {operation} {reason}.", None, False
+        value, method = numeric_fallback(numeric_matrix, operation, rows)
+        if method is None:
+            return f"Error: Symbolic {operation} {reason}; numpy.linalg: {value}", None, False
+        return value, method, status != 'timeout'
+
+    return memoized_symbolic(operation, (sympy_matrix,), compute)
+
+
+# 符号计算函数（参数先由 AST 求值器求值）
+symbolic_functions = {
+    'solve': compute_solve,
+    'dsolve': compute_dsolve,
+    'limit': compute_limit,
+    'series': compute_series,
+    'det': functools.partial(compute_matrix, 'det'),
+    'inv': functools.partial(compute_matrix, 'inv'),
+    'eig': functools.partial(compute_matrix, 'eig'),
+}
+
+
+# 元素数达到该值的纯数字列表字面量在解析前直接转换为 NumPy 数组，统计函数改用 NumPy/SciPy；
+# 更短的列表仍走 AST 和 statistics，使小数据的计算不必导入 NumPy
+ARRAY_LITERAL_MIN_ITEMS = 256
+
+_NUMBER_PATTERN = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+_NUMERIC_LIST_PATTERN = re.compile(rf'\[\s*{_NUMBER_PATTERN}(?:\s*,\s*{_NUMBER_PATTERN})*\s*,?\s*\]')
+
+
+def extract_array_literals(expression_str: str) -> Tuple[str, List[Any]]:
+    """把较长的纯数字列表字面量替换为占位名 __arrayN__
+
+    Returns:
+        (替换后的表达式模板, 数组列表)
+    """
+    arrays = []
+
+    def replace(match):
+        text = match.group(0)
+        if text.count(',') + 1 < ARRAY_LITERAL_MIN_ITEMS:
+            return text
+        import numpy
+        arrays.append(numpy.array(text.strip('[], \t\r\n').split(','), dtype=float))
+        return f"__array{len(arrays) - 1}__"
+
+    if expression_str.count(',') + 1 < ARRAY_LITERAL_MIN_ITEMS:
+        return expression_str, arrays
+    return _NUMERIC_LIST_PATTERN.sub(replace, expression_str), arrays
+
+
+def is_data(value: Any) -> bool:
+    """是否为数据序列（列表或 NumPy 数组）"""
+    if isinstance(value, list):
+        return True
+    numpy = sys.modules.get('numpy')
+    return numpy is not None and isinstance(value, numpy.ndarray)
+
+
+def _to_array(data: Any, func_name: str, min_size: int = 1):
+    import numpy
+    if not is_data(data):
+        raise ValueError(f"{func_name} requires a list of numbers.")
+    try:
+        values = numpy.asarray(data, dtype=float)
+    except (TypeError, ValueError):
+        raise ValueError(f"{func_name} requires a list of numbers.")
+    if values.ndim != 1 or values.size < min_size:
+        raise ValueError(f"{func_name} requires a flat list of at least {min_size} number(s).")
+    return values
+
+
+def _use_numpy(data: Any) -> bool:
+    return not isinstance(data, list) or len(data) >= ARRAY_LITERAL_MIN_ITEMS
+
+
+def _format_numbers(values) -> str:
+    return '[' + ', '.join(f"{float(v):.6g}" for v in values) + ']'
+
+
+def compute_descriptive(func_name: str, data: Any) -> Any:
+    """mean / median / mode / variance / stdev"""
+    if not is_data(data):
+        raise ValueError(f"{func_name} requires a list input for its first argument.")
+    if not _use_numpy(data):
+        return math_functions[func_name](data)
+
+    import numpy
+    values = _to_array(data, func_name, 2 if func_name in ('variance', 'stdev') else 1)
+    if func_name == 'mean':
+        return float(values.mean())
+    if func_name == 'median':
+        return float(numpy.median(values))
+    if func_name == 'mode':
+        uniques, counts = numpy.unique(values, return_counts=True)
+        return float(uniques[counts.argmax()])
+    if func_name == 'variance':
+        return float(values.var(ddof=1))
+    return float(values.std(ddof=1))
+
+
+def compute_percentile(data: Any, q: Any) -> Any:
+    """percentile(data, q)：q 为 0-100 的数字或数字列表（线性插值）"""
+    import numpy
+    values = _to_array(data, 'percentile')
+    if is_data(q):
+        return _format_numbers(numpy.percentile(values, _to_array(q, 'percentile')))
+    if not isinstance(q, (int, float)) or not 0 <= q <= 100:
+        raise ValueError("percentile() requires q between 0 and 100.")
+    return float(numpy.percentile(values, q))
+
+
+def compute_histogram(data: Any, bins: Any = 10) -> str:
+    """histogram(data, [bins])：各区间计数和区间边界"""
+    import numpy
+    values = _to_array(data, 'histogram')
+    if not isinstance(bins, int) or bins < 1:
+        raise ValueError("histogram() bins must be a positive integer.")
+    counts, edges = numpy.histogram(values, bins=bins)
+    return f"counts = [{', '.join(str(int(c)) for c in counts)}], edges = {_format_numbers(edges)}"
+
+
+def compute_correlation(x: Any, y: Any) -> float:
+    """correlation(x, y)：Pearson 相关系数"""
+    import numpy
+    x_values, y_values = _to_array(x, 'correlation', 2), _to_array(y, 'correlation', 2)
+    if x_values.size != y_values.size:
+        raise ValueError("correlation() requires two lists of the same length.")
+    return float(numpy.corrcoef(x_values, y_values)[0, 1])
+
+
+def compute_linear_regression(x: Any, y: Any) -> str:
+    """linear_regression(x, y)：最小二乘直线 y = slope * x + intercept"""
+    x_values, y_values = _to_array(x, 'linear_regression', 2), _to_array(y, 'linear_regression', 2)
+    if x_values.size != y_values.size:
+        raise ValueError("linear_regression() requires two lists of the same length.")
+    fit = _scipy_stats().linregress(x_values, y_values)
+    return (f"slope = {fit.slope:.7g}, intercept = {fit.intercept:.7g}, r^2 = {fit.rvalue ** 2:.6g}, "
+            f"p = {fit.pvalue:.4g}, stderr = {fit.stderr:.4g}")
+
+
+def compute_t_test(data: Any, mu: Any) -> float:
+    if not (is_data(data) and isinstance(mu, (int, float))):
+        raise ValueError("t_test requires a list and a number (mu).")
+    return float(_scipy_stats().ttest_1samp(_to_array(data, 't_test', 2), mu).pvalue)
+
+
+# 以数据序列为参数的函数
+array_functions = {
+    'percentile': compute_percentile,
+    'histogram': compute_histogram,
+    'correlation': compute_correlation,
+    'linear_regression': compute_linear_regression,
+    't_test': compute_t_test,
+}
+
+
+def format_result(result: Any) -> str:
+    """把计算结果格式化为输出字符串"""
+    if isinstance(result, str): 
+        return result
+    # 结果是 SymPy 对象时 SymPy 必然已经导入；否则不必为了类型判断而导入它
+    sympy = sys.modules.get('sympy')
+    sympy_number_types = (sympy.Number,) if sympy else ()
+    if isinstance(result, (float,) + sympy_number_types): # sympy.Number includes Integer
+        try:
+            num_result = float(result) # Attempt to convert to Python float
+            if math.isinf(num_result) or math.isnan(num_result):
+                return str(num_result) 
+            formatted_float = f"{num_result:.10g}"
+            if '.' in formatted_float: 
+                formatted_float = formatted_float.rstrip('0').rstrip('.')
+            return formatted_float
+        except Exception: # If conversion to float fails for some SymPy Number type
+            return str(result) # Fallback to string representation of the SymPy number
+
+    if isinstance(result, int): # SymPy Integer is handled by sympy.Number above
+        return str(result)
+    if isinstance(result, complex): 
+         return f"{result.real:.10g}{'+' if result.imag >= 0 else ''}{result.imag:.10g}j".replace("+-","-")
+    return str(result)
+
+
+# 短表达式直接 ast.parse 比读取缓存文件更快，只有达到这个长度的表达式才读写 AST 缓存
+AST_CACHE_MIN_LENGTH = 256
+
+
+@functools.lru_cache(maxsize=256)
+def parse_expression(expression_str: str) -> ast.Expression:
+    """检查括号配对并解析表达式（批量模式中重复的表达式只解析一次，跨调用的重复长模板从表达式缓存读取）"""
+    use_cache = len(expression_str) >= AST_CACHE_MIN_LENGTH
+    cache_key = f"ast:{normalize_expression(expression_str)}"
+    cached = expression_cache.get(cache_key) if use_cache else None
+    if cached is not None:
+        try:
+            return ast_from_json(cached)
+        except (ValueError, TypeError, KeyError, IndexError):
+            pass
+
+    brackets = {'(': ')', '[': ']', '{': '}'}
+    stack = []
+    for char in expression_str:
+        if char in brackets.keys():
+            stack.append(char)
+        elif char in brackets.values():
+            if not stack or brackets[stack.pop()] != char:
+                raise SyntaxError(f"Mismatched parentheses or brackets in '{expression_str}'")
+    if stack:
+        raise SyntaxError(f"Unclosed parentheses or brackets in '{expression_str}'")
+
+    parsed = ast.parse(expression_str, mode='eval')
+    if use_cache:
+        try:
+            expression_cache.put(cache_key, ast_to_json(parsed))
+        except (ValueError, RecursionError):
+            pass # 含有求值器不支持的节点，不缓存
+    return parsed
+
+
+# 误差传递公式源码求值时可用的内置函数（SymPy 把 Abs、Min、Max 打印为内置函数）
+_FORMULA_BUILTINS = {'abs': abs, 'min': min, 'max': max}
+
+# 蒙特卡洛误差传递的默认和最大样本数
+MONTE_CARLO_SAMPLES = 100_000
+MONTE_CARLO_MAX_SAMPLES = 5_000_000
+
+
+def sympify_propagation_expression(expr_str: str, var_names: Tuple[str, ...]):
+    """解析误差传递的表达式，返回 (SymPy 表达式, 变量名到 Symbol 的映射)"""
+    from sympy import Symbol, sympify
+    symbols_map = {var_name: Symbol(var_name) for var_name in var_names}
+    current_locals = get_base_sympy_locals().copy()
+    current_locals.update(symbols_map)
+    return sympify(preprocess_expression_string(expr_str), locals=current_locals), symbols_map
+
+
+def error_propagation_formulas(expr_str: str, var_names: Tuple[str, ...]) -> Dict[str, Any]:
+    """
+    线性误差传递所需的公式源码，由 SymPy 求导一次生成，按规范化后的表达式和变量名持久化到表达式缓存：
+    value / partials 为函数值及雅可比矩阵各项的 Python 源码（math 模块），无法打印为代码的项为 None
+    """
+    cache_key = f"errprop:{normalize_expression(expr_str)}|{','.join(var_names)}"
+    formulas = expression_cache.get(cache_key)
+    if isinstance(formulas, dict) and _cached_formulas_are_safe(formulas, var_names):
+        return formulas
+
+    from sympy import diff
+    from sympy.printing.pycode import pycode
+    sympy_expr, symbols_map = sympify_propagation_expression(expr_str, var_names)
+
+    def to_python(expr) -> Optional[str]:
+        if expr.free_symbols - set(symbols_map.values()):
+            return None
+        try:
+            return pycode(expr, fully_qualified_modules=True)
+        except Exception:
+            return None
+
+    formulas = {
+        'value': to_python(sympy_expr),
+        'partials': [to_python(diff(sympy_expr, symbols_map[var_name])) for var_name in var_names]
+    }
+    expression_cache.put(cache_key, formulas)
+    return formulas
+
+
+@functools.lru_cache(maxsize=64)
+def vectorized_function(expr_str: str, var_names: Tuple[str, ...]):
+    """蒙特卡洛传递用的向量化函数：在本进程中由 SymPy 表达式 lambdify 生成（不持久化源码），无法生成时返回 None"""
+    from sympy import lambdify
+    sympy_expr, symbols_map = sympify_propagation_expression(expr_str, var_names)
+    if sympy_expr.free_symbols - set(symbols_map.values()):
+        return None
+    try:
+        return lambdify([symbols_map[name] for name in var_names], sympy_expr, modules=['scipy', 'numpy'])
+    except Exception:
+        return None
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_formula(source: str):
+    return compile(source, '<error_propagation>', 'eval')
+
+
+# 缓存的公式源码中允许出现的语法节点、math 模块成员（均为数值函数和常量）与内置函数。
+# 缓存文件可被改写，读回的源码不满足以下白名单时重新求导，而不是交给 eval
+_FORMULA_NODES = (
+    ast.Expression, ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp, ast.Call,
+    ast.Name, ast.Attribute, ast.Constant, ast.Load,
+    ast.operator, ast.unaryop, ast.boolop, ast.cmpop,
+)
+_MATH_NAMES = frozenset(name for name in dir(math) if not name.startswith('_'))
+
+
+def _is_formula_source(source: Any, var_names: Tuple[str, ...]) -> bool:
+    """源码只由数值常量、变量、算术和比较运算、math.<函数或常量> 以及 abs/min/max 调用组成"""
+    if not isinstance(source, str):
+        return False
+    try:
+        tree = ast.parse(source, mode='eval')
+    except (SyntaxError, ValueError, RecursionError):
+        return False
+    math_names = set()  # 作为 math.<name> 中 math 出现的 Name 节点
+    for node in ast.walk(tree):
+        if not isinstance(node, _FORMULA_NODES):
+            return False
+        if isinstance(node, ast.Attribute):
+            if not (isinstance(node.value, ast.Name) and node.value.id == 'math' and node.attr in _MATH_NAMES):
+                return False
+            math_names.add(id(node.value))
+        elif isinstance(node, ast.Call):
+            is_math_call = isinstance(node.func, ast.Attribute)
+            is_builtin_call = isinstance(node.func, ast.Name) and node.func.id in _FORMULA_BUILTINS
+            if not (is_math_call or is_builtin_call) or node.keywords:
+                return False
+        elif isinstance(node, ast.Constant):
+            if node.value is not None and type(node.value) not in (int, float, complex, bool):
+                return False
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and id(node) not in math_names and \
+           node.id not in var_names and node.id not in _FORMULA_BUILTINS:
+            return False
+    return True
+
+
+def _cached_formulas_are_safe(formulas: Dict[str, Any], var_names: Tuple[str, ...]) -> bool:
+    partials = formulas.get('partials')
+    if not isinstance(partials, list) or len(partials) != len(var_names):
+        return False
+    sources = [formulas.get('value'), *partials]
+    return all(source is None or _is_formula_source(source, var_names) for source in sources)
+
+
+def _usable_var_names(var_names: Tuple[str, ...]) -> bool:
+    """变量名不能遮蔽公式源码中用到的模块和内置函数"""
+    return not any(name in ('math', 'numpy', 'scipy') or name in _FORMULA_BUILTINS for name in var_names)
+
+
+def parse_measurements(vars_errors: Dict[str, Any]) -> Tuple[List[float], List[float]]:
+    """{var: (value, error)} -> (取值, 标准误差)"""
+    values, errors = [], []
+    for name, measurement in vars_errors.items():
+        if not isinstance(name, str) or not name.isidentifier():
+            raise ValueError(f"Variable names must be identifiers, got {name!r}.")
+        if not (isinstance(measurement, (tuple, list)) and len(measurement) == 2 and
+                all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in measurement)):
+            raise ValueError(f"Variable '{name}' must be given as (value, error), got {measurement!r}.")
+        if measurement[1] < 0:
+            raise ValueError(f"Error of '{name}' must not be negative.")
+        values.append(float(measurement[0]))
+        errors.append(float(measurement[1]))
+    return values, errors
+
+
+def is_positive_semidefinite(matrix: List[List[float]], tol: float = 1e-9) -> bool:
+    """对称矩阵是否半正定（带容差的 LDLᵀ 消元，矩阵很小，不必导入 NumPy）"""
+    n = len(matrix)
+    a = [list(row) for row in matrix]
+    scale = max((abs(v) for row in matrix for v in row), default=0.0) or 1.0
+    for k in range(n):
+        pivot = a[k][k]
+        if pivot < -tol * scale:
+            return False
+        if pivot <= tol * scale:
+            # 零主元所在的行必须全为零，否则存在行列式为负的 2 阶主子式
+            if any(abs(a[i][k]) > math.sqrt(tol) * scale for i in range(k + 1, n)):
+                return False
+            continue
+        for i in range(k + 1, n):
+            factor = a[i][k] / pivot
+            for j in range(k + 1, n):
+                a[i][j] -= factor * a[k][j]
+    return True
+
+
+def build_covariance(var_names: List[str], errors: List[float], correlation: Any = None) -> List[List[float]]:
+    """
+    输入量的协方差矩阵。correlation 可以是：
+    - None: 各输入独立，对角线为误差的平方
+    - 协方差矩阵：按变量顺序排列的 n×n 对称矩阵（此时对角线取代各变量给出的误差）
+    - 相关系数字典：{'x,y': 0.5, ...}，未列出的变量对视为不相关
+    """
+    n = len(var_names)
+    covariance = [[errors[i] * errors[j] if i == j else 0.0 for j in range(n)] for i in range(n)]
+    if correlation is None:
+        return covariance
+    if isinstance(correlation, dict):
+        index = {name: i for i, name in enumerate(var_names)}
+        for pair, rho in correlation.items():
+            names = [part.strip() for part in str(pair).split(',')]
+            if len(names) != 2 or not all(name in index for name in names) or names[0] == names[1]:
+                raise ValueError(f"Correlation keys must name two different variables, e.g. 'x,y'; got {pair!r}.")
+            if not isinstance(rho, (int, float)) or not -1 <= rho <= 1:
+                raise ValueError(f"Correlation coefficient for '{pair}' must be between -1 and 1.")
+            i, j = index[names[0]], index[names[1]]
+            covariance[i][j] = covariance[j][i] = rho * errors[i] * errors[j]
+        if not is_positive_semidefinite(covariance):
+            raise ValueError("Correlation coefficients are inconsistent (the covariance matrix is not positive semi-definite).")
+        return covariance
+    if is_data(correlation) and len(correlation) == n and all(is_data(row) or isinstance(row, tuple) for row in correlation):
+        matrix = [[float(v) for v in row] for row in correlation]
+        if all(len(row) == n for row in matrix) and \
+           all(abs(matrix[i][j] - matrix[j][i]) <= 1e-12 * max(1.0, abs(matrix[i][j])) for i in range(n) for j in range(n)):
+            if not is_positive_semidefinite(matrix):
+                raise ValueError("Covariance matrix must be positive semi-definite.")
+            return matrix
+    raise ValueError(f"Covariance must be a symmetric {n}x{n} matrix in the order {var_names}, or a dict such as {{'x,y': 0.5}}.")
+
+
+def linear_error(gradient: List[float], covariance: List[List[float]]) -> float:
+    """一阶（线性）误差传递：sqrt(J Σ Jᵀ)"""
+    n = len(gradient)
+    variance = sum(gradient[i] * covariance[i][j] * gradient[j] for i in range(n) for j in range(n))
+    # 半正定的协方差矩阵只会因舍入误差得到微小的负方差
+    return math.sqrt(max(variance, 0.0))
+
+
+def propagate_error(expr_str: str, vars_errors: Dict[str, Tuple[float, float]],
+                    correlation: Any = None) -> Optional[Tuple[float, float]]:
+    """
+    用缓存的公式源码以浮点数计算函数值和线性传递误差：雅可比矩阵编译为一个表达式，一次求值。
+    公式不可用或结果不是有限实数时返回 None（由调用方回退到 SymPy 逐项求值）
+    """
+    var_names = tuple(vars_errors.keys())
+    values, errors = parse_measurements(vars_errors)
+    covariance = build_covariance(list(var_names), errors, correlation)
+    if not _usable_var_names(var_names):
+        return None
+    formulas = error_propagation_formulas(expr_str, var_names)
+    partials = list(formulas.get('partials') or [])
+    if not isinstance(formulas.get('value'), str) or len(partials) != len(var_names) or \
+       not all(isinstance(source, str) for source in partials):
+        return None
+
+    namespace = {'math': math, '__builtins__': _FORMULA_BUILTINS}
+    point = dict(zip(var_names, values))
+    try:
+        value = eval(_compile_formula(formulas['value']), namespace, point)
+        gradient = eval(_compile_formula('(' + ', '.join(partials) + ',)'), namespace, point)
+    except (ArithmeticError, ValueError, TypeError, NameError, SyntaxError):
+        return None
+    if not all(isinstance(r, (int, float)) and math.isfinite(r) for r in (value, *gradient)):
+        return None
+    return float(value), linear_error([float(d) for d in gradient], covariance)
+
+
+def monte_carlo_error(expr_str: str, vars_errors: Dict[str, Tuple[float, float]],
+                      correlation: Any = None, samples: int = MONTE_CARLO_SAMPLES) -> str:
+    """
+    蒙特卡洛误差传递：从（相关的）正态分布一次抽取 samples 组输入，
+    用 lambdify 生成的向量化函数在整个样本数组上求值，适用于线性近似不成立的非线性情形
+    """
+    import numpy
+    if not isinstance(samples, int) or isinstance(samples, bool) or not 100 <= samples <= MONTE_CARLO_MAX_SAMPLES:
+        raise ValueError(f"Monte Carlo sample count must be an integer between 100 and {MONTE_CARLO_MAX_SAMPLES}.")
+    var_names = tuple(vars_errors.keys())
+    values, errors = parse_measurements(vars_errors)
+    covariance = build_covariance(list(var_names), errors, correlation)
+    if not _usable_var_names(var_names):
+        raise ValueError("Variable names must not be 'math', 'numpy', 'scipy', 'abs', 'min' or 'max'.")
+    function = vectorized_function(expr_str, var_names)
+    if function is None:
+        raise ValueError(f"'{expr_str}' cannot be vectorized (it uses unsupported functions or unknown symbols).")
+
+    rng = numpy.random.default_rng()
+    draws = rng.multivariate_normal(numpy.array(values), numpy.array(covariance), size=samples,
+                                    method='eigh', check_valid='ignore')
+
+    with numpy.errstate(all='ignore'):
+        outputs = function(*(draws[:, i] for i in range(len(var_names))))
+    outputs = numpy.broadcast_to(numpy.asarray(outputs), (samples,))
+    if numpy.iscomplexobj(outputs):
+        outputs = numpy.where(numpy.abs(outputs.imag) < 1e-12, outputs.real, numpy.nan)
+    finite = outputs[numpy.isfinite(outputs)]
+    if finite.size < 2:
+        raise ValueError(f"'{expr_str}' is undefined for almost all samples.")
+
+    low, high = numpy.percentile(finite, [2.5, 97.5])
+    result = (f"Mean = {finite.mean():.7g}, Std = {finite.std(ddof=1):.4g}, Median = {numpy.median(finite):.7g}, "
+              f"95% interval = [{low:.7g}, {high:.7g}] (Monte Carlo, N = {samples}")
+    if finite.size < samples:
+        result += f", {samples - finite.size} undefined samples dropped"
+    return result + ")"
+
+
 def evaluate(expression: str) -> str:
     # (evaluate function largely unchanged from previous, ensure it calls the modified compute_integral)
     # ... (rest of the evaluate, main, etc. functions are the same as your last provided version) ...
@@ -221,6 +1481,7 @@ def evaluate(expression: str) -> str:
             return node.value
         elif isinstance(node, ast.Name):
             if node.id in constants: return constants[node.id]
+            if node.id in array_literals: return array_literals[node.id]
             nid = node.id.lower()
             if nid == 'inf' or nid == 'infinity': return float('inf')
             if nid == '-inf' or nid == '-infinity': return float('-inf')
@@ -233,6 +1494,10 @@ def evaluate(expression: str) -> str:
                 raise ValueError(f"Cannot perform arithmetic operation '{type(node.op).__name__}' with non-numeric string operands: '{left}', '{right}'")
             if not all(isinstance(x, (int, float, complex)) for x in [left, right]):
                      raise ValueError(f"Operands for '{type(node.op).__name__}' must be numeric, got {type(left).__name__} and {type(right).__name__}")
+            if isinstance(node.op, ast.Pow) and isinstance(left, int) and isinstance(right, int) and \
+               right > 0 and abs(left) > 1 and right * math.log2(abs(left)) > MAX_INT_POW_BITS:
+                # 超大整数乘方在 C 代码中执行，无法被计算时限打断
+                raise OverflowError("integer power result is too large")
             if type(node.op) in allowed_operators:
                 return allowed_operators[type(node.op)](left, right)
             raise ValueError(f"Unsupported binary operation: {type(node.op).__name__}")
@@ -281,30 +1546,46 @@ def evaluate(expression: str) -> str:
             args = [eval_expr(arg) for arg in node.args]
             
             if func_name == 'error_propagation':
-                if len(args) != 2 or not isinstance(args[0], str) or not isinstance(args[1], dict):
-                    raise ValueError("error_propagation() requires expr_str, {var: (value, error)}")
-                return compute_error_propagation(args[0], args[1]) 
+                if not 2 <= len(args) <= 3 or not isinstance(args[0], str) or not isinstance(args[1], dict):
+                    raise ValueError("error_propagation() requires expr_str, {var: (value, error)} [, covariance matrix or {'x,y': correlation}]")
+                return compute_error_propagation(*args)
+            elif func_name == 'error_propagation_mc':
+                if not 2 <= len(args) <= 4 or not isinstance(args[0], str) or not isinstance(args[1], dict):
+                    raise ValueError("error_propagation_mc() requires expr_str, {var: (value, error)} [, covariance matrix or {'x,y': correlation}] [, samples]")
+                return compute_error_propagation_mc(*args)
             elif func_name == 'confidence_interval':
                 if len(args) < 2:
                     raise ValueError("confidence_interval() requires data_list and confidence_level")
                 return compute_confidence_interval(args[0], args[1], args[2] if len(args) > 2 else None) 
+            elif func_name in symbolic_functions:
+                try:
+                    return symbolic_functions[func_name](*args)
+                except TypeError as te:
+                    if 'positional argument' not in str(te):
+                        raise
+                    raise ValueError(f"Incorrect number of arguments for {func_name}")
+            elif func_name in array_functions:
+                try:
+                    return array_functions[func_name](*args)
+                except TypeError:
+                    raise ValueError(f"Incorrect number of arguments for {func_name}")
             elif func_name in math_functions:
                 if func_name == 'log' and len(args) == 2: return math_functions[func_name](args[0], args[1]) 
                 if func_name == 'root' and len(args) == 2: return math_functions[func_name](args[0], args[1]) 
                 if func_name in ['mean', 'median', 'mode', 'variance', 'stdev']:
-                    if not isinstance(args[0], list): raise ValueError(f"{func_name} requires a list input for its first argument.")
-                    return math_functions[func_name](*args) 
-                if func_name == 't_test': 
-                     if not (isinstance(args[0], list) and isinstance(args[1], (int,float))):
-                         raise ValueError("t_test requires a list and a number (mu).")
-                     return math_functions[func_name](args[0], args[1])
+                    if len(args) != 1: raise ValueError(f"{func_name} requires exactly one list argument.")
+                    return compute_descriptive(func_name, args[0])
                 if func_name in ['norm_pdf', 'norm_cdf']:
                     if len(args) != 3: raise ValueError(f"{func_name} requires x, mean, std_dev")
                     return math_functions[func_name](args[0], loc=args[1], scale=args[2])
                 if len(args) == 1: return math_functions[func_name](args[0])
                 raise ValueError(f"Incorrect number of arguments or argument type for {func_name}")
             raise ValueError(f"Unsupported function: {func_name}")
-        elif isinstance(node, ast.List): return [eval_expr(elt) for elt in node.elts]
+        elif isinstance(node, ast.List):
+            # 纯数字列表直接取值，不再逐个节点递归
+            if all(isinstance(elt, ast.Constant) and isinstance(elt.value, (int, float)) for elt in node.elts):
+                return [elt.value for elt in node.elts]
+            return [eval_expr(elt) for elt in node.elts]
         elif isinstance(node, ast.Dict): 
             keys = []
             for k_node in node.keys:
@@ -317,91 +1598,87 @@ def evaluate(expression: str) -> str:
         elif isinstance(node, ast.Tuple): return tuple(eval_expr(elt) for elt in node.elts)
         raise ValueError(f"Unsupported AST node: {type(node).__name__}")
 
-    def compute_error_propagation(expr_str: str, vars_errors: Dict[str, Tuple[float, float]]) -> str:
+    def compute_error_propagation(expr_str: str, vars_errors: Dict[str, Tuple[float, float]], correlation: Any = None) -> str:
+        try:
+            propagated = propagate_error(expr_str, vars_errors, correlation)
+        except Exception:
+            propagated = None # 交给下面的 SymPy 逐项求值给出具体错误
+        if propagated is not None:
+            return f"Value = {propagated[0]:.7g}, Error = {propagated[1]:.4g}"
+
+        from sympy import Symbol, sympify, diff, latex
         try:
+            values, errors = parse_measurements(vars_errors)
+            covariance = build_covariance(list(vars_errors.keys()), errors, correlation)
             symbols_map = {var_name: Symbol(var_name) for var_name in vars_errors.keys()}
             # Ensure that base_sympy_locals are available and that symbols from vars_errors take precedence
-            current_locals = base_sympy_locals.copy()
+            current_locals = get_base_sympy_locals().copy()
             current_locals.update(symbols_map)
             sympy_expr = sympify(preprocess_expression_string(expr_str), locals=current_locals) # Preprocess here too
             
-            subs_values = {symbols_map[k]: v[0] for k, v in vars_errors.items()}
+            subs_values = {symbols_map[k]: v for k, v in zip(vars_errors.keys(), values)}
             calculated_value = sympy_expr.subs(subs_values).evalf()
 
-            total_error_sq = sympy.S.Zero
-            for var_name, (val, err) in vars_errors.items():
-                s_var = symbols_map[var_name]
-                partial_derivative = diff(sympy_expr, s_var)
-                partial_derivative_val = partial_derivative.subs(subs_values).evalf()
+            gradient = []
+            for var_name in vars_errors.keys():
+                partial_derivative_val = diff(sympy_expr, symbols_map[var_name]).subs(subs_values).evalf()
                 if not partial_derivative_val.is_number: # Check if derivative is numeric
                      raise ValueError(f"Partial derivative w.r.t '{var_name}' is not numeric: {latex(partial_derivative_val)}")
-                total_error_sq += (partial_derivative_val * err)**2
+                gradient.append(float(partial_derivative_val))
             
-            final_error = sympy.sqrt(total_error_sq).evalf()
-            if not calculated_value.is_number or not final_error.is_number:
+            if not calculated_value.is_number:
                 raise ValueError("Calculated value or final error is not numeric.")
+            final_error = linear_error(gradient, covariance)
 
-            return f"Value = {float(calculated_value):.7g}, Error = {float(final_error):.4g}"
+            return f"Value = {float(calculated_value):.7g}, Error = {final_error:.4g}"
         except Exception as e:
             return f"Error in error_propagation for '{expr_str}': {type(e).__name__} - {str(e)}"
 
+    def compute_error_propagation_mc(expr_str: str, vars_errors: Dict[str, Tuple[float, float]], *options: Any) -> str:
+        # 可选参数：协方差矩阵或相关系数字典、样本数（整数），顺序不限
+        correlation = next((o for o in options if not isinstance(o, int)), None)
+        samples = next((o for o in options if isinstance(o, int)), MONTE_CARLO_SAMPLES)
+        try:
+            return monte_carlo_error(expr_str, vars_errors, correlation, samples)
+        except Exception as e:
+            return f"Error in error_propagation_mc for '{expr_str}': {type(e).__name__} - {str(e)}"
+
     def compute_confidence_interval(data: list, confidence_level: float, population_mean: float = None) -> str:
         try:
-            if not isinstance(data, list) or not all(isinstance(x, (int, float)) for x in data):
+            if not is_data(data) or (isinstance(data, list) and not all(isinstance(x, (int, float)) for x in data)):
                 return "Error: Data for confidence_interval must be a list of numbers."
             if not isinstance(confidence_level, (int, float)) or not (0 < confidence_level < 1):
                 return "Error: Confidence level must be a number between 0 and 1."
             n = len(data)
             if n < 2: return "Error: Data sample too small for confidence interval (need at least 2 points)."
             
-            sample_mean = statistics.mean(data)
-            sample_std = statistics.stdev(data)
+            sample_mean = compute_descriptive('mean', data)
+            sample_std = compute_descriptive('stdev', data)
             
             # Using Scipy's t.interval for more robust CI calculation
-            ci_lower, ci_upper = stats.t.interval(confidence_level, df=n-1, loc=sample_mean, scale=sample_std/math.sqrt(n))
+            ci_lower, ci_upper = _scipy_stats().t.interval(confidence_level, df=n-1, loc=sample_mean, scale=sample_std/math.sqrt(n))
             
             return f"[{float(ci_lower):.6g}, {float(ci_upper):.6g}] ({(confidence_level*100):.0f}% CI for mean)"
         except Exception as e:
             return f"Error in confidence_interval: {str(e)}"
 
+    notes = evaluation_notes()
+    notes.clear()
+    array_literals: Dict[str, Any] = {}
     try:
         expression_str_input = str(expression).strip()
         if not expression_str_input:
             raise ValueError("Expression cannot be empty.")
-        
-        brackets = {'(': ')', '[': ']', '{': '}'}
-        stack = []
-        for char in expression_str_input:
-            if char in brackets.keys():
-                stack.append(char)
-            elif char in brackets.values():
-                if not stack or brackets[stack.pop()] != char:
-                    raise SyntaxError(f"Mismatched parentheses or brackets in '{expression_str_input}'")
-        if stack:
-            raise SyntaxError(f"Unclosed parentheses or brackets in '{expression_str_input}'")
-
-        parsed_expr = ast.parse(expression_str_input, mode='eval')
-        result = eval_expr(parsed_expr.body)
-        
-        if isinstance(result, str): 
-            return result
-        if isinstance(result, (float, sympy.Float, sympy.Rational, sympy.Number)): # sympy.Number includes Integer
-            try:
-                num_result = float(result) # Attempt to convert to Python float
-                if math.isinf(num_result) or math.isnan(num_result):
-                    return str(num_result) 
-                formatted_float = f"{num_result:.10g}"
-                if '.' in formatted_float: 
-                    formatted_float = formatted_float.rstrip('0').rstrip('.')
-                return formatted_float
-            except Exception: # If conversion to float fails for some SymPy Number type
-                return str(result) # Fallback to string representation of the SymPy number
-
-        if isinstance(result, (int, sympy.Integer)): # Redundant due to sympy.Number above, but harmless
-            return str(result)
-        if isinstance(result, complex): 
-             return f"{result.real:.10g}{'+' if result.imag >= 0 else ''}{result.imag:.10g}j".replace("+-","-")
-        return str(result)
+
+        template, arrays = extract_array_literals(expression_str_input)
+        array_literals.update((f"__array{i}__", values) for i, values in enumerate(arrays))
+        parsed_expr = parse_expression(template)
+        result = format_result(eval_expr(parsed_expr.body))
+        methods: Dict[str, List[str]] = {}
+        for func_name, method in notes:
+            methods.setdefault(func_name, []).append(method)
+        result += ''.join(f" [{func_name} method: {'; '.join(m)}]" for func_name, m in methods.items())
+        return result
 
     except SyntaxError as se:
         return f"Syntax Error: Invalid mathematical expression. Details: {str(se)}"
@@ -418,43 +1695,161 @@ def evaluate(expression: str) -> str:
 
 import json
 
-def main():
-    # (main function unchanged from previous version)
-    expression_input = sys.stdin.readline().strip()
+ERROR_PREFIXES = ("Error:", "Syntax Error:", "Input Error:", "Calculation Error:")
+
 
+def is_error_result(result_str: Any) -> bool:
+    # Warnings ("Potentially large error") are not hard errors for status
+    return isinstance(result_str, str) and result_str.startswith(ERROR_PREFIXES)
+
+
+def evaluate_with_timeout(expression: str, timeout: float = None) -> str:
+    """在工作线程中计算表达式，超过时限时返回错误
+
+    超时的计算线程无法被终止，会在后台继续运行直到结束，但不影响后续表达式的结果。
+    """
+    timeout = timeout or EXPRESSION_TIMEOUT
+    outcome = {}
+
+    def run():
+        _evaluation_state.deadline = time.monotonic() + timeout
+        outcome['result'] = evaluate(expression)
+
+    worker = threading.Thread(target=run, daemon=True)
+    worker.start()
+    worker.join(timeout)
+    if worker.is_alive():
+        return f"Error: Evaluation timed out after {timeout:.3g}s."
+    return outcome['result']
+
+
+def parse_input(raw_input: str) -> Tuple[List[Any], bool, Any]:
+    """解析标准输入
+
+    支持：单个表达式（原始文本或 {"expression": ...}）；批量表达式（JSON 数组、
+    {"expressions": [...] 或 JSON 数组字符串或多行文本}、每行一个表达式的 NDJSON）。
+    批量中的每一项可以是字符串或 {"expression": ..., "timeout": 秒}。
+
+    Returns:
+        (表达式列表, 是否为批量模式, 默认时限)
+    """
+    raw_input = raw_input.strip()
     try:
         # Attempt to parse the input as JSON, in case the expression is wrapped in a JSON object.
-        data = json.loads(expression_input)
-        if isinstance(data, dict) and 'expression' in data:
-            expression_input = data['expression']
+        data = json.loads(raw_input)
     except (json.JSONDecodeError, TypeError):
-        # If it's not valid JSON or not a dict, assume it's a raw expression string.
-        pass
+        lines = [line.strip() for line in raw_input.splitlines() if line.strip()]
+        if len(lines) <= 1:
+            # If it's not valid JSON, assume it's a raw expression string.
+            return [raw_input], False, None
+        return [_decode_line(line) for line in lines], True, None
+
+    if isinstance(data, list):
+        return data, True, None
+    if isinstance(data, dict):
+        if 'expressions' in data:
+            items = data['expressions']
+            if isinstance(items, str):
+                try:
+                    items = json.loads(items)
+                except json.JSONDecodeError:
+                    items = [_decode_line(line) for line in items.splitlines() if line.strip()]
+            if not isinstance(items, list):
+                items = [items]
+            return items, True, data.get('timeout')
+        if 'expression' in data:
+            return [data['expression']], False, data.get('timeout')
+    if isinstance(data, str):
+        return [data], False, None
+    return [raw_input], False, None
+
+
+def _decode_line(line: str) -> Any:
+    """NDJSON 中的一行：JSON 字符串 / 对象，或原始表达式文本"""
+    try:
+        item = json.loads(line)
+    except json.JSONDecodeError:
+        return line
+    return item if isinstance(item, (str, dict)) else line
+
+
+def evaluate_batch(items: List[Any], default_timeout: Any = None) -> List[Dict[str, Any]]:
+    """按顺序计算多个表达式，每项单独计时和限时
+
+    整批共用 SCICALC_BATCH_TIMEOUT 的总时限：每项的时限不超过剩余时间，
+    总时限用完后尚未开始的项直接记为超时。
+    """
+    batch_deadline = time.monotonic() + BATCH_TIMEOUT
+    results = []
+    for index, item in enumerate(items):
+        timeout = default_timeout
+        expression = item
+        if isinstance(item, dict):
+            expression = item.get('expression', '')
+            timeout = item.get('timeout', default_timeout)
+        expression = str(expression or '').strip()
+
+        started = time.perf_counter()
+        try:
+            timeout = float(timeout) if timeout else None
+        except (TypeError, ValueError):
+            timeout = None
+        remaining = batch_deadline - time.monotonic()
+        if not expression:
+            result_str = "Error: No expression provided."
+        elif remaining <= 0:
+            result_str = f"Error: Batch time limit of {BATCH_TIMEOUT:g}s exceeded before evaluation started."
+        else:
+            result_str = evaluate_with_timeout(expression, min(timeout or EXPRESSION_TIMEOUT, remaining))
+
+        entry = {'index': index, 'expression': expression}
+        if is_error_result(result_str):
+            entry.update(status='error', error=result_str)
+        else:
+            entry.update(status='success', result=result_str)
+        entry['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        results.append(entry)
+    return results
+
+
+def main():
+    items, is_batch, default_timeout = parse_input(sys.stdin.read())
 
     output = {}
-    if not expression_input:
-        output = {"status": "error", "error": "SciCalculator Plugin Error: No expression provided."}
+    if is_batch:
+        if not items:
+            output = {"status": "error", "error": "SciCalculator Plugin Error: No expressions provided."}
+        else:
+            results = evaluate_batch(items, default_timeout)
+            lines = [
+                f"{r['index'] + 1}. {r['expression']} = {r['result'] if r['status'] == 'success' else r['error']}"
+                for r in results
+            ]
+            succeeded = sum(1 for r in results if r['status'] == 'success')
+            output = {
+                "status": "success" if succeeded else "error",
+                "result" if succeeded else "error": "###计算结果：\n" + "\n".join(lines) + "\n###，请将结果转告用户",
+                "results": results
+            }
     else:
-        result_str = evaluate(expression_input)
-        error_prefixes = ("Error:", "Syntax Error:", "Input Error:", "Calculation Error:") 
-        
-        is_error_result = False
-        if isinstance(result_str, str):
-            for prefix in error_prefixes:
-                if result_str.startswith(prefix) : 
-                    is_error_result = True
-                    break
-            # Warnings are not necessarily hard errors for status
-            if result_str.startswith("Warning:") and "Potentially large error" in result_str:
-                pass # This is a success with a caveat
-
-        if is_error_result:
-            output = {"status": "error", "error": result_str}
+        expression_input = str(items[0] or '').strip()
+        if not expression_input:
+            output = {"status": "error", "error": "SciCalculator Plugin Error: No expression provided."}
         else:
-            ai_friendly_result = result_str
-            formatted_result_for_ai = f"###计算结果：{ai_friendly_result}###，请将结果转告用户"
-            output = {"status": "success", "result": formatted_result_for_ai}
+            try:
+                timeout = float(default_timeout) if default_timeout else None
+            except (TypeError, ValueError):
+                timeout = None
+            result_str = evaluate_with_timeout(expression_input, timeout)
+
+            if is_error_result(result_str):
+                output = {"status": "error", "error": result_str}
+            else:
+                ai_friendly_result = result_str
+                formatted_result_for_ai = f"###计算结果：{ai_friendly_result}###，请将结果转告用户"
+                output = {"status": "success", "result": formatted_result_for_ai}
 
+    expression_cache.save()
     print(json.dumps(output), file=sys.stdout)
     sys.exit(0 if output.get("status") == "success" else 1)
 
@@ -0,0 +1,184 @@
+"""
+SciCalculator 表达式缓存
+
+每次计算都是一个新进程，同一个表达式模板（例如只换了数据的统计表达式、换了测量值的
+误差传递公式）会被反复解析和求导。本模块把以下内容按规范化后的表达式字符串持久化到
+一个 JSON 文件：
+- 通过白名单校验的长表达式的 AST（序列化为紧凑的 JSON 列表），命中时跳过括号检查和 ast.parse
+- 线性误差传递公式的 Python 源码和雅可比矩阵各项的源码（由 SymPy 生成），命中时无需导入 SymPy；
+  读回的源码求值前由计算器校验语法节点，不符合时重新求导
+- solve、dsolve、limit、series 和矩阵运算的结果（键为 SymPy 规范化后参数的 srepr）
+
+条目数超过上限时按最近使用时间淘汰。命中只在内存中更新使用时间，只有本进程新增了条目时才写回；
+写回时在文件锁内与磁盘上的最新内容合并，并发的进程不会互相覆盖新增的条目。
+缓存只是加速手段，读写失败时静默忽略。
+"""
+
+import ast
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Set
+
+
+def normalize_expression(expression_str: str) -> str:
+    """缓存键：折叠空白"""
+    return ' '.join(expression_str.split())
+
+
+# ---- AST <-> JSON ----
+# 只接受计算器求值器支持的节点类型，其它节点（属性访问、下标、关键字参数等）不缓存
+
+_BIN_OPS = {cls.__name__: cls for cls in (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)}
+_UNARY_OPS = {cls.__name__: cls for cls in (ast.USub,)}
+
+
+def ast_to_json(node: ast.AST) -> Any:
+    """把 AST 序列化为 JSON 列表；遇到不支持的节点时抛出 ValueError"""
+    if isinstance(node, ast.Expression):
+        return ast_to_json(node.body)
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool) or not isinstance(node.value, (int, float, str)):
+            raise ValueError(f"Uncacheable constant: {node.value!r}")
+        return ['C', node.value]
+    if isinstance(node, ast.Name):
+        return ['N', node.id]
+    if isinstance(node, ast.BinOp) and type(node.op).__name__ in _BIN_OPS:
+        return ['B', type(node.op).__name__, ast_to_json(node.left), ast_to_json(node.right)]
+    if isinstance(node, ast.UnaryOp) and type(node.op).__name__ in _UNARY_OPS:
+        return ['U', type(node.op).__name__, ast_to_json(node.operand)]
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and not node.keywords:
+        return ['F', node.func.id, [ast_to_json(arg) for arg in node.args]]
+    if isinstance(node, ast.List):
+        return ['L', [ast_to_json(elt) for elt in node.elts]]
+    if isinstance(node, ast.Tuple):
+        return ['T', [ast_to_json(elt) for elt in node.elts]]
+    if isinstance(node, ast.Dict) and all(key is not None for key in node.keys):
+        return ['D', [ast_to_json(key) for key in node.keys], [ast_to_json(value) for value in node.values]]
+    raise ValueError(f"Uncacheable AST node: {type(node).__name__}")
+
+
+def _node_from_json(data: Any) -> ast.AST:
+    kind = data[0]
+    if kind == 'C':
+        return ast.Constant(value=data[1])
+    if kind == 'N':
+        return ast.Name(id=data[1], ctx=ast.Load())
+    if kind == 'B':
+        return ast.BinOp(left=_node_from_json(data[2]), op=_BIN_OPS[data[1]](), right=_node_from_json(data[3]))
+    if kind == 'U':
+        return ast.UnaryOp(op=_UNARY_OPS[data[1]](), operand=_node_from_json(data[2]))
+    if kind == 'F':
+        return ast.Call(func=ast.Name(id=data[1], ctx=ast.Load()), args=[_node_from_json(arg) for arg in data[2]], keywords=[])
+    if kind == 'L':
+        return ast.List(elts=[_node_from_json(elt) for elt in data[1]], ctx=ast.Load())
+    if kind == 'T':
+        return ast.Tuple(elts=[_node_from_json(elt) for elt in data[1]], ctx=ast.Load())
+    if kind == 'D':
+        return ast.Dict(keys=[_node_from_json(key) for key in data[1]], values=[_node_from_json(value) for value in data[2]])
+    raise ValueError(f"Unknown cached node kind: {kind!r}")
+
+
+def ast_from_json(data: Any) -> ast.Expression:
+    return ast.Expression(body=_node_from_json(data))
+
+
+@contextmanager
+def _file_lock(path: str):
+    """跨进程的排他锁（POSIX 使用 fcntl.flock，Windows 使用 msvcrt.locking）"""
+    with open(path, 'a+b') as f:
+        if os.name == 'nt':
+            import msvcrt
+            f.seek(0)
+            # LK_LOCK 在锁被占用时每秒重试一次，最多 10 次
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class ExpressionCache:
+    """持久化的表达式缓存（进程内首次使用时加载，进程结束前保存新增的条目）"""
+
+    def __init__(self, path: str, max_entries: int = 512, max_key_length: int = 4096):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_key_length = max_key_length # 内联了大量数据的一次性表达式不值得持久化
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._added: Set[str] = set()   # 本进程新增的键
+        self._touched: Set[str] = set() # 本进程命中的键，写回时顺带更新其使用时间
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def _read_file(self) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            self._entries = self._read_file()
+        return self._entries
+
+    def get(self, key: str) -> Any:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._load().get(key)
+            if not isinstance(entry, dict):
+                return None
+            entry['t'] = time.time()
+            self._touched.add(key)
+            return entry.get('v')
+
+    def put(self, key: str, value: Any):
+        if not self.enabled or len(key) > self.max_key_length:
+            return
+        with self._lock:
+            self._load()[key] = {'v': value, 't': time.time()}
+            self._added.add(key)
+
+    def save(self):
+        """把本进程新增的条目合并进缓存文件，超过条目上限时保留最近使用的条目"""
+        if not self.enabled or not self._added:
+            return
+        with self._lock:
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                with _file_lock(f"{self.path}.lock"):
+                    # 其它进程可能在本进程加载之后写过文件，以磁盘上的最新内容为准合并
+                    entries = self._read_file()
+                    for key in self._touched - self._added:
+                        if isinstance(entries.get(key), dict):
+                            entries[key]['t'] = max(entries[key].get('t', 0), self._entries[key]['t'])
+                    for key in self._added:
+                        entries[key] = self._entries[key]
+                    if len(entries) > self.max_entries:
+                        newest = sorted(entries.items(), key=lambda item: item[1].get('t', 0), reverse=True)
+                        entries = dict(newest[:self.max_entries])
+                    temp_path = f"{self.path}.{os.getpid()}.tmp"
+                    with open(temp_path, 'w', encoding='utf-8') as f:
+                        json.dump(entries, f, ensure_ascii=False, separators=(',', ':'))
+                    os.replace(temp_path, self.path)
+                self._entries = entries
+                self._added.clear()
+                self._touched.clear()
+            except (OSError, TypeError, ValueError):
+                pass